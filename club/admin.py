@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Club, Workingoaches, MembershipPlans, MembershipPlanFeatures, Facility, FacilityBooking, FacilityServices
+from .models import Club, Workingoaches, MembershipPlans, MembershipPlanFeatures, Facility, FacilityBooking, FacilityServices, MemberSubscription, CheckIn
 
 
 @admin.register(Workingoaches)
@@ -41,18 +41,28 @@ class FacilityServicesInline(admin.TabularInline):
 
 @admin.register(Facility)
 class FacilityAdmin(admin.ModelAdmin):
-    list_display = ('name', 'is_active')
+    list_display = ('name', 'capacity', 'opens_at', 'closes_at', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('name',)
     inlines = [FacilityServicesInline]
 
 @admin.register(FacilityBooking)
 class FacilityBookingAdmin(admin.ModelAdmin):
-    list_display = ('facility', 'booking_date', 'time_flag')
-    list_filter = ('booking_date', 'time_flag')
+    list_display = ('facility', 'trainer', 'booking_date', 'time_flag')
+    list_filter = ('booking_date', 'time_flag', 'trainer')
     search_fields = ('facility__name',)
 
 
-    
-    
+@admin.register(MemberSubscription)
+class MemberSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('member_number', 'full_name', 'membership_plan', 'starts_on', 'ends_on', 'is_active')
+    list_filter = ('is_active', 'membership_plan', 'ends_on')
+    search_fields = ('member_number', 'full_name', 'phone')
 
+
+@admin.register(CheckIn)
+class CheckInAdmin(admin.ModelAdmin):
+    list_display = ('member_number', 'granted', 'checked_in_at')
+    list_filter = ('granted', 'checked_in_at')
+    search_fields = ('member_number',)
+    readonly_fields = ('member_number', 'subscription', 'granted', 'checked_in_at')
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+KEY = 'club:version:{}'
+
+
+def is_shared():
+    """Whether every worker sees the same counters, i.e. the cache is not per-process."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_versions(*names):
+    """Return the current counter for each name; cached fragments embed it in their key."""
+    keys = {KEY.format(name): name for name in names}
+    found = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    if not is_shared():
+        # رفع العداد في ذاكرة محلية لا يصل إلا للعامل الحالي؛ نافذة زمنية مشتركة تجدد الإصدار في كل العمال
+        window = int(time.time() // settings.CLUB_LOCAL_CACHE_SECONDS)
+        return {keys[key]: f'{value}.{window}' for key, value in found.items()}
+    return {keys[key]: value for key, value in found.items()}
+
+
+def get_version(name):
+    return get_versions(name)[name]
+
+
+def timeout(seconds):
+    """Lifetime for an entry keyed on the counters: ``seconds``, or one window when the cache is per-process."""
+    return seconds if is_shared() else min(seconds, settings.CLUB_LOCAL_CACHE_SECONDS)
+
+
+def bump(name):
+    """Invalidate everything keyed on ``name`` by moving its counter forward."""
+    key = KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
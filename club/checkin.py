@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from pages.writebehind import WriteBehindQueue
+
+from .models import CheckIn, MemberSubscription, MembershipPlanFeatures
+
+logger = logging.getLogger(__name__)
+
+
+class ValiditySnapshot:
+    """
+    Immutable, array-backed view of every member allowed in today.
+
+    ``members`` is sorted so lookups are a binary search; ``ends`` and
+    ``plans`` are parallel arrays holding the expiry date ordinal and the
+    index of the plan in ``plan_info``.
+    """
+
+    def __init__(self, rows, features):
+        best = {}
+        for member, subscription_id, ends_on, plan_id in rows:
+            current = best.get(member)
+            if current is None or ends_on > current[1]:
+                best[member] = (subscription_id, ends_on, plan_id)
+
+        plan_ids = sorted({plan_id for _, _, plan_id in best.values()})
+        plan_index = {plan_id: index for index, plan_id in enumerate(plan_ids)}
+        self.plan_info = [
+            (plan_id, features.get(plan_id, ('', ()))[0], features.get(plan_id, ('', ()))[1])
+            for plan_id in plan_ids
+        ]
+
+        ordered = sorted(best.items())
+        self.members = array('L', (member for member, _ in ordered))
+        self.subscriptions = array('Q', (value[0] for _, value in ordered))
+        self.ends = array('L', (value[1].toordinal() for _, value in ordered))
+        self.plans = array('H', (plan_index[value[2]] for _, value in ordered))
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.members)
+
+    def lookup(self, member, today_ordinal):
+        index = bisect_left(self.members, member)
+        if index == len(self.members) or self.members[index] != member:
+            return None
+        if self.ends[index] < today_ordinal:
+            return None
+        plan_id, plan_name, plan_features = self.plan_info[self.plans[index]]
+        return {
+            'subscription_id': self.subscriptions[index],
+            'valid_until': self.ends[index],
+            'plan_id': plan_id,
+            'plan': plan_name,
+            'features': plan_features,
+        }
+
+
+def load_snapshot():
+    today = timezone.localdate()
+    rows = MemberSubscription.objects.filter(
+        is_active=True,
+        starts_on__lte=today,
+        ends_on__gte=today,
+        membership_plan__is_active=True,
+    ).values_list('member_number', 'id', 'ends_on', 'membership_plan_id')
+
+    features = {}
+    for plan_id, plan_name, feature in MembershipPlanFeatures.objects.filter(
+        is_active=True, membership_plan__is_active=True,
+    ).values_list('membership_plan_id', 'membership_plan__name', 'name'):
+        name, names = features.get(plan_id, (plan_name, ()))
+        features[plan_id] = (name, names + (feature,))
+    return ValiditySnapshot(rows.iterator(chunk_size=5000), features)
+
+
+class CheckInService:
+    """
+    Owns the validity snapshot and the pending check-in buffer.
+
+    A daemon thread reloads the snapshot every ``refresh_seconds``.
+    Check-ins go through a ``WriteBehindQueue`` that writes them with
+    ``bulk_create``; requests never touch the database.
+    """
+
+    def __init__(self, refresh_seconds, flush_seconds, flush_size, max_pending):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot = None
+        self.queue = WriteBehindQueue(
+            CheckIn, flush_interval=flush_seconds, flush_size=flush_size, max_pending=max_pending,
+        )
+        self._wake = threading.Event()
+        self._stale = threading.Event()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='club-checkin', daemon=True)
+                self._thread.start()
+
+    def mark_stale(self):
+        self._stale.set()
+        self._wake.set()
+
+    def check_in(self, member):
+        """
+        The member's plan if they may enter, ``{}`` if not.
+
+        Returns ``None`` when no answer can be given: the snapshot could
+        not be loaded or the buffer is full.
+        """
+        self.start()
+        snapshot = self.snapshot or self._first_load()
+        if snapshot is None:
+            return None
+        match = snapshot.lookup(member, timezone.localdate().toordinal())
+        accepted = self.queue.put(CheckIn(
+            member_number=member,
+            subscription_id=match['subscription_id'] if match else None,
+            granted=match is not None,
+            checked_in_at=timezone.now(),
+        ))
+        if not accepted:
+            return None
+        return match or {}
+
+    def _first_load(self):
+        # أول طلب قبل أن يكمل الخيط التحميل يحمل اللقطة بنفسه بدل رفض العضو
+        with self._load_lock:
+            if self.snapshot is None:
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception('Check-in snapshot load failed')
+        return self.snapshot
+
+    def refresh(self):
+        self._stale.clear()
+        self.snapshot = load_snapshot()
+
+    def _run(self):
+        while True:
+            close_old_connections()
+            try:
+                if (
+                    self.snapshot is None
+                    or self._stale.is_set()
+                    or time.monotonic() - self.snapshot.loaded_at >= self.refresh_seconds
+                ):
+                    self.refresh()
+            except Exception:
+                logger.exception('Check-in snapshot refresh failed')
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+
+
+service = CheckInService(
+    refresh_seconds=getattr(settings, 'CHECKIN_REFRESH_SECONDS', 60),
+    flush_seconds=getattr(settings, 'CHECKIN_FLUSH_SECONDS', 2),
+    flush_size=getattr(settings, 'CHECKIN_FLUSH_SIZE', 500),
+    max_pending=getattr(settings, 'CHECKIN_MAX_PENDING', 50000),
+)
+
+
+def start():
+    """Pre-warm hook: load the snapshot before the first turnstile request."""
+    service.refresh()
+    service.start()
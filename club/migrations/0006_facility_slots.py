@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 11:05
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0005_remove_facilitybooking_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='capacity',
+            field=models.PositiveIntegerField(default=1, verbose_name='السعة (حجوزات متزامنة)'),
+        ),
+        migrations.AddField(
+            model_name='facility',
+            name='closes_at',
+            field=models.TimeField(default=datetime.time(23, 0), verbose_name='وقت الإغلاق'),
+        ),
+        migrations.AddField(
+            model_name='facility',
+            name='opens_at',
+            field=models.TimeField(default=datetime.time(6, 0), verbose_name='وقت الفتح'),
+        ),
+        migrations.AddIndex(
+            model_name='facilitybooking',
+            index=models.Index(fields=['facility', 'booking_date'], name='club_facili_facilit_cecc12_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 11:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0006_facility_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facilitybooking',
+            name='trainer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='club.workingoaches', verbose_name='المدرب'),
+        ),
+    ]
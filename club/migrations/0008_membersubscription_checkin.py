@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-19 11:07
+
+import datetime
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0007_facilitybooking_trainer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_number', models.PositiveIntegerField(db_index=True, verbose_name='رقم العضوية')),
+                ('full_name', models.CharField(max_length=150, verbose_name='الاسم')),
+                ('phone', models.CharField(blank=True, max_length=20, verbose_name='رقم الهاتف')),
+                ('starts_on', models.DateField(default=datetime.date.today, verbose_name='تاريخ البداية')),
+                ('ends_on', models.DateField(verbose_name='تاريخ الانتهاء')),
+                ('is_active', models.BooleanField(default=True, verbose_name='نشط')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+                ('membership_plan', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='subscriptions', to='club.membershipplans', verbose_name='العضوية')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subscriptions', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم')),
+            ],
+            options={
+                'verbose_name': 'اشتراك عضو',
+                'verbose_name_plural': 'اشتراكات الأعضاء',
+            },
+        ),
+        migrations.CreateModel(
+            name='CheckIn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_number', models.PositiveIntegerField(verbose_name='رقم العضوية')),
+                ('granted', models.BooleanField(verbose_name='مسموح')),
+                ('checked_in_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='وقت الدخول')),
+                ('subscription', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='check_ins', to='club.membersubscription', verbose_name='الاشتراك')),
+            ],
+            options={
+                'verbose_name': 'تسجيل دخول',
+                'verbose_name_plural': 'تسجيلات الدخول',
+                'ordering': ['-checked_in_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='membersubscription',
+            index=models.Index(fields=['is_active', 'ends_on'], name='club_member_is_acti_6dde14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['member_number', 'checked_in_at'], name='club_checki_member__171325_idx'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from django.core.exceptions import ValidationError
+import datetime
 
 class Club(models.Model):
     title = models.CharField(_('الاسم'), max_length=100)
@@ -60,6 +62,49 @@ class MembershipPlanFeatures(models.Model):
     def __str__(self):
         return self.name
     
+class MemberSubscription(models.Model):
+    member_number = models.PositiveIntegerField(_('رقم العضوية'), db_index=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='subscriptions', verbose_name=_('المستخدم'), null=True, blank=True)
+    full_name = models.CharField(_('الاسم'), max_length=150)
+    phone = models.CharField(_('رقم الهاتف'), max_length=20, blank=True)
+    membership_plan = models.ForeignKey(MembershipPlans, on_delete=models.PROTECT, related_name='subscriptions', verbose_name=_('العضوية'))
+    starts_on = models.DateField(_('تاريخ البداية'), default=datetime.date.today)
+    ends_on = models.DateField(_('تاريخ الانتهاء'))
+    is_active = models.BooleanField(_('نشط'), default=True)
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
+    updated_at = models.DateTimeField(_('تاريخ التحديث'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('اشتراك عضو')
+        verbose_name_plural = _('اشتراكات الأعضاء')
+        indexes = [
+            models.Index(fields=['is_active', 'ends_on']),
+        ]
+    def __str__(self):
+        return f"{self.member_number} - {self.full_name}"
+
+    def clean(self):
+        if self.starts_on and self.ends_on and self.ends_on < self.starts_on:
+            raise ValidationError(_('تاريخ الانتهاء يجب أن يكون بعد تاريخ البداية'))
+
+
+class CheckIn(models.Model):
+    member_number = models.PositiveIntegerField(_('رقم العضوية'))
+    subscription = models.ForeignKey(MemberSubscription, on_delete=models.SET_NULL, related_name='check_ins', verbose_name=_('الاشتراك'), null=True, blank=True)
+    granted = models.BooleanField(_('مسموح'))
+    checked_in_at = models.DateTimeField(_('وقت الدخول'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('تسجيل دخول')
+        verbose_name_plural = _('تسجيلات الدخول')
+        ordering = ['-checked_in_at']
+        indexes = [
+            models.Index(fields=['member_number', 'checked_in_at']),
+        ]
+    def __str__(self):
+        return f"{self.member_number} - {self.checked_in_at.strftime('%Y-%m-%d %H:%M')}"
+
+
 class FacilityFlag(models.TextChoices):
     AVAILABLE = 'available', _('متاحة')
     NOT_AVAILABLE = 'not_available', _('غير متاحة')
@@ -72,6 +117,9 @@ class Facility(models.Model):
     image = models.ImageField(_('الصورة'), upload_to='facility_types/', null=True, blank=True)
     price = models.DecimalField(_('السعر'), max_digits=10, decimal_places=2)
     flag = models.CharField(_('الحالة'), max_length=20, choices=FacilityFlag.choices, default=FacilityFlag.AVAILABLE)
+    capacity = models.PositiveIntegerField(_('السعة (حجوزات متزامنة)'), default=1)
+    opens_at = models.TimeField(_('وقت الفتح'), default=datetime.time(6, 0))
+    closes_at = models.TimeField(_('وقت الإغلاق'), default=datetime.time(23, 0))
     is_active = models.BooleanField(_('نشط'), default=True)
     created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
     updated_at = models.DateTimeField(_('تاريخ التحديث'), auto_now=True)
@@ -106,6 +154,7 @@ TIME_FLAG_CHOICES = [
 
 class FacilityBooking(models.Model):
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE, related_name='bookings', verbose_name=_('المرفق'))
+    trainer = models.ForeignKey(Workingoaches, on_delete=models.SET_NULL, related_name='sessions', verbose_name=_('المدرب'), null=True, blank=True)
     booking_date = models.DateTimeField(_('تاريخ الحجز'), default=timezone.now)
     booking_start_time = models.TimeField(_('وقت الحجز'))
     time_flag = models.CharField(_('مدة الحجز'), max_length=1, choices=TIME_FLAG_CHOICES, default='1')
@@ -115,5 +164,22 @@ class FacilityBooking(models.Model):
     class Meta:
         verbose_name = _('حجز المرفق')
         verbose_name_plural = _('حجوزات المرافق')
+        indexes = [
+            models.Index(fields=['facility', 'booking_date']),
+        ]
     def __str__(self):
-        return f"{self.facility.name} - {self.booking_date.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"{self.facility.name} - {self.booking_date.strftime('%Y-%m-%d %H:%M')}"
+
+    @property
+    def hours(self):
+        return int(self.time_flag)
+
+    def clean(self):
+        from .slots import load_grids
+
+        if not self.facility_id or not self.booking_start_time:
+            return
+        day = timezone.localtime(self.booking_date).date()
+        grid = load_grids([self.facility], day, day, exclude_pk=self.pk)[(self.facility_id, day)]
+        if not grid.fits(self.booking_start_time, self.hours):
+            raise ValidationError(_('لا توجد أماكن متاحة في هذا الموعد'))
\ No newline at end of file
@@ -0,0 +1,132 @@
+import datetime
+from collections import Counter
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import cache_versions
+from .models import FacilityBooking, Workingoaches
+from .slots import day_start
+
+SCHEDULE_TIMEOUT = 60 * 60 * 24 * 8
+
+# الأسبوع في النادي يبدأ يوم السبت
+WEEK_DAYS = ['السبت', 'الأحد', 'الإثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة']
+SATURDAY = 5
+
+
+def week_start_for(day):
+    return day - datetime.timedelta(days=(day.weekday() - SATURDAY) % 7)
+
+
+def _day_key(day):
+    return f'club:schedule:{cache_versions.get_version("schedule")}:day:{day.isoformat()}'
+
+
+def _trainers_key():
+    return f'club:schedule:{cache_versions.get_version("schedule")}:trainers'
+
+
+def _build_classes(start, end):
+    """Group the bookings in ``[start, end)`` into timetable entries per local date."""
+    rows = FacilityBooking.objects.filter(
+        booking_date__gte=day_start(start),
+        booking_date__lt=day_start(end),
+        facility__is_active=True,
+    ).values_list(
+        'booking_date', 'booking_start_time', 'time_flag',
+        'facility_id', 'facility__name', 'facility__capacity',
+        'trainer_id', 'trainer__name',
+    )
+    groups = Counter()
+    for booked_at, start_time, time_flag, *rest in rows:
+        groups[(timezone.localtime(booked_at).date(), start_time, int(time_flag), *rest)] += 1
+
+    classes = {}
+    for (day, start_time, hours, facility_id, facility, capacity, trainer_id, trainer), booked in sorted(
+        groups.items(), key=lambda item: (item[0][0], item[0][1], item[0][4])
+    ):
+        classes.setdefault(day, []).append({
+            'start': start_time.strftime('%H:%M'),
+            'minutes': hours * 60,
+            'facility_id': facility_id,
+            'facility': facility,
+            'trainer_id': trainer_id,
+            'trainer': trainer or '',
+            'booked': booked,
+            'capacity': capacity,
+            'spots_left': max(0, capacity - booked),
+        })
+    return classes
+
+
+def _refresh_trainer_days(week):
+    working = {}
+    for index, day in enumerate(week['days']):
+        for entry in day['classes']:
+            if entry['trainer_id']:
+                working.setdefault(entry['trainer_id'], set()).add(index)
+    for trainer in week['trainers']:
+        days = working.get(trainer['id'], set())
+        trainer['days'] = [
+            {'name': name, 'active': index in days} for index, name in enumerate(WEEK_DAYS)
+        ]
+        trainer['sessions'] = sum(
+            1 for day in week['days'] for entry in day['classes'] if entry['trainer_id'] == trainer['id']
+        )
+
+
+def _trainers():
+    return [
+        {
+            'id': trainer.pk,
+            'name': trainer.name,
+            'job': trainer.job,
+            'image': trainer.image.url if trainer.image else '',
+        }
+        for trainer in Workingoaches.objects.filter(is_active=True).only('id', 'name', 'job', 'image')
+    ]
+
+
+def get_week(week_start):
+    """
+    The week's timetable.
+
+    Each day is cached under its own key, so a booking only rebuilds its
+    day and two refreshes of the same week cannot overwrite each other.
+    Missing days are built together with one query.
+    """
+    dates = [week_start + datetime.timedelta(days=offset) for offset in range(7)]
+    keys = {day: _day_key(day) for day in dates}
+    trainers_key = _trainers_key()
+    cached = cache.get_many([*keys.values(), trainers_key])
+
+    missing = [day for day in dates if keys[day] not in cached]
+    if missing:
+        classes = _build_classes(missing[0], missing[-1] + datetime.timedelta(days=1))
+        built = {keys[day]: classes.get(day, []) for day in missing}
+        cache.set_many(built, cache_versions.timeout(SCHEDULE_TIMEOUT))
+        cached.update(built)
+    if trainers_key not in cached:
+        cached[trainers_key] = _trainers()
+        cache.set(trainers_key, cached[trainers_key], cache_versions.timeout(SCHEDULE_TIMEOUT))
+
+    week = {
+        'week_start': week_start,
+        'days': [
+            {'date': day, 'name': WEEK_DAYS[offset], 'classes': cached[keys[day]]}
+            for offset, day in enumerate(dates)
+        ],
+        'trainers': [dict(trainer) for trainer in cached[trainers_key]],
+    }
+    _refresh_trainer_days(week)
+    return week
+
+
+def refresh_day(day):
+    """Rebuild one cached day from the database; uncached days are left for ``get_week`` to build."""
+    key = _day_key(day)
+    if cache.get(key) is None:
+        return
+    classes = _build_classes(day, day + datetime.timedelta(days=1))
+    cache.set(key, classes.get(day, []), cache_versions.timeout(SCHEDULE_TIMEOUT))
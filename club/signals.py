@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache_versions, schedule
+from .checkin import service as checkin_service
+from pages.refdata import reference_data
+from .models import (
+    Club, Facility, FacilityBooking, FacilityServices, MemberSubscription, MembershipPlanFeatures,
+    MembershipPlans, Workingoaches,
+)
+
+# أي تعديل على هذه النماذج يلغي الأجزاء المخزنة مؤقتاً التي تعرضها
+FRAGMENT_VERSIONS = {
+    Club: ['clubs'],
+    Workingoaches: ['trainers', 'schedule'],
+    MembershipPlans: ['membership_plans'],
+    MembershipPlanFeatures: ['membership_plans'],
+    Facility: ['facilities', 'schedule'],
+    FacilityServices: ['facilities'],
+}
+
+
+@receiver(pre_save, sender=FacilityBooking)
+def remember_previous_day(sender, instance, **kwargs):
+    instance._previous_booking_date = None
+    if instance.pk:
+        instance._previous_booking_date = (
+            FacilityBooking.objects.filter(pk=instance.pk).values_list('booking_date', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=FacilityBooking)
+@receiver(post_delete, sender=FacilityBooking)
+def refresh_schedule_days(sender, instance, **kwargs):
+    days = {timezone.localtime(instance.booking_date).date()}
+    previous = getattr(instance, '_previous_booking_date', None)
+    if previous:
+        days.add(timezone.localtime(previous).date())
+    transaction.on_commit(lambda: [schedule.refresh_day(day) for day in days])
+
+
+def bump_fragment_versions(sender, **kwargs):
+    for name in FRAGMENT_VERSIONS[sender]:
+        transaction.on_commit(lambda name=name: cache_versions.bump(name))
+    if sender in (MembershipPlans, MembershipPlanFeatures):
+        transaction.on_commit(lambda: reference_data.invalidate('membership_plans'))
+
+
+for model in FRAGMENT_VERSIONS:
+    post_save.connect(bump_fragment_versions, sender=model, dispatch_uid=f'club-fragments-save-{model.__name__}')
+    post_delete.connect(bump_fragment_versions, sender=model, dispatch_uid=f'club-fragments-delete-{model.__name__}')
+
+
+@receiver(post_save, sender=MemberSubscription)
+@receiver(post_delete, sender=MemberSubscription)
+@receiver(post_save, sender=MembershipPlans)
+@receiver(post_delete, sender=MembershipPlans)
+@receiver(post_save, sender=MembershipPlanFeatures)
+@receiver(post_delete, sender=MembershipPlanFeatures)
+def refresh_check_in_cache(sender, **kwargs):
+    transaction.on_commit(checkin_service.mark_stale)
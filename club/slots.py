@@ -0,0 +1,123 @@
+import datetime
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import Facility, FacilityBooking
+
+
+def slot_minutes():
+    return getattr(settings, 'FACILITY_SLOT_MINUTES', 60)
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class SlotGrid:
+    """
+    Occupancy counters for one facility on one day.
+
+    Bookings are added as +1/-1 marks on a difference array, so building the
+    grid is linear in the number of bookings and every conflict check only
+    looks at the slots it covers.
+    """
+
+    def __init__(self, facility, day):
+        self.facility = facility
+        self.day = day
+        self.step = slot_minutes()
+        self.first = _minutes(facility.opens_at)
+        self.size = max(0, (_minutes(facility.closes_at) - self.first) // self.step)
+        self._diff = [0] * (self.size + 1)
+        self._counts = None
+
+    def span(self, start_time, hours):
+        start = _minutes(start_time) - self.first
+        end = start + hours * 60
+        return start // self.step, -(-end // self.step)
+
+    def add(self, start_time, hours):
+        start, end = self.span(start_time, hours)
+        start, end = max(start, 0), min(end, self.size)
+        if start < end:
+            self._diff[start] += 1
+            self._diff[end] -= 1
+            self._counts = None
+
+    @property
+    def counts(self):
+        if self._counts is None:
+            self._counts = list(accumulate(self._diff[:self.size]))
+        return self._counts
+
+    def fits(self, start_time, hours):
+        start, end = self.span(start_time, hours)
+        if start < 0 or end > self.size:
+            return False
+        return max(self.counts[start:end], default=0) < self.facility.capacity
+
+    def slot_time(self, index):
+        minutes = self.first + index * self.step
+        return datetime.time(minutes // 60, minutes % 60)
+
+    def free_slots(self):
+        capacity = self.facility.capacity
+        return [
+            {
+                'start': self.slot_time(index).strftime('%H:%M'),
+                'available': capacity - count,
+            }
+            for index, count in enumerate(self.counts)
+            if count < capacity
+        ]
+
+
+def load_grids(facilities, start_date, end_date, exclude_pk=None):
+    """Build a ``SlotGrid`` for every facility/day in the range from a single query."""
+    facilities = {facility.pk: facility for facility in facilities}
+    grids = {}
+    day = start_date
+    while day <= end_date:
+        for facility in facilities.values():
+            grids[(facility.pk, day)] = SlotGrid(facility, day)
+        day += datetime.timedelta(days=1)
+
+    bookings = FacilityBooking.objects.filter(
+        facility_id__in=facilities,
+        booking_date__gte=day_start(start_date),
+        booking_date__lt=day_start(end_date + datetime.timedelta(days=1)),
+    )
+    if exclude_pk:
+        bookings = bookings.exclude(pk=exclude_pk)
+    for facility_id, booked_at, start_time, time_flag in bookings.values_list(
+        'facility_id', 'booking_date', 'booking_start_time', 'time_flag'
+    ):
+        grid = grids.get((facility_id, timezone.localtime(booked_at).date()))
+        if grid is not None:
+            grid.add(start_time, int(time_flag))
+    return grids
+
+
+def book_facility(facility_id, day, start_time, hours):
+    """Create a facility booking if the requested slots still have capacity."""
+    with transaction.atomic():
+        # قفل صف المرفق حتى لا يحجز طلبان متزامنان نفس المكان الأخير
+        facility = Facility.objects.select_for_update().get(pk=facility_id, is_active=True)
+        grid = load_grids([facility], day, day)[(facility.pk, day)]
+        if not grid.fits(start_time, hours):
+            raise ValidationError(_('لا توجد أماكن متاحة في هذا الموعد'))
+        return FacilityBooking.objects.create(
+            facility=facility,
+            booking_date=timezone.make_aware(datetime.datetime.combine(day, start_time)),
+            booking_start_time=start_time,
+            time_flag=str(hours),
+        )
@@ -1,3 +1,148 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import cache_versions
+from .checkin import service as checkin_service
+from .models import CheckIn, Facility, FacilityBooking, MemberSubscription, MembershipPlanFeatures, MembershipPlans
+from .schedule import get_week, week_start_for
+from .slots import book_facility, day_start
+
+
+@override_settings(CHECKIN_DEVICE_TOKEN='gate-1')
+class MemberCheckInTests(TestCase):
+    def setUp(self):
+        plan = MembershipPlans.objects.create(name='Gold', price=Decimal('500'))
+        MembershipPlanFeatures.objects.create(membership_plan=plan, name='Pool')
+        MemberSubscription.objects.create(
+            member_number=1001, full_name='Member', membership_plan=plan,
+            ends_on=timezone.localdate() + datetime.timedelta(days=30),
+        )
+        checkin_service.snapshot = None
+        # الخيوط الخلفية تفتح اتصالاتها الخاصة خارج معاملة الاختبار
+        for target in (checkin_service, checkin_service.queue):
+            patcher = mock.patch.object(target, 'start')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(checkin_service.queue._pending.clear)
+
+    def check_in(self, member, token='gate-1'):
+        return self.client.post(reverse('club:member_check_in'), {'member': member}, HTTP_X_DEVICE_TOKEN=token)
+
+    def test_first_request_loads_the_snapshot(self):
+        response = self.check_in(1001)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['plan'], response.json()['features']), ('Gold', ['Pool']))
+        self.assertEqual(self.check_in(2002).status_code, 403)
+
+        checkin_service.queue.drain()
+        self.assertEqual(
+            sorted(CheckIn.objects.values_list('member_number', 'granted')), [(1001, True), (2002, False)],
+        )
+
+    def test_device_token_is_required(self):
+        self.assertEqual(self.check_in(1001, token='wrong').status_code, 401)
+        with self.settings(CHECKIN_DEVICE_TOKEN=''):
+            self.assertEqual(self.check_in(1001, token='').status_code, 503)
+
+    def test_full_buffer_refuses_check_ins(self):
+        with mock.patch.object(checkin_service.queue, 'max_pending', 0):
+            self.assertEqual(self.check_in(1001).status_code, 503)
+
+
+class WeeklyScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.facility = Facility.objects.create(name='Court', description='-', price=Decimal('50'), capacity=4)
+        self.week_start = week_start_for(timezone.localdate()) + datetime.timedelta(days=7)
+
+    def book(self, day, hour):
+        with self.captureOnCommitCallbacks(execute=True):
+            FacilityBooking.objects.create(
+                facility=self.facility, booking_date=day_start(day), booking_start_time=datetime.time(hour),
+            )
+
+    def test_bookings_refresh_only_their_day(self):
+        self.assertEqual([day['classes'] for day in get_week(self.week_start)['days']], [[]] * 7)
+        saturday, sunday = self.week_start, self.week_start + datetime.timedelta(days=1)
+        self.book(saturday, 9)
+        self.book(sunday, 10)
+        self.book(sunday, 10)
+
+        with self.assertNumQueries(0):
+            days = get_week(self.week_start)['days']
+        self.assertEqual([entry['start'] for entry in days[0]['classes']], ['09:00'])
+        self.assertEqual(
+            [(entry['start'], entry['booked'], entry['spots_left']) for entry in days[1]['classes']],
+            [('10:00', 2, 2)],
+        )
+
+
+class FacilitySlotTests(TestCase):
+    def setUp(self):
+        self.facility = Facility.objects.create(
+            name='Court', description='-', price=Decimal('50'), capacity=2,
+            opens_at=datetime.time(8), closes_at=datetime.time(12),
+        )
+        self.day = timezone.localdate() + datetime.timedelta(days=3)
+
+    def test_overlapping_bookings_stop_at_capacity(self):
+        book_facility(self.facility.pk, self.day, datetime.time(9), 2)
+        book_facility(self.facility.pk, self.day, datetime.time(10), 1)
+        with self.assertRaises(ValidationError):
+            book_facility(self.facility.pk, self.day, datetime.time(10), 2)
+        # الساعة التاسعة فيها حجز واحد فقط، والحادية عشرة خالية
+        book_facility(self.facility.pk, self.day, datetime.time(9), 1)
+        book_facility(self.facility.pk, self.day, datetime.time(11), 1)
+
+    def test_booking_must_fit_opening_hours(self):
+        with self.assertRaises(ValidationError):
+            book_facility(self.facility.pk, self.day, datetime.time(11), 2)
+
+    def test_free_slots(self):
+        book_facility(self.facility.pk, self.day, datetime.time(9), 2)
+        book_facility(self.facility.pk, self.day, datetime.time(9), 1)
+        response = self.client.get(reverse('club:facility_slots'), {
+            'start': self.day.isoformat(), 'facility': self.facility.pk,
+        })
+        self.assertEqual(response.json()['facilities'][str(self.facility.pk)][self.day.isoformat()], [
+            {'start': '08:00', 'available': 2},
+            {'start': '10:00', 'available': 1},
+            {'start': '11:00', 'available': 2},
+        ])
+
+    def test_invalid_facility_is_a_bad_request(self):
+        response = self.client.get(reverse('club:facility_slots'), {'start': self.day.isoformat(), 'facility': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CLUB_LOCAL_CACHE_SECONDS=60)
+class CacheVersionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def versions_at(self, seconds):
+        with mock.patch('club.cache_versions.time.time', return_value=seconds):
+            return cache_versions.get_versions('clubs', 'trainers')
+
+    def test_local_cache_versions_move_every_window(self):
+        self.assertFalse(cache_versions.is_shared())
+        first = self.versions_at(600)
+        self.assertEqual(self.versions_at(659), first)
+        # عامل آخر لم ير رفع العداد يجدد إصداره مع النافذة التالية
+        self.assertNotEqual(self.versions_at(660)['trainers'], first['trainers'])
+
+        cache_versions.bump('clubs')
+        bumped = self.versions_at(600)
+        self.assertNotEqual(bumped['clubs'], first['clubs'])
+        self.assertEqual(bumped['trainers'], first['trainers'])
+
+    def test_local_cache_caps_the_timeout(self):
+        self.assertEqual(cache_versions.timeout(60 * 60 * 24 * 7), 60)
+        self.assertEqual(cache_versions.timeout(30), 30)
@@ -3,6 +3,10 @@ from .views import (
     club,
     facilities,
     facilities_booking,
+    facility_slots,
+    schedule,
+    trainers,
+    member_check_in,
 
 )
 
@@ -12,4 +16,8 @@ urlpatterns = [
     path('', club, name='club'),
     path('facilities/', facilities, name='facilities'),
     path('facilities-booking/', facilities_booking,name='facilities_booking'),
+    path('facilities/slots/', facility_slots, name='facility_slots'),
+    path('schedule/', schedule, name='schedule'),
+    path('trainers/', trainers, name='trainers'),
+    path('check-in/', member_check_in, name='member_check_in'),
 ]
\ No newline at end of file
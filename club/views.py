@@ -1,29 +1,142 @@
+import hmac
+from datetime import date, datetime
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
-from .models import Club, Workingoaches, MembershipPlans, Facility, FacilityBooking, FacilityServices
+from django.http import HttpResponse, JsonResponse, Http404
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .models import Club, Workingoaches, Facility, TIME_FLAG_CHOICES
+from .slots import book_facility, load_grids, slot_minutes
+from .schedule import get_week, week_start_for
+from .checkin import service as checkin_service
+from .cache_versions import get_versions, timeout
+from pages.refdata import reference_data
+from pages.conditional import conditional_page
+
+MAX_SLOT_RANGE_DAYS = 31
+
+
+def _versions_stamp(*names):
+    def stamp(request):
+        return tuple(sorted(get_versions(*names).items())), None
+    return stamp
+
 
+@conditional_page(_versions_stamp('clubs', 'trainers', 'membership_plans'))
 def club(request):
+    # الاستعلامات كسولة: لا تنفذ إلا إذا لم يكن الجزء المعني مخزناً في الكاش
     clubs = Club.objects.filter(is_active=True)[:3]
     trainers = Workingoaches.objects.filter(is_active=True)[:3]
-    membership_plans = MembershipPlans.objects.filter(is_active=True).prefetch_related('features')
+    membership_plans = reference_data.get('membership_plans')
     return render(request, 'club/club.html', 
                   {'clubs': clubs, 
                     'trainers': trainers,
-                    'membership_plans': membership_plans
-                                               })
+                    'membership_plans': membership_plans,
+                    'versions': get_versions('clubs', 'trainers', 'membership_plans'),
+                    'fragment_timeout': timeout(settings.CLUB_FRAGMENT_CACHE_TIMEOUT),
+                                               }, using=settings.HOT_TEMPLATE_ENGINE)
+
+
+@conditional_page(_versions_stamp('facilities'), private=True)
 def facilities(request):
     facilities = Facility.objects.filter(is_active=True).prefetch_related('services')
-    return render(request, 'club/facilities.html', {'facilities': facilities})
+    return render(request, 'club/facilities.html', {
+        'facilities': facilities,
+        'time_flag_choices': TIME_FLAG_CHOICES,
+        'versions': get_versions('facilities'),
+        'fragment_timeout': timeout(settings.CLUB_FRAGMENT_CACHE_TIMEOUT),
+    }, using=settings.HOT_TEMPLATE_ENGINE)
 
 def facilities_booking(request):
-    facility_bookings  = get_object_or_404(FacilityBooking)
-    if request.method == 'POST':
-        facility = request.POST.get('facility')
-        booking_date = request.POST.get('booking_date')
-        booking_start_time = request.POST.get('booking_start_time')
-        time_flag = request.POST.get('time_flag')
-        FacilityBooking.objects.create(facility=facility, booking_date=booking_date, booking_start_time=booking_start_time, time_flag=time_flag)
-
-        return HttpResponse("تم حجز المرفق بنجاح!")
-    
-    return render(request, 'club/facilities.html', {'facility_bookings': facility_bookings})
\ No newline at end of file
+    if request.method != 'POST':
+        return redirect('club:facilities')
+
+    try:
+        facility_id = int(request.POST.get('facility', ''))
+        booking_date = datetime.strptime(request.POST.get('booking_date', ''), '%Y-%m-%d').date()
+        booking_start_time = datetime.strptime(request.POST.get('booking_start_time', ''), '%H:%M').time()
+        time_flag = int(request.POST.get('time_flag', '1'))
+    except ValueError:
+        messages.error(request, 'بيانات الحجز غير صحيحة')
+        return redirect('club:facilities')
+
+    if str(time_flag) not in dict(TIME_FLAG_CHOICES) or booking_date < timezone.localdate():
+        messages.error(request, 'بيانات الحجز غير صحيحة')
+        return redirect('club:facilities')
+
+    try:
+        book_facility(facility_id, booking_date, booking_start_time, time_flag)
+    except Facility.DoesNotExist:
+        raise Http404
+    except ValidationError as e:
+        messages.error(request, e.messages[0])
+        return redirect('club:facilities')
+
+    return HttpResponse("تم حجز المرفق بنجاح!")
+
+def facility_slots(request):
+    try:
+        start = datetime.strptime(request.GET.get('start', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.GET.get('end') or request.GET['start'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'start/end must be YYYY-MM-DD'}, status=400)
+    if end < start or (end - start).days >= MAX_SLOT_RANGE_DAYS:
+        return JsonResponse({'error': f'range must be 1-{MAX_SLOT_RANGE_DAYS} days'}, status=400)
+
+    facilities = Facility.objects.filter(is_active=True)
+    if request.GET.get('facility'):
+        try:
+            facilities = facilities.filter(pk=int(request.GET['facility']))
+        except ValueError:
+            return JsonResponse({'error': 'facility must be a number'}, status=400)
+    grids = load_grids(list(facilities), start, end)
+
+    result = {}
+    for (facility_id, day), grid in sorted(grids.items(), key=lambda item: (item[0][0], item[0][1])):
+        result.setdefault(str(facility_id), {})[day.isoformat()] = grid.free_slots()
+    return JsonResponse({'slot_minutes': slot_minutes(), 'facilities': result})
+
+def _requested_week(request):
+    try:
+        day = datetime.strptime(request.GET['week'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        day = timezone.localdate()
+    return week_start_for(day)
+
+def schedule(request):
+    week = get_week(_requested_week(request))
+    return render(request, 'club/schedule.html', {'week': week})
+
+def trainers(request):
+    week = get_week(_requested_week(request))
+    return render(request, 'club/trainers.html', {'week': week, 'trainers': week['trainers']})
+
+@csrf_exempt
+@require_POST
+def member_check_in(request):
+    token = settings.CHECKIN_DEVICE_TOKEN
+    if not token:
+        # بدون رمز للأجهزة يستطيع أي أحد تسجيل دخول؛ تبقى الخدمة مغلقة حتى يضبط
+        return JsonResponse({'error': 'check-in devices are not configured'}, status=503)
+    if not hmac.compare_digest(request.headers.get('X-Device-Token', ''), token):
+        return JsonResponse({'error': 'invalid device token'}, status=401)
+    try:
+        member = int(request.POST.get('member', ''))
+    except ValueError:
+        return JsonResponse({'error': 'member must be a number'}, status=400)
+
+    match = checkin_service.check_in(member)
+    if match is None:
+        return JsonResponse({'error': 'check-in service is unavailable'}, status=503)
+    if not match:
+        return JsonResponse({'allowed': False}, status=403)
+    return JsonResponse({
+        'allowed': True,
+        'plan': match['plan'],
+        'features': match['features'],
+        'valid_until': date.fromordinal(match['valid_until']).isoformat(),
+    })
@@ -1,11 +1,22 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
+from django.template.response import TemplateResponse
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from .forms import BookingAdminForm, RoomRatesForm
 from .models import (
     Room, RoomImage, RoomAmenity, Service, ServiceDetail,
     Nationality, Booking, ServiceBooking, Payment, 
-    RoomAvailability, Review, Contact, Notification
+    RoomAvailability, Review, Contact, Notification, PaymentWebhookEvent,
+    CampaignCheckpoint, SlowQuery, RequestProfile, WaitlistEntry, PaymentAdjustment, BookingStatus, RoomUnit,
+    BookingGroup, ChannelSyncState, ArchivedBooking, ArchivedPayment, ArchivedPaymentAdjustment,
+    ArchivedServiceBooking, ArchivedNotification
 )
+from .profiling import open_profile
+from .modifications import STAY_FIELDS, cancel_booking, modify_booking
+from .rates import apply_rates
 
 class RoomImageInline(admin.TabularInline):
     model = RoomImage
@@ -24,6 +35,20 @@ class ServiceBookingInline(admin.TabularInline):
     extra = 0
     readonly_fields = ('price_at_booking',)
 
+class PaymentAdjustmentInline(admin.TabularInline):
+    model = PaymentAdjustment
+    extra = 0
+    can_delete = False
+    fields = ('created_at', 'kind', 'amount', 'previous_total', 'new_total', 'nights_added', 'nights_removed', 'reason')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+class RoomUnitInline(admin.TabularInline):
+    model = RoomUnit
+    extra = 1
+
 class RoomAvailabilityInline(admin.TabularInline):
     model = RoomAvailability
     extra = 1
@@ -33,22 +58,73 @@ class RoomAdmin(admin.ModelAdmin):
     list_display = ('name', 'price', 'flag', 'is_active', 'total_rooms', 'available_rooms_count')
     list_filter = ('flag', 'is_active', 'price', 'created_at')
     search_fields = ('name', 'description')
-    inlines = [RoomImageInline, RoomAmenityInline, RoomAvailabilityInline]
+    inlines = [RoomImageInline, RoomAmenityInline, RoomUnitInline, RoomAvailabilityInline]
     prepopulated_fields = {'slug': ('name',)}
+    actions = ['edit_rates']
     
     def available_rooms_count(self, obj):
         return obj.available_rooms_count
     available_rooms_count.short_description = _('الغرف المتاحة حالياً')
 
+    def edit_rates(self, request, queryset):
+        # صفحة وسيطة مثل تأكيد الحذف: تعرض النموذج ثم تعود إلى القائمة بعد التطبيق
+        if 'apply' in request.POST:
+            form = RoomRatesForm(request.POST)
+            if form.is_valid():
+                data = form.cleaned_data
+                result = apply_rates(
+                    [room.pk for room in data['rooms']], data['start_date'], data['end_date'], data['weekdays'],
+                    price_override=data['price_override'], available_count=data['available_count'],
+                )
+                self.message_user(request, _('تم تحديث %(rows)d ليلة في %(rooms)d غرفة') % {
+                    'rows': result.rows, 'rooms': result.rooms,
+                })
+                return None
+        else:
+            form = RoomRatesForm(initial={'rooms': queryset})
+        return TemplateResponse(request, 'admin/pages/room/edit_rates.html', {
+            **self.admin_site.each_context(request),
+            'title': _('تعديل الأسعار والتوافر لفترة'),
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': queryset,
+            'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+        })
+    edit_rates.short_description = _('تعديل الأسعار والتوافر لفترة')
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
-    list_display = ('booking_number', 'room', 'arrival_date', 'departure_date', 'status', 
+    list_display = ('booking_number', 'room', 'unit', 'arrival_date', 'departure_date', 'status', 
                    'total_price', 'first_name', 'last_name')
     list_filter = ('status', 'room', 'arrival_date', 'departure_date', 'created_at')
     search_fields = ('booking_number', 'first_name', 'last_name', 'email', 'phone')
     date_hierarchy = 'arrival_date'
-    inlines = [ServiceBookingInline]
+    inlines = [ServiceBookingInline, PaymentAdjustmentInline]
     readonly_fields = ('booking_number', 'total_price', 'created_at', 'updated_at')
+    form = BookingAdminForm
+    list_select_related = ('room', 'unit')
+    actions = ['cancel_bookings']
+
+    def save_model(self, request, obj, form, change):
+        changes = form.stay_changes() if change else {}
+        if not changes:
+            return super().save_model(request, obj, form, change)
+        # الغرفة والتواريخ والإلغاء تمر بخدمة التعديل ليعاد التسعير وتسوية الدفع؛ بقية الحقول تحفظ كما هي
+        others = {field: form.cleaned_data[field] for field in form.changed_data if field not in STAY_FIELDS}
+        if others:
+            Booking.objects.filter(pk=obj.pk).update(**others)
+        modification = modify_booking(obj.pk, reason=f'admin: {request.user}', **changes)
+        obj.total_price = modification.new_total
+        if modification.adjustment:
+            self.message_user(request, modification.adjustment)
+
+    def cancel_bookings(self, request, queryset):
+        cancelled = 0
+        for pk in queryset.filter(status=BookingStatus.CONFIRMED).values_list('pk', flat=True):
+            cancel_booking(pk, reason=f'admin: {request.user}')
+            cancelled += 1
+        self.message_user(request, _('تم إلغاء %(count)d حجز') % {'count': cancelled})
+    cancel_bookings.short_description = _('إلغاء الحجوزات المحددة')
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -97,10 +173,175 @@ class PaymentAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('subject', 'recipient_email', 'is_sent', 'sent_at', 'created_at')
-    list_filter = ('is_sent', 'created_at')
+    list_display = ('subject', 'recipient_email', 'campaign', 'is_sent', 'sent_at', 'created_at')
+    list_filter = ('is_sent', 'campaign', 'created_at')
     search_fields = ('subject', 'recipient_email', 'message')
-    readonly_fields = ('created_at', 'sent_at')
+    readonly_fields = ('created_at', 'sent_at', 'error')
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'status', 'transaction_id', 'booking_number', 'applied', 'received_at')
+    list_filter = ('status', 'applied', 'received_at')
+    search_fields = ('event_id', 'transaction_id', 'booking_number')
+    readonly_fields = ('received_at',)
+
+@admin.register(CampaignCheckpoint)
+class CampaignCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('campaign', 'target_date', 'sent_count', 'failed_count', 'last_booking_id', 'completed_at')
+    list_filter = ('campaign', 'target_date')
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('recorded_at', 'duration_ms', 'view', 'caller', 'short_statement', 'has_plan')
+    list_filter = ('view', 'recorded_at')
+    search_fields = ('statement', 'caller', 'fingerprint')
+    readonly_fields = [field.name for field in SlowQuery._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def short_statement(self, obj):
+        return obj.statement[:120]
+    short_statement.short_description = _('شكل الاستعلام')
+
+    @admin.display(boolean=True, description=_('خطة التنفيذ'))
+    def has_plan(self, obj):
+        return bool(obj.plan)
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('recorded_at', 'duration_ms', 'view', 'method', 'path', 'status_code', 'samples', 'trigger',
+                    'download_link')
+    list_filter = ('trigger', 'view', 'recorded_at')
+    search_fields = ('path', 'view')
+    readonly_fields = [field.name for field in RequestProfile._meta.fields] + ['download_link']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # الحذف مع الملف يتم تلقائياً عند تجاوز PROFILE_MAX_FILES
+        return False
+
+    @admin.display(description=_('تنزيل'))
+    def download_link(self, obj):
+        url = reverse('admin:pages_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.filename)
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='pages_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise Http404
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        try:
+            file = open_profile(profile)
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(file, as_attachment=True, filename=profile.filename, content_type='text/plain')
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'room', 'arrival_date', 'departure_date', 'status', 'offer_expires_at', 'created_at')
+    list_filter = ('status', 'room', 'arrival_date')
+    search_fields = ('first_name', 'last_name', 'email', 'phone')
+    date_hierarchy = 'arrival_date'
+    readonly_fields = ('offer_token', 'offered_at', 'offer_expires_at', 'booking', 'created_at')
+
+class GroupBookingInline(admin.TabularInline):
+    model = Booking
+    extra = 0
+    can_delete = False
+    fields = ('booking_number', 'room', 'unit', 'number_of_adults', 'number_of_children', 'status', 'total_price')
+    readonly_fields = fields
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(BookingGroup)
+class BookingGroupAdmin(admin.ModelAdmin):
+    list_display = ('reference', 'company', 'first_name', 'last_name', 'arrival_date', 'departure_date', 'total_price', 'created_at')
+    list_filter = ('arrival_date', 'created_at')
+    search_fields = ('reference', 'company', 'first_name', 'last_name', 'email')
+    readonly_fields = ('reference', 'total_price', 'created_at')
+    inlines = [GroupBookingInline]
+
+@admin.register(PaymentAdjustment)
+class PaymentAdjustmentAdmin(admin.ModelAdmin):
+    list_display = ('booking', 'kind', 'amount', 'previous_total', 'new_total', 'reason', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('booking__booking_number', 'reason')
+    readonly_fields = [field.name for field in PaymentAdjustment._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ChannelSyncState)
+class ChannelSyncStateAdmin(admin.ModelAdmin):
+    list_display = ('channel', 'last_synced_at', 'horizon_date', 'ranges_pushed', 'last_error')
+    readonly_fields = [field.name for field in ChannelSyncState._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+class ArchivedInline(admin.TabularInline):
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class ArchivedPaymentInline(ArchivedInline):
+    model = ArchivedPayment
+
+class ArchivedPaymentAdjustmentInline(ArchivedInline):
+    model = ArchivedPaymentAdjustment
+
+class ArchivedServiceBookingInline(ArchivedInline):
+    model = ArchivedServiceBooking
+
+class ArchivedNotificationInline(ArchivedInline):
+    model = ArchivedNotification
+    fields = ('subject', 'recipient_email', 'campaign', 'is_sent', 'sent_at')
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('booking_number', 'first_name', 'last_name', 'room_name', 'arrival_date', 'departure_date', 'status', 'total_price')
+    list_filter = ('status', 'room', 'departure_date')
+    search_fields = ('booking_number', 'first_name', 'last_name', 'email', 'phone')
+    date_hierarchy = 'departure_date'
+    readonly_fields = [field.name for field in ArchivedBooking._meta.fields]
+    inlines = [
+        ArchivedPaymentInline, ArchivedPaymentAdjustmentInline, ArchivedServiceBookingInline,
+        ArchivedNotificationInline,
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 admin.site.register(RoomImage)  
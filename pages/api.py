@@ -0,0 +1,170 @@
+import base64
+import json
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from . import occupancy
+from .conditional import conditional_page
+from .models import Booking, PaymentStatus, Room, RoomAmenity, RoomImage
+
+CATALOG_FIELDS = (
+    'id', 'slug', 'name', 'description', 'price', 'capacity', 'bed_type', 'size',
+    'flag', 'total_rooms', 'image', 'created_at', 'updated_at',
+)
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+STREAM_CHUNK_SIZE = 500
+
+
+def _rooms():
+    # نفس ترتيب Room.Meta.ordering مع id لكسر التعادل حتى يكون المؤشر ثابتاً
+    return Room.objects.filter(is_active=True).order_by('-created_at', '-id').values(*CATALOG_FIELDS)
+
+
+def _after(rooms, cursor):
+    created_at, pk = cursor
+    return rooms.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+
+def encode_cursor(row):
+    raw = f'{row["created_at"].isoformat()}|{row["id"]}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Return ``(created_at, id)``; raises ``ValueError`` for anything that is not a cursor we issued."""
+    raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+    created_at, pk = raw.split('|')
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+def _booked(**room_filter):
+    """``{room_id: units}`` held by paid stays that have not left yet, as in ``Room.available_rooms_count``."""
+    return dict(
+        Booking.objects.filter(
+            departure_date__gte=timezone.now().date(),
+            payment__status=PaymentStatus.COMPLETED,
+            **room_filter,
+        ).order_by().values('room_id').annotate(booked=Count('id')).values_list('room_id', 'booked')
+    )
+
+
+def _serialize(rows, request):
+    """Attach amenities, primary image and availability to a page of ``values()`` rows with three queries."""
+    ids = [row['id'] for row in rows]
+
+    amenities = defaultdict(list)
+    for room_id, name, icon in (
+        RoomAmenity.objects.filter(room_id__in=ids).order_by('room_id', 'name').values_list('room_id', 'name', 'icon')
+    ):
+        amenities[room_id].append({'name': name, 'icon': icon})
+
+    images = {}
+    for room_id, image in (
+        RoomImage.objects.filter(room_id__in=ids, is_primary=True).order_by('order').values_list('room_id', 'image')
+    ):
+        images.setdefault(room_id, image)
+
+    booked = _booked(room_id__in=ids)
+
+    storage = Room._meta.get_field('image').storage
+    results = []
+    for row in rows:
+        image = images.get(row['id']) or row['image']
+        results.append({
+            **row,
+            'image': request.build_absolute_uri(storage.url(image)) if image else None,
+            'available_rooms': max(0, row['total_rooms'] - booked.get(row['id'], 0)),
+            'amenities': amenities.get(row['id'], []),
+        })
+    return results
+
+
+def _stream(request):
+    rooms, cursor = _rooms(), None
+    while True:
+        rows = list((rooms if cursor is None else _after(rooms, cursor))[:STREAM_CHUNK_SIZE])
+        if not rows:
+            return
+        for item in _serialize(rows, request):
+            yield json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        cursor = (rows[-1]['created_at'], rows[-1]['id'])
+
+
+def _catalog_stamp(request):
+    stamp = Room.objects.filter(is_active=True).aggregate(latest=Max('updated_at'), count=Count('id'))
+    # available_rooms يتغير مع الحجوزات والمدفوعات ومرور الأيام دون أن يمس الغرفة، فيدخل في ETag
+    # ولا يصلح Last-Modified لتمثيله
+    booked = sorted(_booked(room__is_active=True).items())
+    return (stamp['count'], stamp['latest'], timezone.now().date(), booked), None
+
+
+@require_GET
+@conditional_page(_catalog_stamp)
+def room_catalog(request):
+    """
+    Active rooms, newest first.
+
+    JSON pages of ``?limit=`` rooms (at most ``MAX_PAGE_SIZE``) with a
+    ``next_cursor`` to pass back as ``?cursor=``; ``?format=ndjson`` streams
+    the whole catalog, one room per line.
+    """
+    if request.GET.get('format') == 'ndjson':
+        return StreamingHttpResponse(_stream(request), content_type='application/x-ndjson')
+
+    try:
+        limit = min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be a number'}, status=400)
+
+    rooms = _rooms()
+    if request.GET.get('cursor'):
+        try:
+            rooms = _after(rooms, decode_cursor(request.GET['cursor']))
+        except ValueError:
+            return JsonResponse({'error': 'invalid cursor'}, status=400)
+
+    rows = list(rooms[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return JsonResponse({
+        'results': _serialize(rows, request),
+        'next_cursor': encode_cursor(rows[-1]) if has_more else None,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@require_GET
+def room_search(request):
+    """
+    Active rooms with a unit free for every night of ``?arrival=`` to ``?departure=`` (``YYYY-MM-DD``).
+
+    ``?guests=`` drops rooms that are too small. Free units come from the
+    in-memory occupancy calendar, so the dates must fall inside its window.
+    """
+    try:
+        arrival = datetime.strptime(request.GET.get('arrival', ''), '%Y-%m-%d').date()
+        departure = datetime.strptime(request.GET.get('departure', ''), '%Y-%m-%d').date()
+        guests = int(request.GET.get('guests', 1))
+    except ValueError:
+        return JsonResponse({'error': 'arrival and departure must be YYYY-MM-DD dates'}, status=400)
+    if departure <= arrival or arrival < timezone.localdate():
+        return JsonResponse({'error': 'invalid stay dates'}, status=400)
+
+    results = []
+    for room in Room.objects.filter(is_active=True, capacity__gte=guests).order_by('price').values(
+        'id', 'slug', 'name', 'price', 'capacity',
+    ):
+        free = occupancy.service.free_units(room['id'], arrival, departure)
+        if free is None:
+            return JsonResponse({'error': 'dates are too far ahead'}, status=400)
+        if free > 0:
+            results.append({**room, 'available_rooms': free})
+    return JsonResponse({
+        'arrival': arrival, 'departure': departure, 'results': results,
+    }, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,139 @@
+"""
+Archive tier for bookings that departed long ago.
+
+``archive_bookings`` moves bookings whose departure is more than
+``ARCHIVE_AFTER_MONTHS`` months back into the ``Archived*`` tables, chunk
+by chunk. Payments, adjustments, service bookings and notifications go
+with them. Every row keeps its original primary key, and each chunk is
+copied and deleted in one transaction, so an interrupted run leaves
+every booking either live or archived. Nothing on the hot path reads the
+archive. ``find_booking`` falls back to it so confirmation pages and
+reports keep working for archived numbers.
+"""
+import calendar
+import logging
+import time
+from dataclasses import dataclass
+from functools import cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    ArchivedBooking, ArchivedNotification, ArchivedPayment, ArchivedPaymentAdjustment, ArchivedServiceBooking,
+    Booking, Notification, Payment, PaymentAdjustment, ServiceBooking,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def archive_cutoff(months=None, today=None):
+    """The date ``months`` calendar months before ``today``; stays that departed before it are archived."""
+    months = settings.ARCHIVE_AFTER_MONTHS if months is None else months
+    today = today or timezone.localdate()
+    month = today.month - 1 - months
+    year, month = today.year + month // 12, month % 12 + 1
+    return today.replace(year=year, month=month, day=min(today.day, calendar.monthrange(year, month)[1]))
+
+
+@cache
+def _shared_fields(source, target):
+    """Column attnames ``target`` has in common with ``source``, the primary key and FK ids included."""
+    names = {field.attname for field in source._meta.concrete_fields}
+    return tuple(field.attname for field in target._meta.concrete_fields if field.attname in names)
+
+
+def _copy(instance, target, **extra):
+    values = {name: getattr(instance, name) for name in _shared_fields(type(instance), target)}
+    return target(**values, **extra)
+
+
+@dataclass
+class ArchiveResult:
+    cutoff: object
+    bookings: int = 0
+    payments: int = 0
+    services: int = 0
+    notifications: int = 0
+    adjustments: int = 0
+    seconds: float = 0.0
+
+
+def _archive_chunk(booking_ids, result):
+    with transaction.atomic():
+        bookings = list(
+            Booking.objects.select_for_update()
+            .filter(pk__in=booking_ids)
+            .select_related('room', 'unit')
+        )
+        ArchivedBooking.objects.bulk_create([
+            _copy(
+                booking, ArchivedBooking,
+                room_name=booking.room.name,
+                unit_number=booking.unit.number if booking.unit else '',
+            )
+            for booking in bookings
+        ])
+        ids = [booking.pk for booking in bookings]
+        payments = ArchivedPayment.objects.bulk_create([
+            _copy(payment, ArchivedPayment) for payment in Payment.objects.filter(booking_id__in=ids)
+        ])
+        adjustments = ArchivedPaymentAdjustment.objects.bulk_create([
+            _copy(adjustment, ArchivedPaymentAdjustment)
+            for adjustment in PaymentAdjustment.objects.filter(booking_id__in=ids)
+        ])
+        services = ArchivedServiceBooking.objects.bulk_create([
+            _copy(service_booking, ArchivedServiceBooking, service_name=service_booking.service.name)
+            for service_booking in ServiceBooking.objects.filter(booking_id__in=ids).select_related('service')
+        ])
+        notifications = ArchivedNotification.objects.bulk_create([
+            _copy(notification, ArchivedNotification)
+            for notification in Notification.objects.filter(booking_id__in=ids)
+        ])
+        # الحذف يتتابع إلى السجلات التابعة؛ التقييمات وقائمة الانتظار تفقد الربط فقط (SET_NULL)
+        Booking.objects.filter(pk__in=ids).delete()
+
+    result.bookings += len(bookings)
+    result.payments += len(payments)
+    result.adjustments += len(adjustments)
+    result.services += len(services)
+    result.notifications += len(notifications)
+
+
+def archive_bookings(months=None, batch_size=None, limit=None, dry_run=False):
+    """
+    Move bookings that departed before ``archive_cutoff(months)`` into the archive.
+
+    Works through them in primary-key order, ``batch_size`` at a time,
+    and stops after about ``limit`` bookings if given. ``dry_run`` only
+    counts them.
+    """
+    started = time.perf_counter()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    result = ArchiveResult(archive_cutoff(months))
+    candidates = Booking.objects.filter(departure_date__lt=result.cutoff).order_by('pk')
+
+    if dry_run:
+        result.bookings = candidates.count()
+        return result
+
+    last_pk = 0
+    while limit is None or result.bookings < limit:
+        ids = list(candidates.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        last_pk = ids[-1]
+        _archive_chunk(ids, result)
+
+    result.seconds = time.perf_counter() - started
+    logger.info('Archived %d bookings that departed before %s', result.bookings, result.cutoff)
+    return result
+
+
+def find_booking(booking_number):
+    """The live booking with this number, else its archived copy, else ``None``."""
+    return (
+        Booking.objects.select_related('room').filter(booking_number=booking_number).first()
+        or ArchivedBooking.objects.select_related('room').filter(booking_number=booking_number).first()
+    )
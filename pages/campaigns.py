@@ -0,0 +1,172 @@
+import datetime
+import logging
+import smtplib
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import Booking, CampaignCheckpoint, Notification
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Campaign:
+    name: str
+    date_field: str
+    offset_days: int
+    template: str
+    catch_up_days: int = 0
+
+    def target_date(self, today):
+        return today + datetime.timedelta(days=self.offset_days)
+
+    def target_dates(self, today):
+        """The dates to run for ``today``, oldest first: the target date and the ``catch_up_days`` before it."""
+        target = self.target_date(today)
+        return [target - datetime.timedelta(days=days) for days in range(self.catch_up_days, -1, -1)]
+
+
+CAMPAIGNS = {
+    # قبل الوصول بـ 48 ساعة، ومن حجز بعد ذلك يصله التذكير في اليوم السابق للوصول
+    'pre_arrival': Campaign('pre_arrival', 'arrival_date', 2, 'pages/emails/pre_arrival', catch_up_days=1),
+    # بعد المغادرة بيوم لطلب التقييم، مع يومين لتدارك تشغيل فائت
+    'post_stay': Campaign('post_stay', 'departure_date', -1, 'pages/emails/post_stay', catch_up_days=2),
+}
+
+
+@dataclass
+class CampaignRun:
+    sent: int = 0
+    failed: int = 0
+
+
+def _booking_batches(campaign, target_date, batch_size):
+    """
+    Walk the day's confirmed bookings that have not had this campaign yet, one keyset page at a time.
+
+    A booking is done once its notification was sent or refused, so
+    bookings made after an earlier run of the same date are picked up
+    whatever their primary key.
+    """
+    done = Notification.objects.filter(booking=OuterRef('pk'), campaign=campaign.name).filter(
+        Q(is_sent=True) | ~Q(error='')
+    )
+    bookings = (
+        Booking.objects
+        .filter(status='confirmed', **{campaign.date_field: target_date})
+        .exclude(Exists(done))
+        .select_related('room')
+        .only(
+            'id', 'booking_number', 'first_name', 'last_name', 'email',
+            'arrival_date', 'departure_date', 'room__name',
+        )
+        .order_by('pk')
+    )
+    after_id = 0
+    while True:
+        batch = list(bookings.filter(pk__gt=after_id)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        after_id = batch[-1].pk
+
+
+def _render(campaign, bookings):
+    subject_template = get_template(f'{campaign.template}_subject.txt')
+    body_template = get_template(f'{campaign.template}.txt')
+    return [
+        Notification(
+            booking=booking,
+            recipient_email=booking.email,
+            subject=' '.join(subject_template.render({'booking': booking}).split()),
+            message=body_template.render({'booking': booking}),
+            campaign=campaign.name,
+        )
+        for booking in bookings
+    ]
+
+
+def _send(notifications, connection, sent, failed):
+    """
+    Send each notification on its own, adding its id to ``sent`` or ``{id: error}`` to ``failed``.
+
+    A message the server refuses is recorded and skipped. Losing the
+    connection raises, and the unsent rest is retried by the next run.
+    """
+    for notification in notifications:
+        message = EmailMessage(
+            notification.subject,
+            notification.message,
+            settings.DEFAULT_FROM_EMAIL,
+            [notification.recipient_email],
+            connection=connection,
+        )
+        try:
+            connection.send_messages([message])
+        except smtplib.SMTPServerDisconnected:
+            raise
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as exc:
+            logger.warning('Campaign email to %s refused: %s', notification.recipient_email, exc)
+            failed[notification.pk] = str(exc)[:1000]
+        else:
+            sent.append(notification.pk)
+
+
+def _record(checkpoint, sent, failed, last_booking_id=None):
+    with transaction.atomic():
+        Notification.objects.filter(pk__in=sent).update(is_sent=True, sent_at=timezone.now())
+        for pk, error in failed.items():
+            Notification.objects.filter(pk=pk).update(error=error)
+        checkpoint.sent_count += len(sent)
+        checkpoint.failed_count += len(failed)
+        if last_booking_id is not None:
+            checkpoint.last_booking_id = last_booking_id
+        checkpoint.save(update_fields=['last_booking_id', 'sent_count', 'failed_count', 'updated_at'])
+
+
+def run_campaign(campaign, target_date, batch_size=500):
+    """
+    Send one campaign for one date to every booking that has not had it.
+
+    Each batch is rendered, stored as ``Notification`` rows with a single
+    ``bulk_create`` (the booking/campaign constraint skips rows a previous
+    run already created) and sent over one SMTP connection. Sent and
+    refused messages are then recorded along with the checkpoint's
+    counters. Messages already sent are recorded even if the connection
+    drops mid-batch. Running the same date again only reaches bookings
+    made since, and messages left unsent.
+    """
+    checkpoint, _ = CampaignCheckpoint.objects.get_or_create(campaign=campaign.name, target_date=target_date)
+
+    result = CampaignRun()
+    connection = get_connection()
+    connection.open()
+    try:
+        for bookings in _booking_batches(campaign, target_date, batch_size):
+            Notification.objects.bulk_create(_render(campaign, bookings), ignore_conflicts=True)
+            pending = list(
+                Notification.objects
+                .filter(campaign=campaign.name, booking__in=bookings, is_sent=False, error='')
+                .only('id', 'subject', 'message', 'recipient_email')
+            )
+            sent, failed = [], {}
+            try:
+                _send(pending, connection, sent, failed)
+            except Exception:
+                _record(checkpoint, sent, failed)
+                raise
+            _record(checkpoint, sent, failed, last_booking_id=bookings[-1].pk)
+            result.sent += len(sent)
+            result.failed += len(failed)
+    finally:
+        connection.close()
+
+    checkpoint.completed_at = timezone.now()
+    checkpoint.save(update_fields=['completed_at', 'updated_at'])
+    return result
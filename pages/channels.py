@@ -0,0 +1,333 @@
+"""
+Channel manager: push availability and prices to OTAs as diffs.
+
+Anything that changes what a room can sell on some nights (bookings,
+``RoomAvailability`` rows, room settings, waitlist holds) appends an
+``InventoryChange`` for each channel. ``sync_channel`` reads the
+channel's pending changes and recomputes only those nights. It compares them with what
+the channel was last sent (``ChannelInventory``) and pushes only the
+nights that differ. Neighbouring nights with the same availability and
+price are coalesced into ranges, and the ranges go out in batches through
+the channel's adapter with retries. Each accepted batch is recorded
+straight away. The changes it read are deleted only once every batch is
+accepted, so an interrupted sync re-reads them next time but re-sends
+nothing that already went out. Changes are deleted by id rather than up
+to a high-water mark: a transaction that commits after a sync has read
+the feed may hold a lower id, and its rows stay for the next run.
+
+Channels are configured in ``settings.CHANNELS``; ``manage.py fake_ota``
+runs a local stand-in OTA for testing and benchmarking.
+"""
+import datetime
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from urllib import error, request
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import (
+    Booking, BookingStatus, ChannelInventory, ChannelSyncState, InventoryChange, Room, RoomAvailability,
+    WaitlistEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+ONE_NIGHT = datetime.timedelta(days=1)
+
+
+def mark_changed(room_id, start, end):
+    """Record that nights ``[start, end)`` of a room may have changed; a no-op when no channel is configured."""
+    mark_changed_many([(room_id, start, end)])
+
+
+def mark_changed_many(ranges):
+    """``mark_changed`` for many ``(room_id, start, end)`` at once."""
+    if settings.CHANNELS:
+        InventoryChange.objects.bulk_create([
+            InventoryChange(channel=channel, room_id=room_id, start_date=start, end_date=end)
+            for room_id, start, end in ranges if start < end
+            for channel in settings.CHANNELS
+        ])
+
+
+@dataclass(frozen=True)
+class InventoryRange:
+    room: str
+    start: datetime.date
+    end: datetime.date
+    available: int
+    price: object
+
+    def to_dict(self):
+        # نهاية الفترة شاملة في صيغة القنوات
+        return {
+            'room': self.room,
+            'from': self.start.isoformat(),
+            'to': (self.end - ONE_NIGHT).isoformat(),
+            'available': self.available,
+            'price': str(self.price),
+        }
+
+
+class ChannelError(Exception):
+    """The channel refused a batch; ``retryable`` says whether sending it again may help."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ChannelAdapter:
+    """Base adapter; subclasses send one batch of ``InventoryRange`` per ``push`` call."""
+
+    def __init__(self, name, options):
+        self.name = name
+        self.batch_size = options.get('BATCH_SIZE', 200)
+
+    def push(self, ranges):
+        raise NotImplementedError
+
+
+class HttpChannelAdapter(ChannelAdapter):
+    """POSTs ``{"updates": [...]}`` as JSON to ``URL``; 5xx, 429 and network errors are retried."""
+
+    def __init__(self, name, options):
+        super().__init__(name, options)
+        self.url = options['URL']
+        self.token = options.get('TOKEN', '')
+        self.timeout = options.get('TIMEOUT', 10)
+
+    def push(self, ranges):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        body = json.dumps({'updates': [item.to_dict() for item in ranges]}).encode()
+        try:
+            with request.urlopen(request.Request(self.url, data=body, headers=headers, method='POST'),
+                                 timeout=self.timeout):
+                return
+        except error.HTTPError as exc:
+            raise ChannelError(f'HTTP {exc.code}', retryable=exc.code >= 500 or exc.code == 429)
+        except (error.URLError, TimeoutError, ConnectionError) as exc:
+            raise ChannelError(str(getattr(exc, 'reason', exc)))
+
+
+def get_adapter(name):
+    options = settings.CHANNELS[name]
+    return import_string(options['BACKEND'])(name, options)
+
+
+def _merge(ranges):
+    """Sort and merge overlapping or touching ``(start, end)`` ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def inventory(rooms, start, end):
+    """
+    ``{room_id: {date: (available, price)}}`` for ``[start, end)``.
+
+    Capacity is the night's ``RoomAvailability.available_count`` when the
+    calendar has a row, else ``total_rooms``. Confirmed bookings and open
+    waitlist offers are subtracted from it. Price is ``price_override`` or
+    the room rate. One query each for bookings, offers and calendar rows.
+    """
+    room_ids = [room.pk for room in rooms]
+    taken = defaultdict(lambda: defaultdict(int))
+    stays = (
+        Booking.objects.filter(
+            room_id__in=room_ids, status=BookingStatus.CONFIRMED, arrival_date__lt=end, departure_date__gt=start,
+        ),
+        WaitlistEntry.objects.held().filter(room_id__in=room_ids, arrival_date__lt=end, departure_date__gt=start),
+    )
+    for queryset in stays:
+        for room_id, arrival, departure in queryset.values_list('room_id', 'arrival_date', 'departure_date'):
+            night, last = max(arrival, start), min(departure, end)
+            while night < last:
+                taken[room_id][night] += 1
+                night += ONE_NIGHT
+
+    calendar = {
+        (room_id, night): (count, price)
+        for room_id, night, count, price in RoomAvailability.objects
+        .filter(room_id__in=room_ids, date__gte=start, date__lt=end)
+        .values_list('room_id', 'date', 'available_count', 'price_override')
+    }
+
+    result = {}
+    for room in rooms:
+        nights = result[room.pk] = {}
+        night = start
+        while night < end:
+            count, override = calendar.get((room.pk, night), (room.total_rooms, None))
+            available = count - taken[room.pk][night] if room.is_active else 0
+            nights[night] = (max(available, 0), room.price if override is None else override)
+            night += ONE_NIGHT
+    return result
+
+
+def coalesce(rooms, dirty, current, pushed):
+    """
+    Ranges of nights whose ``(available, price)`` differs from what was pushed.
+
+    ``dirty`` maps room id to merged ``[start, end)`` ranges. Consecutive
+    changed nights with equal values become one ``InventoryRange``.
+    """
+    ranges = []
+    for room in rooms:
+        run = None
+        for start, end in dirty.get(room.pk, ()):
+            night = start
+            while night < end:
+                value = current[room.pk][night]
+                if pushed.get((room.pk, night)) == value:
+                    run = None
+                elif run is not None and run[1] == night and run[2] == value:
+                    run[1] = night + ONE_NIGHT
+                else:
+                    run = [night, night + ONE_NIGHT, value]
+                    ranges.append((room, run))
+                night += ONE_NIGHT
+    return [
+        InventoryRange(room.slug, run_start, run_end, available, price)
+        for room, (run_start, run_end, (available, price)) in ranges
+    ]
+
+
+def _push_with_retry(adapter, batch):
+    attempts = settings.CHANNEL_SYNC_MAX_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            adapter.push(batch)
+            return attempt - 1
+        except ChannelError as exc:
+            if not exc.retryable or attempt == attempts:
+                raise
+            delay = settings.CHANNEL_SYNC_RETRY_SECONDS * 2 ** (attempt - 1)
+            logger.warning('Channel %s batch failed (%s), retry %d in %.1fs', adapter.name, exc, attempt, delay)
+            time.sleep(delay * random.uniform(0.5, 1.5))
+
+
+def _record_pushed(channel, rooms_by_slug, batch):
+    now = timezone.now()
+    rows = []
+    for item in batch:
+        night = item.start
+        while night < item.end:
+            rows.append(ChannelInventory(
+                channel=channel, room=rooms_by_slug[item.room], date=night,
+                available=item.available, price=item.price, pushed_at=now,
+            ))
+            night += ONE_NIGHT
+    ChannelInventory.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True,
+        unique_fields=['channel', 'room', 'date'], update_fields=['available', 'price', 'pushed_at'],
+    )
+
+
+def _delete_changes(ids):
+    for offset in range(0, len(ids), 1000):
+        InventoryChange.objects.filter(pk__in=ids[offset:offset + 1000]).delete()
+
+
+@dataclass
+class SyncResult:
+    channel: str
+    nights_checked: int = 0
+    ranges: int = 0
+    batches: int = 0
+    retries: int = 0
+    error: str = ''
+    seconds: float = 0.0
+
+
+def sync_channel(name, full=False):
+    """
+    Push what changed since the last sync of one channel.
+
+    ``full`` recomputes every room over the whole horizon, as does the
+    first sync of a channel until it completes. Later runs also cover the
+    nights that entered the horizon since the last completed sync. Either
+    way only nights that differ from ``ChannelInventory`` are sent.
+    """
+    started = time.perf_counter()
+    result = SyncResult(name)
+    adapter = get_adapter(name)
+    state, _ = ChannelSyncState.objects.get_or_create(channel=name)
+    read = []
+
+    today = timezone.localdate()
+    horizon = today + datetime.timedelta(days=settings.CHANNEL_SYNC_DAYS)
+    rooms = list(Room.objects.only('pk', 'slug', 'price', 'total_rooms', 'is_active').order_by('pk'))
+    if full or state.last_synced_at is None or state.horizon_date is None:
+        read = list(InventoryChange.objects.filter(channel=name).values_list('pk', flat=True))
+        dirty = {room.pk: [[today, horizon]] for room in rooms}
+    else:
+        changes = defaultdict(list)
+        # الأيام تمضي فتدخل ليالٍ جديدة في آخر الأفق دون أن يسجل لها أي تغيير
+        entered = max(state.horizon_date, today)
+        if entered < horizon:
+            for room in rooms:
+                changes[room.pk].append((entered, horizon))
+        for pk, room_id, start, end in (
+            InventoryChange.objects.filter(channel=name).values_list('pk', 'room_id', 'start_date', 'end_date')
+        ):
+            read.append(pk)
+            start, end = max(start, today), min(end, horizon)
+            if start < end:
+                changes[room_id].append((start, end))
+        dirty = {room_id: _merge(ranges) for room_id, ranges in changes.items()}
+        rooms = [room for room in rooms if room.pk in dirty]
+
+    if dirty and rooms:
+        start = min(ranges[0][0] for ranges in dirty.values())
+        end = max(ranges[-1][1] for ranges in dirty.values())
+        current = inventory(rooms, start, end)
+        pushed = {
+            (room_id, night): (available, price)
+            for room_id, night, available, price in ChannelInventory.objects
+            .filter(channel=name, room__in=rooms, date__gte=start, date__lt=end)
+            .values_list('room_id', 'date', 'available', 'price')
+        }
+        result.nights_checked = sum((end - start).days for ranges in dirty.values() for start, end in ranges)
+        ranges = coalesce(rooms, dirty, current, pushed)
+        result.ranges = len(ranges)
+        rooms_by_slug = {room.slug: room for room in rooms}
+
+        for offset in range(0, len(ranges), adapter.batch_size):
+            batch = ranges[offset:offset + adapter.batch_size]
+            try:
+                result.retries += _push_with_retry(adapter, batch)
+            except ChannelError as exc:
+                result.error = str(exc)
+                logger.error('Channel %s sync stopped after %d batches: %s', name, result.batches, exc)
+                break
+            with transaction.atomic():
+                _record_pushed(name, rooms_by_slug, batch)
+                ChannelSyncState.objects.filter(pk=state.pk).update(ranges_pushed=F('ranges_pushed') + len(batch))
+            result.batches += 1
+
+    state.last_error = result.error
+    if not result.error:
+        state.last_synced_at = timezone.now()
+        state.horizon_date = horizon
+    state.save(update_fields=['last_synced_at', 'horizon_date', 'last_error', 'updated_at'])
+
+    if not result.error:
+        _delete_changes(read)
+
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+EMAIL_SETTINGS = [
+    'EMAIL_BACKEND', 'EMAIL_HOST', 'EMAIL_HOST_USER', 'EMAIL_HOST_PASSWORD',
+    'EMAIL_PORT', 'EMAIL_USE_TLS', 'DEFAULT_FROM_EMAIL',
+]
+
+
+@register('email')
+def check_email_settings(app_configs, **kwargs):
+    """With LAZY_BOOT the email variables are no longer required at import time; report them here."""
+    missing = [name for name in EMAIL_SETTINGS if getattr(settings, name, None) is None]
+    if not missing:
+        return []
+    return [Error(
+        f'Missing email settings: {", ".join(missing)}.',
+        hint='Set them in the environment or .env file.',
+        id='pages.E001',
+    )]
@@ -0,0 +1,54 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+def _stamp(request, stamp_func, args, kwargs):
+    """Compute the page stamp once per request; ETag and Last-Modified share it."""
+    if not hasattr(request, '_page_stamp'):
+        # رسالة معلقة تعني أن الصفحة ستختلف عن النسخة المخزنة في المتصفح
+        request._page_stamp = None if len(get_messages(request)) else stamp_func(request, *args, **kwargs)
+    return request._page_stamp
+
+
+def conditional_page(stamp_func, private=False):
+    """
+    Answer ``If-None-Match``/``If-Modified-Since`` with a 304 before the view runs.
+
+    ``stamp_func(request, *args, **kwargs)`` returns ``(parts, last_modified)``:
+    ``parts`` must change whenever the rendered page would (cache version
+    counters, a ``MAX(updated_at)`` aggregate, ...) and ``last_modified`` may
+    be ``None``. Returning ``None`` skips conditional handling, e.g. for a 404.
+    Private pages also key the ETag on the CSRF cookie so a cached form never
+    carries a token for another session.
+    """
+    def etag(request, *args, **kwargs):
+        stamp = _stamp(request, stamp_func, args, kwargs)
+        if stamp is None:
+            return None
+        parts = (settings.CONDITIONAL_GET_RELEASE, settings.HOT_TEMPLATE_ENGINE, stamp[0])
+        if private:
+            parts += (request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),)
+        return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        stamp = _stamp(request, stamp_func, args, kwargs)
+        return stamp[1] if stamp else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if private:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
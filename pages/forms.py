@@ -1,7 +1,86 @@
 from django import forms
-from .models import Contact
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+from .models import Booking, BookingStatus, Contact, Room, RoomUnit
+from .modifications import STAY_FIELDS, plan_modification
 
 class ContactForm(forms.ModelForm):
     class Meta:
         model = Contact
         fields = ['name', 'email', 'phone', 'subject', 'message']
+
+
+class BookingAdminForm(forms.ModelForm):
+    """Checks changes to the stay (room, dates, guests, cancellation) the way ``modify_booking`` will apply them."""
+
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and 'unit' in self.fields:
+            self.fields['unit'].queryset = RoomUnit.objects.filter(room_id=self.instance.room_id)
+
+    def stay_changes(self):
+        changed = [field for field in STAY_FIELDS if field in self.changed_data]
+        if 'status' in changed:
+            if self.cleaned_data['status'] != BookingStatus.CANCELLED:
+                raise ValidationError('لا يمكن إعادة تفعيل حجز ملغي، أنشئ حجزاً جديداً')
+            return {'cancel': True}
+        return {field: self.cleaned_data[field] for field in changed}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.instance.pk and not self.errors:
+            changes = self.stay_changes()
+            if changes:
+                plan_modification(Booking.objects.select_related('room').get(pk=self.instance.pk), **changes)
+        unit = cleaned_data.get('unit')
+        if unit and 'unit' in self.changed_data and cleaned_data.get('arrival_date') and cleaned_data.get('departure_date'):
+            clash = Booking.objects.filter(
+                unit=unit,
+                status=BookingStatus.CONFIRMED,
+                arrival_date__lt=cleaned_data['departure_date'],
+                departure_date__gt=cleaned_data['arrival_date'],
+            ).exclude(pk=self.instance.pk).first()
+            if clash:
+                raise ValidationError(f'الوحدة {unit.number} مشغولة بالحجز {clash.booking_number} في هذه الفترة')
+        return cleaned_data
+
+
+WEEKDAYS = [
+    (0, _('الإثنين')), (1, _('الثلاثاء')), (2, _('الأربعاء')), (3, _('الخميس')),
+    (4, _('الجمعة')), (5, _('السبت')), (6, _('الأحد')),
+]
+
+
+class RoomRatesForm(forms.Form):
+    """Admin bulk editor: a price and/or count for some weekdays of a date range, for several rooms."""
+    rooms = forms.ModelMultipleChoiceField(
+        Room.objects.all(), label=_('الغرف'), widget=forms.CheckboxSelectMultiple
+    )
+    start_date = forms.DateField(label=_('من تاريخ'), widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(label=_('إلى تاريخ (شامل)'), widget=forms.DateInput(attrs={'type': 'date'}))
+    weekdays = forms.TypedMultipleChoiceField(
+        choices=WEEKDAYS, coerce=int, label=_('أيام الأسبوع'),
+        initial=[day for day, label in WEEKDAYS], widget=forms.CheckboxSelectMultiple
+    )
+    price_override = forms.DecimalField(
+        label=_('سعر مخصص'), max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    available_count = forms.IntegerField(label=_('العدد المتاح'), min_value=0, required=False)
+
+    MAX_DAYS = 731
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        if start and end:
+            if end < start:
+                raise forms.ValidationError(_('تاريخ النهاية يجب أن يكون بعد تاريخ البداية'))
+            if (end - start).days >= self.MAX_DAYS:
+                raise forms.ValidationError(_('الفترة أطول من سنتين'))
+        if cleaned_data.get('price_override') is None and cleaned_data.get('available_count') is None:
+            raise forms.ValidationError(_('حدد سعراً مخصصاً أو عدداً متاحاً أو كليهما'))
+        return cleaned_data
@@ -0,0 +1,358 @@
+"""
+Group bookings: many rooms, possibly of several types, for the same dates.
+
+``create_group_booking`` checks every requested room type with one query
+each for bookings, open waitlist offers and calendar rows. It then writes
+the group with one ``bulk_create`` per table (bookings, payments,
+service bookings) inside one transaction, and queues a single
+confirmation email for the organizer.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+import string
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.mail import send_mail
+from django.core.validators import validate_email
+from django.db import transaction
+from django.http import JsonResponse
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from . import background, channels, occupancy, units
+from .models import (
+    Booking, BookingGroup, BookingStatus, Notification, Payment, PaymentMethod, PaymentStatus, Room,
+    RoomAvailability, Service, ServiceBooking, WaitlistEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+ONE_NIGHT = timedelta(days=1)
+
+
+@dataclass
+class GroupLine:
+    room: Room
+    quantity: int
+    number_of_adults: int
+    number_of_children: int
+    special_requests: str = ''
+    services: list = field(default_factory=list)
+
+
+@dataclass
+class GroupRequest:
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    company: str
+    arrival_date: date
+    departure_date: date
+    payment_method: str
+    lines: list
+
+
+def _int(value, name, minimum=0):
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f'{name} must be an integer >= {minimum}')
+    return value
+
+
+def _text(data, name, required=True, max_length=100):
+    value = str(data.get(name) or '').strip()
+    if required and not value:
+        raise ValueError(f'{name} is required')
+    if len(value) > max_length:
+        raise ValueError(f'{name} is too long')
+    return value
+
+
+def parse_request(payload):
+    """Turn the JSON body into a ``GroupRequest``; raises ``ValueError`` with a message for the client."""
+    if not isinstance(payload, dict):
+        raise ValueError('body must be a JSON object')
+    organizer = payload.get('organizer')
+    if not isinstance(organizer, dict):
+        raise ValueError('organizer must be an object')
+    email = _text(organizer, 'email')
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError('organizer email is invalid')
+
+    try:
+        arrival_date = date.fromisoformat(str(payload.get('arrival_date')))
+        departure_date = date.fromisoformat(str(payload.get('departure_date')))
+    except ValueError:
+        raise ValueError('arrival_date and departure_date must be YYYY-MM-DD')
+    if departure_date <= arrival_date:
+        raise ValueError('departure_date must be after arrival_date')
+    if arrival_date < timezone.localdate():
+        raise ValueError('arrival_date is in the past')
+
+    payment_method = payload.get('payment_method', PaymentMethod.BANK_TRANSFER)
+    if payment_method not in PaymentMethod.values:
+        raise ValueError(f'payment_method must be one of {", ".join(PaymentMethod.values)}')
+
+    lines = payload.get('rooms')
+    if not isinstance(lines, list) or not lines:
+        raise ValueError('rooms must be a non-empty list')
+
+    slugs = {str(line.get('room')) for line in lines if isinstance(line, dict)}
+    rooms = Room.objects.filter(slug__in=slugs, is_active=True).in_bulk(field_name='slug')
+    service_ids = {
+        item['service']
+        for line in lines if isinstance(line, dict) and isinstance(line.get('services'), list)
+        for item in line['services'] if isinstance(item, dict) and isinstance(item.get('service'), int)
+    }
+    services = Service.objects.filter(pk__in=service_ids, is_active=True).in_bulk()
+
+    parsed = []
+    for line in lines:
+        if not isinstance(line, dict):
+            raise ValueError('each room must be an object')
+        room = rooms.get(str(line.get('room')))
+        if room is None:
+            raise ValueError(f'unknown room: {line.get("room")}')
+        adults = _int(line.get('number_of_adults', 1), 'number_of_adults', minimum=1)
+        children = _int(line.get('number_of_children', 0), 'number_of_children')
+        if adults + children > room.capacity:
+            raise ValueError(f'{room.slug} holds at most {room.capacity} guests')
+        line_services = []
+        if not isinstance(line.get('services') or [], list):
+            raise ValueError('services must be a list')
+        for item in line.get('services') or []:
+            service_id = item.get('service') if isinstance(item, dict) else None
+            service = services.get(service_id) if isinstance(service_id, int) else None
+            if service is None:
+                raise ValueError(f'unknown service: {item!r}')
+            line_services.append((service, _int(item.get('quantity', 1), 'service quantity', minimum=1)))
+        parsed.append(GroupLine(
+            room=room,
+            quantity=_int(line.get('quantity', 1), 'quantity', minimum=1),
+            number_of_adults=adults,
+            number_of_children=children,
+            special_requests=str(line.get('special_requests') or '')[:1000],
+            services=line_services,
+        ))
+
+    if sum(line.quantity for line in parsed) > settings.GROUP_BOOKING_MAX_ROOMS:
+        raise ValueError(f'at most {settings.GROUP_BOOKING_MAX_ROOMS} rooms per group')
+
+    return GroupRequest(
+        first_name=_text(organizer, 'first_name'),
+        last_name=_text(organizer, 'last_name'),
+        email=email,
+        phone=_text(organizer, 'phone', max_length=20),
+        company=_text(organizer, 'company', required=False, max_length=200),
+        arrival_date=arrival_date,
+        departure_date=departure_date,
+        payment_method=payment_method,
+        lines=parsed,
+    )
+
+
+def nightly_prices(rooms, arrival_date, departure_date):
+    """
+    Check that every room type has the requested number of rooms on every night and price one room of each.
+
+    ``rooms`` maps ``Room`` to the number of rooms wanted. The bookings,
+    open waitlist offers and calendar rows of all the room types are read
+    with one query each. Returns ``{room_id: price of the stay}``; raises
+    ``ValidationError`` (code ``sold_out``) naming the first night that
+    does not fit.
+    """
+    room_ids = [room.pk for room in rooms]
+    taken = defaultdict(Counter)
+    stays = (
+        Booking.objects.filter(
+            room_id__in=room_ids, status=BookingStatus.CONFIRMED,
+            arrival_date__lt=departure_date, departure_date__gt=arrival_date,
+        ),
+        WaitlistEntry.objects.held().filter(
+            room_id__in=room_ids, arrival_date__lt=departure_date, departure_date__gt=arrival_date,
+        ),
+    )
+    for queryset in stays:
+        for room_id, arrival, departure in queryset.values_list('room_id', 'arrival_date', 'departure_date'):
+            night = max(arrival, arrival_date)
+            while night < min(departure, departure_date):
+                taken[room_id][night] += 1
+                night += ONE_NIGHT
+
+    calendar = {
+        (room_id, night): (count, price)
+        for room_id, night, count, price in RoomAvailability.objects
+        .filter(room_id__in=room_ids, date__gte=arrival_date, date__lt=departure_date)
+        .values_list('room_id', 'date', 'available_count', 'price_override')
+    }
+
+    prices = {}
+    for room, wanted in rooms.items():
+        total = Decimal('0')
+        night = arrival_date
+        while night < departure_date:
+            count, override = calendar.get((room.pk, night), (room.total_rooms, None))
+            if taken[room.pk][night] + wanted > count:
+                raise ValidationError(
+                    _('لا تتوفر %(wanted)s غرف من %(room)s ليلة %(date)s'),
+                    code='sold_out',
+                    params={'wanted': wanted, 'room': room.name, 'date': night},
+                )
+            total += room.price if override is None else override
+            night += ONE_NIGHT
+        prices[room.pk] = total
+    return prices
+
+
+def allocate_booking_numbers(count):
+    """``count`` unused booking numbers, checked against the table with one query per round."""
+    numbers = set()
+    while len(numbers) < count:
+        candidates = {Booking.generate_booking_number() for _ in range(count - len(numbers))} - numbers
+        taken = set(Booking.objects.filter(booking_number__in=candidates).values_list('booking_number', flat=True))
+        numbers |= candidates - taken
+    return sorted(numbers)
+
+
+def _group_reference():
+    while True:
+        reference = f"GR{timezone.now().strftime('%y%m')}{''.join(random.choices(string.digits, k=6))}"
+        if not BookingGroup.objects.filter(reference=reference).exists():
+            return reference
+
+
+def create_group_booking(request):
+    """Book every room of a ``GroupRequest`` or none of them."""
+    wanted = Counter()
+    for line in request.lines:
+        wanted[line.room] += line.quantity
+
+    with transaction.atomic():
+        # قفل أنواع الغرف المطلوبة بترتيب ثابت حتى لا تتداخل مجموعتان على نفس الليالي
+        list(Room.objects.select_for_update().filter(pk__in=[room.pk for room in wanted]).order_by('pk'))
+        prices = nightly_prices(wanted, request.arrival_date, request.departure_date)
+
+        group = BookingGroup.objects.create(
+            reference=_group_reference(),
+            company=request.company,
+            first_name=request.first_name,
+            last_name=request.last_name,
+            email=request.email,
+            phone=request.phone,
+            arrival_date=request.arrival_date,
+            departure_date=request.departure_date,
+            total_price=sum(prices[room.pk] * count for room, count in wanted.items()),
+        )
+
+        numbers = iter(allocate_booking_numbers(sum(wanted.values())))
+        bookings, line_of = [], []
+        for line in request.lines:
+            for _ in range(line.quantity):
+                bookings.append(Booking(
+                    room=line.room,
+                    group=group,
+                    booking_number=next(numbers),
+                    arrival_date=request.arrival_date,
+                    departure_date=request.departure_date,
+                    number_of_adults=line.number_of_adults,
+                    number_of_children=line.number_of_children,
+                    special_requests=line.special_requests,
+                    first_name=request.first_name,
+                    last_name=request.last_name,
+                    email=request.email,
+                    phone=request.phone,
+                    total_price=prices[line.room.pk],
+                ))
+                line_of.append(line)
+        Booking.objects.bulk_create(bookings)
+
+        Payment.objects.bulk_create([
+            Payment(booking=booking, amount=booking.total_price, method=request.payment_method,
+                    status=PaymentStatus.PENDING)
+            for booking in bookings
+        ])
+        ServiceBooking.objects.bulk_create([
+            ServiceBooking(booking=booking, service=service, quantity=quantity,
+                           price_at_booking=service.price * quantity)
+            for booking, line in zip(bookings, line_of)
+            for service, quantity in line.services
+        ])
+
+        notification = Notification.objects.create(
+            recipient_email=group.email,
+            subject=' '.join(
+                get_template('pages/emails/group_confirmation_subject.txt').render({'group': group}).split()
+            ),
+            message=get_template('pages/emails/group_confirmation.txt').render({
+                'group': group,
+                'bookings': bookings,
+                'nights': (group.departure_date - group.arrival_date).days,
+            }),
+        )
+        room_ids = [room.pk for room in wanted]
+        channels.mark_changed_many((room_id, group.arrival_date, group.departure_date) for room_id in room_ids)
+        for room_id, count in Counter(booking.room_id for booking in bookings).items():
+            occupancy.schedule_booking(room_id, group.arrival_date, group.departure_date, count)
+        transaction.on_commit(lambda: background.submit(send_group_confirmation, notification.pk))
+        transaction.on_commit(lambda: [background.submit(units.assign_room, room_id) for room_id in room_ids])
+
+    return group, bookings
+
+
+def send_group_confirmation(notification_id):
+    notification = Notification.objects.get(pk=notification_id)
+    try:
+        send_mail(notification.subject, notification.message, settings.DEFAULT_FROM_EMAIL,
+                  [notification.recipient_email])
+    except Exception:
+        logger.exception('Group confirmation %s failed', notification_id)
+        return
+    Notification.objects.filter(pk=notification.pk).update(is_sent=True, sent_at=timezone.now())
+
+
+def _authorized(request):
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    digest = hashlib.sha256(supplied.encode()).digest()
+    # مقارنة كل الرموز دائماً حتى لا يكشف الزمن أيها طابق
+    return supplied and any([
+        hmac.compare_digest(digest, hashlib.sha256(token.encode()).digest())
+        for token in settings.GROUP_BOOKING_API_TOKENS
+    ])
+
+
+@csrf_exempt
+@require_POST
+def group_booking(request):
+    if not _authorized(request):
+        return JsonResponse({'error': 'invalid token'}, status=401)
+    try:
+        group_request = parse_request(json.loads(request.body))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    try:
+        group, bookings = create_group_booking(group_request)
+    except ValidationError as exc:
+        return JsonResponse({'error': exc.messages[0]}, status=409 if exc.code == 'sold_out' else 400)
+
+    return JsonResponse({
+        'reference': group.reference,
+        'total_price': str(group.total_price),
+        'bookings': [
+            {'booking_number': booking.booking_number, 'room': booking.room.slug, 'total_price': str(booking.total_price)}
+            for booking in bookings
+        ],
+    }, status=201)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.archive import archive_bookings
+
+
+class Command(BaseCommand):
+    help = 'Move bookings that departed long ago, with their payments, services and notifications, to the archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.ARCHIVE_AFTER_MONTHS,
+                            help='Archive stays that departed more than this many months ago.')
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE,
+                            help='Bookings moved per transaction.')
+        parser.add_argument('--limit', type=int, help='Stop after about this many bookings.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived.')
+
+    def handle(self, *args, **options):
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+        result = archive_bookings(
+            months=options['months'], batch_size=options['batch_size'],
+            limit=options['limit'], dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{result.bookings} bookings departed before {result.cutoff}')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.bookings} bookings archived (departed before {result.cutoff}) with {result.payments} payments, '
+            f'{result.adjustments} adjustments, {result.services} service bookings and '
+            f'{result.notifications} notifications in {result.seconds:.1f}s'
+        ))
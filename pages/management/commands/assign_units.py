@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.models import Room, RoomUnit
+from pages.units import assign_room
+
+
+class Command(BaseCommand):
+    help = 'Assign confirmed bookings to physical room units (in house and the coming days).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', action='append', metavar='SLUG',
+                            help='Room type to assign; may be repeated. Defaults to all active rooms.')
+        parser.add_argument('--days', type=int, default=365, help='How far ahead to assign.')
+        parser.add_argument('--create-units', action='store_true',
+                            help='First create numbered units for room types with fewer units than total_rooms.')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.filter(is_active=True)
+        if options['room']:
+            rooms = rooms.filter(slug__in=options['room'])
+            missing = set(options['room']) - set(rooms.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f'Unknown room: {", ".join(sorted(missing))}')
+
+        if options['create_units']:
+            for room in rooms:
+                existing = set(room.units.values_list('number', flat=True))
+                new = [
+                    RoomUnit(room=room, number=f'{room.pk}{index:02d}')
+                    for index in range(1, room.total_rooms + 1)
+                    if f'{room.pk}{index:02d}' not in existing
+                ][:max(room.total_rooms - len(existing), 0)]
+                RoomUnit.objects.bulk_create(new)
+                if new:
+                    self.stdout.write(f'{room.name}: {len(new)} units created')
+
+        for room in rooms:
+            result = assign_room(room.pk, days=options['days'])
+            line = (
+                f'{room.name}: {result.bookings} bookings, {result.changed} changed, '
+                f'{len(result.unassigned)} without a unit ({result.seconds * 1000:.0f} ms)'
+            )
+            self.stdout.write(self.style.WARNING(line) if result.unassigned else self.style.SUCCESS(line))
@@ -0,0 +1,159 @@
+import datetime
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from pages.models import Booking, BookingStatus, Payment, PaymentMethod, PaymentStatus, Room
+
+ALIAS = 'index_benchmark'
+BEFORE = '0011_channel_sync'
+AFTER = '0012_booking_query_indexes'
+
+
+def _queries(rooms, numbers, today):
+    """The hot queries, as the code issues them, with random arguments on each call."""
+    room = lambda: random.choice(rooms)  # noqa: E731
+
+    def stay():
+        arrival = today + datetime.timedelta(days=random.randint(0, 180))
+        return arrival, arrival + datetime.timedelta(days=random.randint(1, 7))
+
+    def overlap():
+        # Booking.clean و modifications.check_nights
+        arrival, departure = stay()
+        return Booking.objects.using(ALIAS).filter(
+            room=room(), status=BookingStatus.CONFIRMED, arrival_date__lt=departure, departure_date__gt=arrival,
+        )
+
+    def occupied():
+        # Room.available_rooms_count
+        return Booking.objects.using(ALIAS).filter(
+            room=room(), departure_date__gte=today, payment__status=PaymentStatus.COMPLETED,
+        )
+
+    return {
+        'overlap check': (overlap, 'count'),
+        'available_rooms_count': (occupied, 'count'),
+        'catalog page': (
+            lambda: Room.objects.using(ALIAS).filter(is_active=True).order_by('-created_at', '-id')[:20], 'list',
+        ),
+        'room page': (lambda: Room.objects.using(ALIAS).filter(slug=room().slug, is_active=True), 'list'),
+        'confirmation lookup': (
+            lambda: Booking.objects.using(ALIAS).filter(booking_number=random.choice(numbers)), 'list',
+        ),
+        'arrivals today': (
+            lambda: Booking.objects.using(ALIAS).filter(arrival_date=today, status=BookingStatus.CONFIRMED), 'count',
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare query plans and timings of the hot booking queries before and after the '
+        f'{AFTER} indexes, on a synthetic database (the real one is not touched).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200000)
+        parser.add_argument('--rooms', type=int, default=40)
+        parser.add_argument('--repeat', type=int, default=200, help='Runs per query; medians are reported.')
+        parser.add_argument('--keep', metavar='PATH', help='Build the database at PATH and keep it.')
+
+    def handle(self, *args, **options):
+        path = Path(options['keep'] or tempfile.mkstemp(suffix='.sqlite3')[1])
+        path.unlink(missing_ok=True)
+        connections.settings[ALIAS] = {**connections.settings['default'], 'NAME': str(path)}
+        try:
+            call_command('migrate', 'pages', BEFORE, database=ALIAS, verbosity=0)
+            started = time.perf_counter()
+            rooms, numbers = self._seed(options['bookings'], options['rooms'])
+            self.stdout.write(
+                f'{options["bookings"]} bookings over {options["rooms"]} rooms seeded '
+                f'in {time.perf_counter() - started:.1f}s ({path})'
+            )
+
+            queries = _queries(rooms, numbers, timezone.localdate())
+            before = self._measure(queries, options['repeat'])
+            started = time.perf_counter()
+            call_command('migrate', 'pages', AFTER, database=ALIAS, verbosity=0)
+            # بدون إحصاءات المؤشرات الجديدة لا يختار SQLite المؤشرات الجزئية
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f'{AFTER} applied in {time.perf_counter() - started:.1f}s')
+            after = self._measure(queries, options['repeat'])
+        finally:
+            connections[ALIAS].close()
+            del connections.settings[ALIAS]
+            if not options['keep']:
+                for suffix in ('', '-wal', '-shm'):
+                    Path(f'{path}{suffix}').unlink(missing_ok=True)
+
+        for name in queries:
+            (before_ms, before_plan), (after_ms, after_plan) = before[name], after[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n{name}: {before_ms:.3f} ms -> {after_ms:.3f} ms ({before_ms / max(after_ms, 1e-6):.1f}x)'
+            ))
+            self.stdout.write(f'  before: {before_plan}\n  after:  {after_plan}')
+
+    def _seed(self, bookings, room_count):
+        today = timezone.localdate()
+        rooms = Room.objects.using(ALIAS).bulk_create([
+            Room(
+                name=f'Benchmark room {index}', slug=f'benchmark-{index}', description='-',
+                price=Decimal(random.randint(50, 500)), total_rooms=random.randint(10, 60),
+                bed_type='-', size='-', is_active=index % 5 != 0,
+                created_at=timezone.now() - datetime.timedelta(days=index),
+            )
+            for index in range(room_count)
+        ])
+        numbers = []
+        batch = 20000
+        for offset in range(0, bookings, batch):
+            rows = []
+            for index in range(offset, min(offset + batch, bookings)):
+                # ثلاث سنوات من التاريخ وسنة قادمة، كما في فندق يعمل منذ سنوات
+                arrival = today + datetime.timedelta(days=random.randint(-3 * 365, 365))
+                rows.append(Booking(
+                    room=random.choice(rooms), booking_number=f'BM{index:09d}',
+                    arrival_date=arrival, departure_date=arrival + datetime.timedelta(days=random.randint(1, 10)),
+                    first_name='Bench', last_name='Mark', email=f'guest{index % 50000}@example.com', phone='0',
+                    status=BookingStatus.CANCELLED if random.random() < 0.1 else BookingStatus.CONFIRMED,
+                    total_price=Decimal('100.00'),
+                ))
+            Booking.objects.using(ALIAS).bulk_create(rows)
+            Payment.objects.using(ALIAS).bulk_create([
+                Payment(
+                    booking=booking, amount=booking.total_price, method=PaymentMethod.CREDIT_CARD,
+                    status=PaymentStatus.COMPLETED if random.random() < 0.6 else PaymentStatus.PENDING,
+                )
+                for booking in rows
+            ])
+            numbers.extend(booking.booking_number for booking in rows[::97])
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return rooms, numbers
+
+    def _measure(self, queries, repeat):
+        results = {}
+        for name, (build, action) in queries.items():
+            # count() drops the ordering, so its plan is the unordered one
+            queryset = build().order_by() if action == 'count' else build()
+            plan = ' | '.join(queryset.explain().splitlines())
+            timings = []
+            # الدورات الأولى تدفئ ذاكرة الصفحات فلا تحسب
+            for run in range(repeat + 10):
+                queryset = build()
+                started = time.perf_counter()
+                queryset.count() if action == 'count' else list(queryset)
+                if run >= 10:
+                    timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (statistics.median(timings), plan)
+        return results
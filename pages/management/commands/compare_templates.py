@@ -0,0 +1,116 @@
+import difflib
+import re
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import RequestFactory
+
+from club.models import TIME_FLAG_CHOICES, Club, Facility, Workingoaches
+from pages.models import Room, RoomAmenity
+from pages.refdata import reference_data
+
+PAGES = ['rooms', 'room_details', 'services', 'club', 'facilities']
+
+_COMMENTS = re.compile(r'<!--.*?-->', re.S)
+_CSRF = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*')
+_BETWEEN_TAGS = re.compile(r'>\s+<')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(html):
+    """Drop comments, CSRF token values and insignificant whitespace before comparing."""
+    html = _COMMENTS.sub('', html)
+    html = _CSRF.sub(r'\1', html)
+    html = _BETWEEN_TAGS.sub('><', html)
+    return _SPACES.sub(' ', html).strip()
+
+
+def _fragments(*names):
+    # مهلة صفر تعطل كاش الأجزاء حتى تقاس وتقارن عملية العرض كاملة
+    return {'versions': dict.fromkeys(names, 'compare'), 'fragment_timeout': 0}
+
+
+def _contexts():
+    room = Room.objects.order_by('pk').first()
+    contexts = {
+        'rooms': ('pages/rooms.html', {'room_list': list(Room.objects.all())}),
+        'services': ('pages/services.html', {'services': reference_data.get('services')}),
+        'club': ('club/club.html', {
+            'clubs': list(Club.objects.filter(is_active=True)[:3]),
+            'trainers': list(Workingoaches.objects.filter(is_active=True)[:3]),
+            'membership_plans': reference_data.get('membership_plans'),
+            **_fragments('clubs', 'trainers', 'membership_plans'),
+        }),
+        'facilities': ('club/facilities.html', {
+            'facilities': list(Facility.objects.filter(is_active=True).prefetch_related('services')),
+            'time_flag_choices': TIME_FLAG_CHOICES,
+            **_fragments('facilities'),
+        }),
+    }
+    if room is not None:
+        contexts['room_details'] = ('pages/room_details.html', {
+            'room': room,
+            'room_amenities': list(RoomAmenity.objects.filter(room=room)),
+        })
+    return contexts
+
+
+class Command(BaseCommand):
+    help = 'Check that the Jinja2 hot-page templates render the same HTML as the Django ones, and time both.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', choices=PAGES, action='append',
+                            help='Page to compare; may be repeated. Defaults to all.')
+        parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                            help='Also render every page N times with each engine and report the average.')
+
+    def handle(self, *args, **options):
+        if not settings.HOT_TEMPLATE_ENGINE:
+            raise CommandError('Jinja2 templates are disabled; set USE_JINJA2_TEMPLATES=True.')
+        django_engine = engines['django']
+        jinja_engine = engines[settings.HOT_TEMPLATE_ENGINE]
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        contexts = _contexts()
+
+        failed = False
+        for page in options['page'] or PAGES:
+            if page not in contexts:
+                self.stdout.write(self.style.WARNING(f'{page}: skipped, no data to render'))
+                continue
+            template_name, context = contexts[page]
+            django_template = django_engine.get_template(template_name)
+            jinja_template = jinja_engine.get_template(template_name)
+
+            expected = normalize(django_template.render(context, request))
+            actual = normalize(jinja_template.render(context, request))
+            if expected != actual:
+                failed = True
+                self.stdout.write(self.style.ERROR(f'{page}: output differs'))
+                diff = difflib.unified_diff(
+                    expected.replace('><', '>\n<').splitlines(),
+                    actual.replace('><', '>\n<').splitlines(),
+                    'django', 'jinja2', lineterm='', n=1,
+                )
+                self.stdout.write('\n'.join(diff))
+                continue
+
+            line = f'{page}: identical'
+            if options['benchmark']:
+                django_ms = self._time(django_template, context, request, options['benchmark'])
+                jinja_ms = self._time(jinja_template, context, request, options['benchmark'])
+                line += f' | django {django_ms:.3f} ms, jinja2 {jinja_ms:.3f} ms ({django_ms / jinja_ms:.1f}x)'
+            self.stdout.write(self.style.SUCCESS(line))
+
+        if failed:
+            raise CommandError('Jinja2 templates do not match the Django templates.')
+
+    def _time(self, template, context, request, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            template.render(context, request)
+        return (time.perf_counter() - started) * 1000 / rounds
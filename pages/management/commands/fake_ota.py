@@ -0,0 +1,84 @@
+import datetime
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in OTA that accepts channel inventory pushes, for testing and benchmarking the sync.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--failure-rate', type=float, default=0.0,
+                            help='Fraction of pushes answered with 503 to exercise retries.')
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every push.')
+
+    def handle(self, *args, **options):
+        lock = threading.Lock()
+        # (غرفة، تاريخ) -> (المتاح، السعر) كما تراه القناة
+        inventory = {}
+        stats = {'requests': 0, 'failures': 0, 'ranges': 0, 'nights': 0}
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with lock:
+                    rooms = {}
+                    for (room, night), (available, price) in sorted(inventory.items()):
+                        rooms.setdefault(room, {})[night.isoformat()] = {'available': available, 'price': price}
+                    self._reply(200, {'stats': stats, 'rooms': rooms})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if options['latency_ms']:
+                    time.sleep(options['latency_ms'] / 1000)
+                with lock:
+                    stats['requests'] += 1
+                    if random.random() < options['failure_rate']:
+                        stats['failures'] += 1
+                        return self._reply(503, {'error': 'unavailable'})
+                try:
+                    updates = json.loads(body)['updates']
+                    parsed = [
+                        (item['room'], datetime.date.fromisoformat(item['from']),
+                         datetime.date.fromisoformat(item['to']), int(item['available']), item['price'])
+                        for item in updates
+                    ]
+                except (ValueError, KeyError, TypeError):
+                    return self._reply(400, {'error': 'invalid payload'})
+                with lock:
+                    for room, night, last, available, price in parsed:
+                        stats['ranges'] += 1
+                        while night <= last:
+                            inventory[(room, night)] = (available, price)
+                            stats['nights'] += 1
+                            night += datetime.timedelta(days=1)
+                self._reply(200, {'accepted': len(parsed)})
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        stdout.write(f'Fake OTA listening on http://127.0.0.1:{options["port"]}/ (Ctrl+C to stop)')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            stdout.write(
+                f'{stats["requests"]} pushes, {stats["failures"]} failed, '
+                f'{stats["ranges"]} ranges, {stats["nights"]} nights, {len(inventory)} room-nights held'
+            )
@@ -0,0 +1,87 @@
+import json
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib import error, request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.models import Payment, PaymentStatus
+from pages.webhooks import sign_payload
+
+
+class Command(BaseCommand):
+    help = 'Replay bursts of signed payment events against the webhook endpoint for load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/pages/webhooks/payments/')
+        parser.add_argument('--secret', default=None, help='Defaults to PAYMENT_WEBHOOK_SECRET.')
+        parser.add_argument('--requests', type=int, default=200, help='Number of webhook deliveries.')
+        parser.add_argument('--batch', type=int, default=50, help='Events per delivery.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duplicate-rate', type=float, default=0.1,
+                            help='Fraction of events re-sent with an already used ID.')
+
+    def handle(self, *args, **options):
+        secret = options['secret'] if options['secret'] is not None else settings.PAYMENT_WEBHOOK_SECRET
+        if not secret:
+            raise CommandError('A webhook secret is required (--secret or PAYMENT_WEBHOOK_SECRET).')
+
+        targets = list(
+            Payment.objects.filter(status=PaymentStatus.PENDING)
+            .values_list('transaction_id', 'booking__booking_number')[:10000]
+        )
+        if not targets:
+            raise CommandError('No pending payments to generate events for.')
+
+        sent_ids = []
+
+        def build_body():
+            events = []
+            for _ in range(options['batch']):
+                if sent_ids and random.random() < options['duplicate_rate']:
+                    event_id = random.choice(sent_ids)
+                else:
+                    event_id = uuid.uuid4().hex
+                    sent_ids.append(event_id)
+                transaction_id, booking_number = random.choice(targets)
+                events.append({
+                    'id': event_id,
+                    'status': random.choice(['completed', 'completed', 'failed']),
+                    'transaction_id': transaction_id,
+                    'booking_number': booking_number,
+                })
+            return json.dumps({'events': events}).encode()
+
+        def deliver(body):
+            req = request.Request(options['url'], data=body, method='POST', headers={
+                'Content-Type': 'application/json',
+                'X-Webhook-Signature': sign_payload(body, secret),
+            })
+            started = time.perf_counter()
+            try:
+                with request.urlopen(req, timeout=10) as response:
+                    status = response.status
+            except error.HTTPError as exc:
+                status = exc.code
+            except error.URLError as exc:
+                raise CommandError(f'Webhook endpoint unreachable: {exc.reason}')
+            return status, (time.perf_counter() - started) * 1000
+
+        bodies = [build_body() for _ in range(options['requests'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(deliver, bodies))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        failures = sum(1 for status, _ in results if status != 200)
+        self.stdout.write(
+            f'{len(results)} deliveries ({len(results) * options["batch"]} events) in {elapsed:.2f}s, '
+            f'{failures} non-200 responses\n'
+            f'latency ms: p50={statistics.median(latencies):.1f} '
+            f'p95={latencies[int(len(latencies) * 0.95) - 1]:.1f} max={latencies[-1]:.1f}'
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from pages.models import WaitlistEntry, WaitlistStatus
+from pages.waitlist import expire_offers, rematch
+
+
+class Command(BaseCommand):
+    help = 'Expire waitlist offers past their time limit and offer their nights to the next guests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sweep', action='store_true',
+                            help='Also re-match every room with waiting guests against all future nights.')
+
+    def handle(self, *args, **options):
+        expired = expire_offers()
+        self.stdout.write(self.style.SUCCESS(f'{expired} offers expired'))
+
+        if options['sweep']:
+            # يلتقط ما تحرر دون إشارة (تعديلات update() المباشرة مثلاً)
+            today = timezone.localdate()
+            rooms = (
+                WaitlistEntry.objects
+                .filter(status=WaitlistStatus.WAITING, arrival_date__gte=today)
+                .order_by().values('room_id').annotate(last=Max('departure_date')).values_list('room_id', 'last')
+            )
+            offered = 0
+            for room_id, last_departure in rooms:
+                offered += len(rematch(room_id, [(today, last_departure)]))
+            self.stdout.write(self.style.SUCCESS(f'{offered} offers sent'))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pages.profiling import TOKEN_HEADER, make_token
+
+
+class Command(BaseCommand):
+    help = 'Print a signed token that turns on the sampling profiler for the requests carrying it.'
+
+    def handle(self, *args, **options):
+        token = make_token()
+        self.stdout.write(token)
+        self.stderr.write(
+            f'Send it as the {TOKEN_HEADER} header; '
+            f'valid for {settings.PROFILE_TOKEN_MAX_AGE} seconds.'
+        )
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.reconciliation import read_settlement_file, reconcile_payments, write_mismatch_report
+
+
+class Command(BaseCommand):
+    help = 'Reconcile payments against a gateway settlement file (CSV or JSONL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Settlement file path.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--report', help='Write unmatched/rejected rows to this CSV file.')
+        parser.add_argument('--dry-run', action='store_true', help='Match rows without writing changes.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            rows = read_settlement_file(options['path'], options['format'])
+            result = reconcile_payments(rows, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not read settlement file: {exc}')
+
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8') as handle:
+                write_mismatch_report(result.mismatches, handle)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {result.processed} rows in {elapsed:.2f}s: '
+            f'{result.updated} updated, {result.unchanged} unchanged, '
+            f'{len(result.mismatches)} mismatches.'
+        ))
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pages.campaigns import CAMPAIGNS, run_campaign
+
+
+class Command(BaseCommand):
+    help = 'Send scheduled guest email campaigns (pre-arrival reminders, post-stay review requests).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaign', choices=sorted(CAMPAIGNS), action='append',
+                            help='Campaign to run; may be repeated. Defaults to all.')
+        parser.add_argument('--date', help='Run as if today were YYYY-MM-DD.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        for name in options['campaign'] or sorted(CAMPAIGNS):
+            campaign = CAMPAIGNS[name]
+            # التواريخ السابقة تلتقط الحجوزات التي أنشئت بعد تشغيلها
+            for target_date in campaign.target_dates(today):
+                result = run_campaign(campaign, target_date, batch_size=options['batch_size'])
+                line = f'{name} ({target_date}): {result.sent} emails sent'
+                if result.failed:
+                    self.stdout.write(self.style.WARNING(f'{line}, {result.failed} refused'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,105 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _parse_importtime(stderr):
+    """Per-module ``(self_us, cumulative_us)`` from ``python -X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def _package(name, depth=2):
+    return '.'.join(name.split('.')[:depth])
+
+
+class Command(BaseCommand):
+    help = 'Boot Django in fresh interpreters the way a worker does and report where the time goes.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to boot; medians are reported.')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list by import time.')
+        parser.add_argument('--record', metavar='PATH',
+                            help='Append the medians as one JSON line, to track boot time across releases.')
+        parser.add_argument('--label', default=settings.CONDITIONAL_GET_RELEASE,
+                            help='Release label stored with --record.')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+
+        results, imports = [], []
+        for _ in range(options['runs']):
+            result, modules = self._boot()
+            results.append(result)
+            imports.append(modules)
+
+        boot_ms = statistics.median(r['boot_ms'] for r in results)
+        first_request_ms = statistics.median(r['first_request_ms'] for r in results)
+        phases = {
+            name: statistics.median(r['phases'][name] for r in results) for name in results[0]['phases']
+        }
+        apps = {
+            label: {
+                part: statistics.median(r['apps'][label][part] for r in results)
+                for part in ('models', 'ready')
+            }
+            for label in results[0]['apps']
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Boot {boot_ms:.1f} ms, first request URLconf {first_request_ms:.1f} ms (median of {len(results)})'
+        ))
+        for name, ms in phases.items():
+            self.stdout.write(f'  {name:<12}{ms:>9.1f} ms')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('App registry (models import / ready)'))
+        for label, timings in sorted(apps.items(), key=lambda item: -sum(item[1].values())):
+            self.stdout.write(f'  {label:<16}{timings["models"]:>9.1f} ms {timings["ready"]:>9.1f} ms')
+
+        # أثقل الحزم حسب الوقت الذاتي للاستيراد، من أسرع تشغيل حتى لا يشوهها ضجيج النظام
+        fastest = imports[min(range(len(results)), key=lambda index: results[index]['boot_ms'])]
+        packages = Counter()
+        for name, (self_us, _) in fastest.items():
+            packages[_package(name)] += self_us
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Import time by package (self, {len(fastest)} modules)'))
+        for package, self_us in packages.most_common(options['top']):
+            self.stdout.write(f'  {package:<40}{self_us / 1000:>9.1f} ms')
+
+        if options['record']:
+            with open(options['record'], 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps({
+                    'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    'label': options['label'],
+                    'lazy_boot': settings.LAZY_BOOT,
+                    'serve_admin': settings.SERVE_ADMIN,
+                    'prewarm': settings.PREWARM_ON_BOOT,
+                    'boot_ms': boot_ms,
+                    'first_request_ms': first_request_ms,
+                    'phases': phases,
+                    'apps': apps,
+                    'modules': len(fastest),
+                }) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Recorded in {options["record"]}'))
+
+    def _boot(self):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'project.startup'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy(),
+        )
+        if process.returncode:
+            raise CommandError(f'Worker boot failed:\n{process.stderr[-2000:]}')
+        return json.loads(process.stdout), _parse_importtime(process.stderr)
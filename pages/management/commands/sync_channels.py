@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.channels import sync_channel
+from pages.models import ChannelInventory, ChannelSyncState
+
+
+class Command(BaseCommand):
+    help = 'Push availability and price changes to the configured sales channels.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channel', action='append', help='Only this channel (repeatable).')
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every room over the whole horizon instead of only changed nights.')
+        parser.add_argument('--reset', action='store_true',
+                            help='Forget what was pushed so the next sync sends everything again.')
+
+    def handle(self, *args, **options):
+        names = options['channel'] or list(settings.CHANNELS)
+        unknown = set(names) - set(settings.CHANNELS)
+        if unknown:
+            raise CommandError(f'Unknown channel(s): {", ".join(sorted(unknown))}')
+        if not names:
+            raise CommandError('No channels configured (settings.CHANNELS).')
+
+        failed = False
+        for name in names:
+            if options['reset']:
+                ChannelInventory.objects.filter(channel=name).delete()
+                ChannelSyncState.objects.filter(channel=name).delete()
+            result = sync_channel(name, full=options['full'])
+            line = (
+                f'{name}: {result.nights_checked} nights checked, {result.ranges} ranges, '
+                f'{result.batches} batches, {result.retries} retries in {result.seconds:.2f}s'
+            )
+            if result.error:
+                failed = True
+                self.stderr.write(self.style.ERROR(f'{line} — stopped: {result.error}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+        if failed:
+            raise CommandError('Some channels did not finish; the next run picks up where they stopped.')
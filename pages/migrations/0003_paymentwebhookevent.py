@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19 11:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_room_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=100, unique=True, verbose_name='معرف الحدث')),
+                ('transaction_id', models.CharField(blank=True, max_length=100, verbose_name='رقم العملية')),
+                ('booking_number', models.CharField(blank=True, max_length=20, verbose_name='رقم الحجز')),
+                ('status', models.CharField(choices=[('pending', 'معلق'), ('completed', 'مكتمل'), ('failed', 'فاشل'), ('refunded', 'مسترد')], max_length=20, verbose_name='الحالة')),
+                ('applied', models.BooleanField(default=False, verbose_name='تم التطبيق')),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الاستلام')),
+            ],
+            options={
+                'verbose_name': 'حدث بوابة الدفع',
+                'verbose_name_plural': 'أحداث بوابة الدفع',
+                'ordering': ['-received_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0003_paymentwebhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign', models.CharField(max_length=30, verbose_name='الحملة')),
+                ('target_date', models.DateField(verbose_name='التاريخ المستهدف')),
+                ('last_booking_id', models.BigIntegerField(default=0, verbose_name='آخر حجز تمت معالجته')),
+                ('sent_count', models.PositiveIntegerField(default=0, verbose_name='عدد الرسائل المرسلة')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الاكتمال')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+            ],
+            options={
+                'verbose_name': 'نقطة استئناف حملة',
+                'verbose_name_plural': 'نقاط استئناف الحملات',
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='campaign',
+            field=models.CharField(blank=True, max_length=30, verbose_name='الحملة'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('campaign', ''), _negated=True), fields=('booking', 'campaign'), name='unique_campaign_notification'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='campaigncheckpoint',
+            unique_together={('campaign', 'target_date')},
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 11:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0004_notification_campaign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveIntegerField(unique=True, verbose_name='الخانة')),
+                ('fingerprint', models.CharField(db_index=True, max_length=40, verbose_name='بصمة الاستعلام')),
+                ('statement', models.TextField(verbose_name='شكل الاستعلام')),
+                ('sql', models.TextField(verbose_name='الاستعلام')),
+                ('params', models.TextField(blank=True, verbose_name='المعاملات')),
+                ('duration_ms', models.FloatField(verbose_name='المدة (ms)')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='الصفحة')),
+                ('caller', models.CharField(blank=True, max_length=300, verbose_name='الدالة المستدعية')),
+                ('plan', models.TextField(blank=True, verbose_name='خطة التنفيذ')),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ التسجيل')),
+            ],
+            options={
+                'verbose_name': 'استعلام بطيء',
+                'verbose_name_plural': 'الاستعلامات البطيئة',
+                'ordering': ['-recorded_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-19 11:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0006_room_catalog_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arrival_date', models.DateField(verbose_name='تاريخ الوصول')),
+                ('departure_date', models.DateField(verbose_name='تاريخ المغادرة')),
+                ('number_of_adults', models.PositiveIntegerField(default=1, verbose_name='عدد البالغين')),
+                ('number_of_children', models.PositiveIntegerField(default=0, verbose_name='عدد الأطفال')),
+                ('first_name', models.CharField(max_length=100, verbose_name='الاسم الأول')),
+                ('last_name', models.CharField(max_length=100, verbose_name='الاسم الأخير')),
+                ('email', models.EmailField(max_length=254, verbose_name='البريد الإلكتروني')),
+                ('phone', models.CharField(max_length=20, verbose_name='رقم الهاتف')),
+                ('status', models.CharField(choices=[('waiting', 'في الانتظار'), ('offered', 'تم إرسال عرض'), ('booked', 'تم الحجز'), ('expired', 'انتهى العرض'), ('cancelled', 'ملغي')], default='waiting', max_length=20, verbose_name='الحالة')),
+                ('offer_token', models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='رمز العرض')),
+                ('offered_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ العرض')),
+                ('offer_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='انتهاء العرض')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء')),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='pages.booking', verbose_name='الحجز')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='pages.room', verbose_name='الغرفة')),
+            ],
+            options={
+                'verbose_name': 'طلب انتظار',
+                'verbose_name_plural': 'قائمة الانتظار',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['room', 'status', 'arrival_date'], name='pages_waitl_room_id_eca7a1_idx'), models.Index(fields=['status', 'offer_expires_at'], name='pages_waitl_status_6fc9e9_idx')],
+            },
+        ),
+    ]
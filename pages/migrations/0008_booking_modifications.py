@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-19 11:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0007_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='status',
+            field=models.CharField(choices=[('confirmed', 'مؤكد'), ('cancelled', 'ملغي')], default='confirmed', max_length=20, verbose_name='الحالة'),
+        ),
+        migrations.CreateModel(
+            name='PaymentAdjustment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('charge', 'مبلغ إضافي'), ('refund', 'استرداد')], max_length=10, verbose_name='النوع')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='المبلغ')),
+                ('previous_total', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='الإجمالي السابق')),
+                ('new_total', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='الإجمالي الجديد')),
+                ('nights_added', models.PositiveIntegerField(default=0, verbose_name='ليالٍ مضافة')),
+                ('nights_removed', models.PositiveIntegerField(default=0, verbose_name='ليالٍ ملغاة')),
+                ('reason', models.CharField(blank=True, max_length=200, verbose_name='السبب')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adjustments', to='pages.booking', verbose_name='الحجز')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='adjustments', to='pages.payment', verbose_name='الدفع')),
+            ],
+            options={
+                'verbose_name': 'تسوية دفع',
+                'verbose_name_plural': 'تسويات الدفع',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0008_booking_modifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=20, verbose_name='رقم الغرفة')),
+                ('floor', models.SmallIntegerField(blank=True, null=True, verbose_name='الطابق')),
+                ('is_active', models.BooleanField(default=True, verbose_name='نشطة')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='units', to='pages.room', verbose_name='نوع الغرفة')),
+            ],
+            options={
+                'verbose_name': 'وحدة غرفة',
+                'verbose_name_plural': 'وحدات الغرف',
+                'ordering': ['room', 'number'],
+                'unique_together': {('room', 'number')},
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='unit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='pages.roomunit', verbose_name='الوحدة'),
+        ),
+    ]
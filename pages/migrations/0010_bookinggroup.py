@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-19 11:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0009_roomunit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(max_length=20, unique=True, verbose_name='رقم المجموعة')),
+                ('company', models.CharField(blank=True, max_length=200, verbose_name='الشركة')),
+                ('first_name', models.CharField(max_length=100, verbose_name='الاسم الأول')),
+                ('last_name', models.CharField(max_length=100, verbose_name='الاسم الأخير')),
+                ('email', models.EmailField(max_length=254, verbose_name='البريد الإلكتروني')),
+                ('phone', models.CharField(max_length=20, verbose_name='رقم الهاتف')),
+                ('arrival_date', models.DateField(verbose_name='تاريخ الوصول')),
+                ('departure_date', models.DateField(verbose_name='تاريخ المغادرة')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='إجمالي السعر')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء')),
+            ],
+            options={
+                'verbose_name': 'حجز جماعي',
+                'verbose_name_plural': 'الحجوزات الجماعية',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='pages.bookinggroup', verbose_name='المجموعة'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-19 11:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0010_bookinggroup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=50, unique=True, verbose_name='القناة')),
+                ('last_change_id', models.BigIntegerField(default=0, verbose_name='آخر تغيير تمت مزامنته')),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True, verbose_name='آخر مزامنة')),
+                ('ranges_pushed', models.PositiveBigIntegerField(default=0, verbose_name='الفترات المرسلة')),
+                ('last_error', models.TextField(blank=True, verbose_name='آخر خطأ')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+            ],
+            options={
+                'verbose_name': 'حالة مزامنة قناة',
+                'verbose_name_plural': 'حالات مزامنة القنوات',
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='من')),
+                ('end_date', models.DateField(verbose_name='إلى')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_changes', to='pages.room', verbose_name='الغرفة')),
+            ],
+            options={
+                'verbose_name': 'تغيير في المخزون',
+                'verbose_name_plural': 'تغييرات المخزون',
+            },
+        ),
+        migrations.CreateModel(
+            name='ChannelInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=50, verbose_name='القناة')),
+                ('date', models.DateField(verbose_name='التاريخ')),
+                ('available', models.PositiveIntegerField(verbose_name='العدد المتاح')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='السعر')),
+                ('pushed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الإرسال')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_inventory', to='pages.room', verbose_name='الغرفة')),
+            ],
+            options={
+                'verbose_name': 'مخزون قناة',
+                'verbose_name_plural': 'مخزون القنوات',
+                'unique_together': {('channel', 'room', 'date')},
+            },
+        ),
+    ]
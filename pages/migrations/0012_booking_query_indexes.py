@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-19 11:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0011_channel_sync'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='pages_booki_booking_2ec0a6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='room',
+            name='pages_room_flag_918a7d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='room',
+            name='pages_room_price_885b86_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='room',
+            name='pages_room_is_acti_c754ca_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='room',
+            name='pages_room_created_89b4af_idx',
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='room',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='pages.room', verbose_name='الغرفة'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'status', 'arrival_date', 'departure_date'], name='booking_stay_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['booking'], name='payment_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='room_active_created_idx'),
+        ),
+    ]
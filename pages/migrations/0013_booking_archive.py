@@ -0,0 +1,118 @@
+# Generated by Django 5.2 on 2026-10-19 11:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0012_booking_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_name', models.CharField(max_length=100, verbose_name='اسم الغرفة')),
+                ('booking_number', models.CharField(max_length=20, unique=True, verbose_name='رقم الحجز')),
+                ('arrival_date', models.DateField(verbose_name='تاريخ الوصول')),
+                ('departure_date', models.DateField(db_index=True, verbose_name='تاريخ المغادرة')),
+                ('number_of_adults', models.PositiveIntegerField(verbose_name='عدد البالغين')),
+                ('number_of_children', models.PositiveIntegerField(verbose_name='عدد الأطفال')),
+                ('special_requests', models.TextField(blank=True, null=True, verbose_name='طلبات خاصة')),
+                ('first_name', models.CharField(max_length=100, verbose_name='الاسم الأول')),
+                ('last_name', models.CharField(max_length=100, verbose_name='الاسم الأخير')),
+                ('email', models.EmailField(db_index=True, max_length=254, verbose_name='البريد الإلكتروني')),
+                ('phone', models.CharField(max_length=20, verbose_name='رقم الهاتف')),
+                ('status', models.CharField(choices=[('confirmed', 'مؤكد'), ('cancelled', 'ملغي')], max_length=20, verbose_name='الحالة')),
+                ('unit_number', models.CharField(blank=True, max_length=20, verbose_name='رقم الوحدة')),
+                ('total_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='إجمالي السعر')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(verbose_name='تاريخ التحديث')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الأرشفة')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='pages.bookinggroup', verbose_name='المجموعة')),
+                ('nationality', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='pages.nationality', verbose_name='الجنسية')),
+                ('room', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='pages.room', verbose_name='الغرفة')),
+            ],
+            options={
+                'verbose_name': 'حجز مؤرشف',
+                'verbose_name_plural': 'الحجوزات المؤرشفة',
+                'ordering': ['-departure_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient_email', models.EmailField(max_length=254, verbose_name='البريد المستلم')),
+                ('subject', models.CharField(max_length=200, verbose_name='الموضوع')),
+                ('message', models.TextField(verbose_name='الرسالة')),
+                ('is_sent', models.BooleanField(verbose_name='تم الإرسال')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الإرسال')),
+                ('campaign', models.CharField(blank=True, max_length=30, verbose_name='الحملة')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='pages.archivedbooking', verbose_name='الحجز')),
+            ],
+            options={
+                'verbose_name': 'إشعار مؤرشف',
+                'verbose_name_plural': 'الإشعارات المؤرشفة',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='المبلغ')),
+                ('method', models.CharField(choices=[('cash', 'كاش'), ('credit_card', 'بطاقة ائتمان'), ('bank_transfer', 'تحويل بنكي'), ('online', 'دفع إلكتروني')], max_length=20, verbose_name='طريقة الدفع')),
+                ('status', models.CharField(choices=[('pending', 'معلق'), ('completed', 'مكتمل'), ('failed', 'فاشل'), ('refunded', 'مسترد')], max_length=20, verbose_name='الحالة')),
+                ('transaction_id', models.CharField(blank=True, db_index=True, max_length=100, verbose_name='رقم العملية')),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الدفع')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payment', to='pages.archivedbooking', verbose_name='الحجز')),
+            ],
+            options={
+                'verbose_name': 'دفع مؤرشف',
+                'verbose_name_plural': 'المدفوعات المؤرشفة',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPaymentAdjustment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('charge', 'مبلغ إضافي'), ('refund', 'استرداد')], max_length=10, verbose_name='النوع')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='المبلغ')),
+                ('previous_total', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='الإجمالي السابق')),
+                ('new_total', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='الإجمالي الجديد')),
+                ('nights_added', models.PositiveIntegerField(verbose_name='ليالٍ مضافة')),
+                ('nights_removed', models.PositiveIntegerField(verbose_name='ليالٍ ملغاة')),
+                ('reason', models.CharField(blank=True, max_length=200, verbose_name='السبب')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adjustments', to='pages.archivedbooking', verbose_name='الحجز')),
+            ],
+            options={
+                'verbose_name': 'تسوية دفع مؤرشفة',
+                'verbose_name_plural': 'تسويات الدفع المؤرشفة',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedServiceBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_name', models.CharField(max_length=100, verbose_name='اسم الخدمة')),
+                ('quantity', models.PositiveIntegerField(verbose_name='الكمية')),
+                ('booking_date', models.DateTimeField(verbose_name='تاريخ الحجز')),
+                ('scheduled_date', models.DateTimeField(blank=True, null=True, verbose_name='الموعد المحدد')),
+                ('notes', models.TextField(blank=True, verbose_name='ملاحظات')),
+                ('price_at_booking', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='السعر وقت الحجز')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_bookings', to='pages.archivedbooking', verbose_name='الحجز')),
+                ('service', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='pages.service', verbose_name='الخدمة')),
+            ],
+            options={
+                'verbose_name': 'حجز خدمة مؤرشف',
+                'verbose_name_plural': 'حجوزات الخدمات المؤرشفة',
+            },
+        ),
+    ]
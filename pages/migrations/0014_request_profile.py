@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 11:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0013_booking_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=100, unique=True, verbose_name='الملف')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='الصفحة')),
+                ('method', models.CharField(max_length=10, verbose_name='الطريقة')),
+                ('path', models.CharField(max_length=500, verbose_name='المسار')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='رمز الاستجابة')),
+                ('duration_ms', models.FloatField(verbose_name='المدة (ms)')),
+                ('samples', models.PositiveIntegerField(verbose_name='عدد العينات')),
+                ('trigger', models.CharField(choices=[('token', 'طلب موقع'), ('sample', 'عينة عشوائية')], max_length=10, verbose_name='السبب')),
+                ('recorded_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='تاريخ التسجيل')),
+            ],
+            options={
+                'verbose_name': 'ملف أداء طلب',
+                'verbose_name_plural': 'ملفات أداء الطلبات',
+                'ordering': ['-recorded_at'],
+            },
+        ),
+    ]
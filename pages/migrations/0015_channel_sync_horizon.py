@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0014_request_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channelsyncstate',
+            name='horizon_date',
+            field=models.DateField(blank=True, null=True, verbose_name='نهاية الأفق المرسل'),
+        ),
+    ]
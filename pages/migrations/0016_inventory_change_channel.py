@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+def drop_shared_feed(apps, schema_editor):
+    # التغييرات القديمة بلا قناة؛ مزامنة كاملة لكل قناة تغني عنها
+    apps.get_model('pages', 'InventoryChange').objects.filter(channel='').delete()
+    apps.get_model('pages', 'ChannelSyncState').objects.update(last_synced_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0015_channel_sync_horizon'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorychange',
+            name='channel',
+            field=models.CharField(default='', max_length=50, verbose_name='القناة'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(drop_shared_feed, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='channelsyncstate',
+            name='last_change_id',
+        ),
+        migrations.AddIndex(
+            model_name='inventorychange',
+            index=models.Index(fields=['channel', 'id'], name='pages_inven_channel_4c21b6_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0016_inventory_change_channel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivednotification',
+            name='error',
+            field=models.TextField(blank=True, verbose_name='خطأ الإرسال'),
+        ),
+        migrations.AddField(
+            model_name='campaigncheckpoint',
+            name='failed_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='عدد الرسائل المرفوضة'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='error',
+            field=models.TextField(blank=True, verbose_name='خطأ الإرسال'),
+        ),
+    ]
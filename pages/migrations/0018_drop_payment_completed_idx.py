@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-19 12:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0017_campaign_send_errors'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_completed_idx',
+        ),
+    ]
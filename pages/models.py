@@ -36,6 +36,24 @@ class PaymentMethod(models.TextChoices):
     ONLINE = 'online', _('دفع إلكتروني')
 
 
+class BookingStatus(models.TextChoices):
+    CONFIRMED = 'confirmed', _('مؤكد')
+    CANCELLED = 'cancelled', _('ملغي')
+
+
+class AdjustmentKind(models.TextChoices):
+    CHARGE = 'charge', _('مبلغ إضافي')
+    REFUND = 'refund', _('استرداد')
+
+
+class WaitlistStatus(models.TextChoices):
+    WAITING = 'waiting', _('في الانتظار')
+    OFFERED = 'offered', _('تم إرسال عرض')
+    BOOKED = 'booked', _('تم الحجز')
+    EXPIRED = 'expired', _('انتهى العرض')
+    CANCELLED = 'cancelled', _('ملغي')
+
+
 # ============ MODELS ============
 class Room(models.Model):
     name = models.CharField(_('الاسم'), max_length=100, unique=True)
@@ -68,9 +86,10 @@ class Room(models.Model):
         verbose_name_plural = _('الغرف')
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['flag']),
-            models.Index(fields=['price']),
-            models.Index(fields=['is_active']),
+            # الصفحات العامة لا تعرض إلا الغرف النشطة؛ مؤشر الصفحات في pages/api.py
+            models.Index(
+                fields=['created_at', 'id'], condition=models.Q(is_active=True), name='room_active_created_idx'
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -94,6 +113,27 @@ class Room(models.Model):
         return max(0, self.total_rooms - booked)
 
 
+class RoomUnit(models.Model):
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='units',
+        verbose_name=_('نوع الغرفة')
+    )
+    number = models.CharField(_('رقم الغرفة'), max_length=20)
+    floor = models.SmallIntegerField(_('الطابق'), null=True, blank=True)
+    is_active = models.BooleanField(_('نشطة'), default=True)
+
+    class Meta:
+        verbose_name = _('وحدة غرفة')
+        verbose_name_plural = _('وحدات الغرف')
+        ordering = ['room', 'number']
+        unique_together = ('room', 'number')
+
+    def __str__(self):
+        return f"{self.number} - {self.room.name}"
+
+
 class RoomImage(models.Model):
     room = models.ForeignKey(
         Room,
@@ -189,12 +229,34 @@ class Nationality(models.Model):
         return self.name
 
 
+class BookingGroup(models.Model):
+    reference = models.CharField(_('رقم المجموعة'), max_length=20, unique=True)
+    company = models.CharField(_('الشركة'), max_length=200, blank=True)
+    first_name = models.CharField(_("الاسم الأول"), max_length=100)
+    last_name = models.CharField(_("الاسم الأخير"), max_length=100)
+    email = models.EmailField(_("البريد الإلكتروني"))
+    phone = models.CharField(_("رقم الهاتف"), max_length=20)
+    arrival_date = models.DateField(_("تاريخ الوصول"))
+    departure_date = models.DateField(_("تاريخ المغادرة"))
+    total_price = models.DecimalField(_('إجمالي السعر'), max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('حجز جماعي')
+        verbose_name_plural = _('الحجوزات الجماعية')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.reference} - {self.company or f'{self.first_name} {self.last_name}'}"
+
+
 class Booking(models.Model):
     room = models.ForeignKey(
         Room,
         on_delete=models.CASCADE,
         related_name="bookings",
-        verbose_name=_("الغرفة")
+        verbose_name=_("الغرفة"),
+        db_index=False
     )
     booking_number = models.CharField(_('رقم الحجز'), max_length=20, unique=True, blank=True)
     
@@ -216,7 +278,23 @@ class Booking(models.Model):
         blank=True,
         null=True
     )
-    status = models.CharField(_('الحالة'), max_length=20, default='confirmed')
+    status = models.CharField(_('الحالة'), max_length=20, choices=BookingStatus.choices, default=BookingStatus.CONFIRMED)
+    group = models.ForeignKey(
+        BookingGroup,
+        on_delete=models.SET_NULL,
+        related_name='bookings',
+        verbose_name=_('المجموعة'),
+        blank=True,
+        null=True
+    )
+    unit = models.ForeignKey(
+        RoomUnit,
+        on_delete=models.SET_NULL,
+        related_name='bookings',
+        verbose_name=_('الوحدة'),
+        blank=True,
+        null=True
+    )
     total_price = models.DecimalField(_('إجمالي السعر'), max_digits=12, decimal_places=2, null=True, blank=True)
     
     created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
@@ -227,7 +305,8 @@ class Booking(models.Model):
         verbose_name_plural = _("الحجوزات")
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=['booking_number']),
+            # فحص التداخل: الغرفة والحالة بالمساواة ثم نطاق التواريخ (يغني عن مؤشر room_id وحده)
+            models.Index(fields=['room', 'status', 'arrival_date', 'departure_date'], name='booking_stay_idx'),
             models.Index(fields=['arrival_date', 'departure_date']),
             models.Index(fields=['email']),
         ]
@@ -235,16 +314,29 @@ class Booking(models.Model):
     def __str__(self):
         return f"{self.booking_number or self.id} - {self.first_name} {self.last_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # القيم كما حُمّلت، لمعرفة الليالي التي تحررت عند الإلغاء أو تغيير التواريخ (pages/signals.py)
+        instance._loaded_stay = (
+            instance.__dict__.get('room_id'),
+            instance.__dict__.get('status'),
+            instance.__dict__.get('arrival_date'),
+            instance.__dict__.get('departure_date'),
+        )
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.booking_number:
             self.booking_number = self.generate_booking_number()
-        if not self.total_price:
+        if self.total_price is None:
             nights = (self.departure_date - self.arrival_date).days
             self.total_price = self.room.price * nights
         
         super().save(*args, **kwargs)
 
-    def generate_booking_number(self):
+    @staticmethod
+    def generate_booking_number():
         import random
         import string
         prefix = "BK"
@@ -259,15 +351,9 @@ class Booking(models.Model):
             raise ValidationError(_('تاريخ الوصول لا يمكن أن يكون في الماضي'))
         
         if not self.pk:  
-            overlapping = Booking.objects.filter(
-                room=self.room,
-                status='confirmed',
-                arrival_date__lt=self.departure_date,
-                departure_date__gt=self.arrival_date
-            ).count()
-            
-            if overlapping >= self.room.total_rooms:
-                raise ValidationError(_('لا توجد غرف متاحة في هذه الفترة'))
+            # نفس قاعدة التعديل: سعة الليلة من تقويم التوافر إن وجد، والحجوزات وعروض الانتظار السارية تُخصم منها
+            from .modifications import check_nights, stay_nights
+            check_nights(self.room, sorted(stay_nights(self.arrival_date, self.departure_date)))
 
     @property
     def number_of_nights(self):
@@ -335,6 +421,39 @@ class Payment(models.Model):
         super().save(*args, **kwargs)
 
 
+class PaymentAdjustment(models.Model):
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name='adjustments',
+        verbose_name=_('الحجز')
+    )
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='adjustments',
+        verbose_name=_('الدفع')
+    )
+    kind = models.CharField(_('النوع'), max_length=10, choices=AdjustmentKind.choices)
+    amount = models.DecimalField(_('المبلغ'), max_digits=12, decimal_places=2)
+    previous_total = models.DecimalField(_('الإجمالي السابق'), max_digits=12, decimal_places=2)
+    new_total = models.DecimalField(_('الإجمالي الجديد'), max_digits=12, decimal_places=2)
+    nights_added = models.PositiveIntegerField(_('ليالٍ مضافة'), default=0)
+    nights_removed = models.PositiveIntegerField(_('ليالٍ ملغاة'), default=0)
+    reason = models.CharField(_('السبب'), max_length=200, blank=True)
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('تسوية دفع')
+        verbose_name_plural = _('تسويات الدفع')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.booking.booking_number} - {self.get_kind_display()} {self.amount}"
+
+
 class RoomAvailability(models.Model):
     room = models.ForeignKey(
         Room,
@@ -428,12 +547,386 @@ class Notification(models.Model):
     message = models.TextField(_('الرسالة'))
     is_sent = models.BooleanField(_('تم الإرسال'), default=False)
     sent_at = models.DateTimeField(_('تاريخ الإرسال'), null=True, blank=True)
+    # رفض الخادم لهذه الرسالة تحديداً (عنوان مرفوض مثلاً)؛ لا يعاد إرسالها
+    error = models.TextField(_('خطأ الإرسال'), blank=True)
+    campaign = models.CharField(_('الحملة'), max_length=30, blank=True)
     created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
 
     class Meta:
         verbose_name = _('إشعار')
         verbose_name_plural = _('الإشعارات')
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['booking', 'campaign'],
+                condition=~models.Q(campaign=''),
+                name='unique_campaign_notification',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} - {self.recipient_email}"
+
+
+class PaymentWebhookEvent(models.Model):
+    event_id = models.CharField(_('معرف الحدث'), max_length=100, unique=True)
+    transaction_id = models.CharField(_('رقم العملية'), max_length=100, blank=True)
+    booking_number = models.CharField(_('رقم الحجز'), max_length=20, blank=True)
+    status = models.CharField(_('الحالة'), max_length=20, choices=PaymentStatus.choices)
+    applied = models.BooleanField(_('تم التطبيق'), default=False)
+    received_at = models.DateTimeField(_('تاريخ الاستلام'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('حدث بوابة الدفع')
+        verbose_name_plural = _('أحداث بوابة الدفع')
+        ordering = ['-received_at']
+
+    def __str__(self):
+        return f"{self.event_id} - {self.get_status_display()}"
+
+
+class CampaignCheckpoint(models.Model):
+    campaign = models.CharField(_('الحملة'), max_length=30)
+    target_date = models.DateField(_('التاريخ المستهدف'))
+    last_booking_id = models.BigIntegerField(_('آخر حجز تمت معالجته'), default=0)
+    sent_count = models.PositiveIntegerField(_('عدد الرسائل المرسلة'), default=0)
+    failed_count = models.PositiveIntegerField(_('عدد الرسائل المرفوضة'), default=0)
+    completed_at = models.DateTimeField(_('تاريخ الاكتمال'), null=True, blank=True)
+    updated_at = models.DateTimeField(_('تاريخ التحديث'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('نقطة استئناف حملة')
+        verbose_name_plural = _('نقاط استئناف الحملات')
+        unique_together = ('campaign', 'target_date')
+
+    def __str__(self):
+        return f"{self.campaign} - {self.target_date}"
+
+
+class SlowQuery(models.Model):
+    # مخزن دائري: كل تسجيل جديد يكتب فوق أقدم خانة بدلاً من إضافة صف
+    slot = models.PositiveIntegerField(_('الخانة'), unique=True)
+    fingerprint = models.CharField(_('بصمة الاستعلام'), max_length=40, db_index=True)
+    statement = models.TextField(_('شكل الاستعلام'))
+    sql = models.TextField(_('الاستعلام'))
+    params = models.TextField(_('المعاملات'), blank=True)
+    duration_ms = models.FloatField(_('المدة (ms)'))
+    view = models.CharField(_('الصفحة'), max_length=200, blank=True)
+    caller = models.CharField(_('الدالة المستدعية'), max_length=300, blank=True)
+    plan = models.TextField(_('خطة التنفيذ'), blank=True)
+    recorded_at = models.DateTimeField(_('تاريخ التسجيل'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('استعلام بطيء')
+        verbose_name_plural = _('الاستعلامات البطيئة')
+        ordering = ['-recorded_at']
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f}ms - {self.view or self.caller}"
+
+
+class RequestProfile(models.Model):
+    # الملف نفسه في PROFILE_DIR؛ الصف يصفه ويحذف معه عند تجاوز PROFILE_MAX_FILES
+    filename = models.CharField(_('الملف'), max_length=100, unique=True)
+    view = models.CharField(_('الصفحة'), max_length=200, blank=True)
+    method = models.CharField(_('الطريقة'), max_length=10)
+    path = models.CharField(_('المسار'), max_length=500)
+    status_code = models.PositiveSmallIntegerField(_('رمز الاستجابة'))
+    duration_ms = models.FloatField(_('المدة (ms)'))
+    samples = models.PositiveIntegerField(_('عدد العينات'))
+    trigger = models.CharField(_('السبب'), max_length=10, choices=[
+        ('token', _('طلب موقع')),
+        ('sample', _('عينة عشوائية')),
+    ])
+    recorded_at = models.DateTimeField(_('تاريخ التسجيل'), default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = _('ملف أداء طلب')
+        verbose_name_plural = _('ملفات أداء الطلبات')
+        ordering = ['-recorded_at']
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f}ms - {self.view or self.path}"
+
+
+class WaitlistQuerySet(models.QuerySet):
+    def held(self):
+        """Offers still inside their time limit; they keep a room out of sale."""
+        return self.filter(status=WaitlistStatus.OFFERED, offer_expires_at__gt=timezone.now())
+
+
+class WaitlistEntry(models.Model):
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='waitlist',
+        verbose_name=_('الغرفة')
+    )
+    arrival_date = models.DateField(_("تاريخ الوصول"))
+    departure_date = models.DateField(_("تاريخ المغادرة"))
+    number_of_adults = models.PositiveIntegerField(_("عدد البالغين"), default=1)
+    number_of_children = models.PositiveIntegerField(_("عدد الأطفال"), default=0)
+    first_name = models.CharField(_("الاسم الأول"), max_length=100)
+    last_name = models.CharField(_("الاسم الأخير"), max_length=100)
+    email = models.EmailField(_("البريد الإلكتروني"))
+    phone = models.CharField(_("رقم الهاتف"), max_length=20)
+
+    status = models.CharField(_('الحالة'), max_length=20, choices=WaitlistStatus.choices, default=WaitlistStatus.WAITING)
+    offer_token = models.CharField(_('رمز العرض'), max_length=64, unique=True, null=True, blank=True)
+    offered_at = models.DateTimeField(_('تاريخ العرض'), null=True, blank=True)
+    offer_expires_at = models.DateTimeField(_('انتهاء العرض'), null=True, blank=True)
+    booking = models.OneToOneField(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry',
+        verbose_name=_('الحجز')
+    )
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
+
+    objects = WaitlistQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('طلب انتظار')
+        verbose_name_plural = _('قائمة الانتظار')
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['room', 'status', 'arrival_date']),
+            models.Index(fields=['status', 'offer_expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} - {self.room} ({self.arrival_date} → {self.departure_date})"
+
+    def clean(self):
+        if self.departure_date <= self.arrival_date:
+            raise ValidationError(_('تاريخ المغادرة يجب أن يكون بعد تاريخ الوصول'))
+        if self.arrival_date < timezone.now().date():
+            raise ValidationError(_('تاريخ الوصول لا يمكن أن يكون في الماضي'))
+
+    @property
+    def offer_is_open(self):
+        return (
+            self.status == WaitlistStatus.OFFERED
+            and self.offer_expires_at is not None
+            and self.offer_expires_at > timezone.now()
+        )
+
+
+class InventoryChange(models.Model):
+    # سجل إلحاقي بالليالي التي تغير توافرها أو سعرها، صف لكل قناة؛ تحذف المزامنة ما قرأته فقط
+    channel = models.CharField(_('القناة'), max_length=50)
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='inventory_changes',
+        verbose_name=_('الغرفة')
+    )
+    start_date = models.DateField(_('من'))
+    end_date = models.DateField(_('إلى'))
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('تغيير في المخزون')
+        verbose_name_plural = _('تغييرات المخزون')
+        indexes = [models.Index(fields=['channel', 'id'])]
+
+    def __str__(self):
+        return f"{self.room_id}: {self.start_date} → {self.end_date}"
+
+
+class ChannelInventory(models.Model):
+    """What a channel was last sent for one room and night."""
+    channel = models.CharField(_('القناة'), max_length=50)
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='channel_inventory',
+        verbose_name=_('الغرفة')
+    )
+    date = models.DateField(_('التاريخ'))
+    available = models.PositiveIntegerField(_('العدد المتاح'))
+    price = models.DecimalField(_('السعر'), max_digits=10, decimal_places=2)
+    pushed_at = models.DateTimeField(_('تاريخ الإرسال'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('مخزون قناة')
+        verbose_name_plural = _('مخزون القنوات')
+        unique_together = ('channel', 'room', 'date')
+
+    def __str__(self):
+        return f"{self.channel} - {self.room_id} - {self.date}"
+
+
+class ChannelSyncState(models.Model):
+    channel = models.CharField(_('القناة'), max_length=50, unique=True)
+    last_synced_at = models.DateTimeField(_('آخر مزامنة'), null=True, blank=True)
+    # آخر ليلة غطتها المزامنة (غير شاملة)؛ الليالي التي تدخل الأفق بعدها ترسل في المزامنة التالية
+    horizon_date = models.DateField(_('نهاية الأفق المرسل'), null=True, blank=True)
+    ranges_pushed = models.PositiveBigIntegerField(_('الفترات المرسلة'), default=0)
+    last_error = models.TextField(_('آخر خطأ'), blank=True)
+    updated_at = models.DateTimeField(_('تاريخ التحديث'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('حالة مزامنة قناة')
+        verbose_name_plural = _('حالات مزامنة القنوات')
+
+    def __str__(self):
+        return self.channel
+
+
+# ============ ARCHIVE ============
+# حجوزات غادرت منذ أشهر مع سجلاتها التابعة، بنفس المعرفات الأصلية (pages/archive.py)
+class ArchivedBooking(models.Model):
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='archived_bookings',
+        verbose_name=_('الغرفة')
+    )
+    room_name = models.CharField(_('اسم الغرفة'), max_length=100)
+    booking_number = models.CharField(_('رقم الحجز'), max_length=20, unique=True)
+    arrival_date = models.DateField(_("تاريخ الوصول"))
+    departure_date = models.DateField(_("تاريخ المغادرة"), db_index=True)
+    number_of_adults = models.PositiveIntegerField(_("عدد البالغين"))
+    number_of_children = models.PositiveIntegerField(_("عدد الأطفال"))
+    special_requests = models.TextField(_("طلبات خاصة"), blank=True, null=True)
+    first_name = models.CharField(_("الاسم الأول"), max_length=100)
+    last_name = models.CharField(_("الاسم الأخير"), max_length=100)
+    email = models.EmailField(_("البريد الإلكتروني"), db_index=True)
+    phone = models.CharField(_("رقم الهاتف"), max_length=20)
+    nationality = models.ForeignKey(
+        Nationality,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_bookings',
+        verbose_name=_("الجنسية")
+    )
+    status = models.CharField(_('الحالة'), max_length=20, choices=BookingStatus.choices)
+    group = models.ForeignKey(
+        BookingGroup,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_bookings',
+        verbose_name=_('المجموعة')
+    )
+    unit_number = models.CharField(_('رقم الوحدة'), max_length=20, blank=True)
+    total_price = models.DecimalField(_('إجمالي السعر'), max_digits=12, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'))
+    updated_at = models.DateTimeField(_('تاريخ التحديث'))
+    archived_at = models.DateTimeField(_('تاريخ الأرشفة'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("حجز مؤرشف")
+        verbose_name_plural = _("الحجوزات المؤرشفة")
+        ordering = ["-departure_date"]
+
+    def __str__(self):
+        return f"{self.booking_number} - {self.first_name} {self.last_name}"
+
+    @property
+    def number_of_nights(self):
+        return (self.departure_date - self.arrival_date).days
+
+
+class ArchivedPayment(models.Model):
+    booking = models.OneToOneField(
+        ArchivedBooking,
+        on_delete=models.CASCADE,
+        related_name='payment',
+        verbose_name=_('الحجز')
+    )
+    amount = models.DecimalField(_('المبلغ'), max_digits=12, decimal_places=2)
+    method = models.CharField(_('طريقة الدفع'), max_length=20, choices=PaymentMethod.choices)
+    status = models.CharField(_('الحالة'), max_length=20, choices=PaymentStatus.choices)
+    transaction_id = models.CharField(_('رقم العملية'), max_length=100, blank=True, db_index=True)
+    paid_at = models.DateTimeField(_('تاريخ الدفع'), null=True, blank=True)
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'))
+
+    class Meta:
+        verbose_name = _('دفع مؤرشف')
+        verbose_name_plural = _('المدفوعات المؤرشفة')
+
+    def __str__(self):
+        return f"{self.booking_id} - {self.get_status_display()}"
+
+
+class ArchivedPaymentAdjustment(models.Model):
+    booking = models.ForeignKey(
+        ArchivedBooking,
+        on_delete=models.CASCADE,
+        related_name='adjustments',
+        verbose_name=_('الحجز')
+    )
+    kind = models.CharField(_('النوع'), max_length=10, choices=AdjustmentKind.choices)
+    amount = models.DecimalField(_('المبلغ'), max_digits=12, decimal_places=2)
+    previous_total = models.DecimalField(_('الإجمالي السابق'), max_digits=12, decimal_places=2)
+    new_total = models.DecimalField(_('الإجمالي الجديد'), max_digits=12, decimal_places=2)
+    nights_added = models.PositiveIntegerField(_('ليالٍ مضافة'))
+    nights_removed = models.PositiveIntegerField(_('ليالٍ ملغاة'))
+    reason = models.CharField(_('السبب'), max_length=200, blank=True)
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'))
+
+    class Meta:
+        verbose_name = _('تسوية دفع مؤرشفة')
+        verbose_name_plural = _('تسويات الدفع المؤرشفة')
+
+    def __str__(self):
+        return f"{self.booking_id} - {self.get_kind_display()} {self.amount}"
+
+
+class ArchivedServiceBooking(models.Model):
+    booking = models.ForeignKey(
+        ArchivedBooking,
+        on_delete=models.CASCADE,
+        related_name='service_bookings',
+        verbose_name=_('الحجز')
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='archived_bookings',
+        verbose_name=_('الخدمة')
+    )
+    service_name = models.CharField(_('اسم الخدمة'), max_length=100)
+    quantity = models.PositiveIntegerField(_('الكمية'))
+    booking_date = models.DateTimeField(_('تاريخ الحجز'))
+    scheduled_date = models.DateTimeField(_('الموعد المحدد'), null=True, blank=True)
+    notes = models.TextField(_('ملاحظات'), blank=True)
+    price_at_booking = models.DecimalField(_('السعر وقت الحجز'), max_digits=10, decimal_places=2)
+
+    class Meta:
+        verbose_name = _('حجز خدمة مؤرشف')
+        verbose_name_plural = _('حجوزات الخدمات المؤرشفة')
+
+    def __str__(self):
+        return f"{self.service_name} - {self.booking_id}"
+
+
+class ArchivedNotification(models.Model):
+    booking = models.ForeignKey(
+        ArchivedBooking,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name=_('الحجز')
+    )
+    recipient_email = models.EmailField(_('البريد المستلم'))
+    subject = models.CharField(_('الموضوع'), max_length=200)
+    message = models.TextField(_('الرسالة'))
+    is_sent = models.BooleanField(_('تم الإرسال'))
+    sent_at = models.DateTimeField(_('تاريخ الإرسال'), null=True, blank=True)
+    error = models.TextField(_('خطأ الإرسال'), blank=True)
+    campaign = models.CharField(_('الحملة'), max_length=30, blank=True)
+    created_at = models.DateTimeField(_('تاريخ الإنشاء'))
+
+    class Meta:
+        verbose_name = _('إشعار مؤرشف')
+        verbose_name_plural = _('الإشعارات المؤرشفة')
 
     def __str__(self):
-        return f"{self.subject} - {self.recipient_email}"
\ No newline at end of file
+        return f"{self.subject} - {self.recipient_email}"
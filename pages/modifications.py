@@ -0,0 +1,207 @@
+"""
+Changing and cancelling confirmed bookings.
+
+A change is worked out night by night. Nights the guest keeps keep the
+price they were quoted. Only the added nights are priced (from
+``RoomAvailability.price_override`` or the room rate) and checked for
+availability. Removed nights are credited at the stay's average nightly
+rate. Moving to another room counts every night as removed from the old
+room and added to the new one.
+
+``modify_booking`` writes the booking, its payment amount and a
+``PaymentAdjustment`` for the difference in one transaction.
+"""
+import datetime
+from collections import Counter
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import (
+    AdjustmentKind, Booking, BookingStatus, Payment, PaymentAdjustment, Room, RoomAvailability, WaitlistEntry,
+)
+
+CENT = Decimal('0.01')
+ONE_NIGHT = datetime.timedelta(days=1)
+STAY_FIELDS = ('room', 'arrival_date', 'departure_date', 'number_of_adults', 'number_of_children', 'status')
+
+
+def stay_nights(arrival, departure):
+    return {arrival + ONE_NIGHT * offset for offset in range((departure - arrival).days)}
+
+
+@dataclass
+class Modification:
+    booking: Booking
+    added: list
+    removed: list
+    previous_total: Decimal
+    new_total: Decimal
+    adjustment: PaymentAdjustment = None
+
+    @property
+    def difference(self):
+        return self.new_total - self.previous_total
+
+
+def _calendar(room, dates):
+    """``{date: (available_count, price_override)}`` for the dates that have a ``RoomAvailability`` row."""
+    return {
+        date: (count, price)
+        for date, count, price in RoomAvailability.objects
+        .filter(room=room, date__in=dates)
+        .values_list('date', 'available_count', 'price_override')
+    }
+
+
+def free_rooms(room, nights, calendar=None, exclude=None):
+    """
+    ``{night: rooms still free}`` for every night in ``nights`` (sorted).
+
+    A night's capacity is its ``RoomAvailability.available_count`` when
+    the calendar has a row for it, otherwise ``room.total_rooms``. Only
+    stays overlapping the nights are read. Other confirmed bookings (all
+    but ``exclude``) and open waitlist offers count against the capacity.
+    """
+    if calendar is None:
+        calendar = _calendar(room, nights)
+    first, last = nights[0], nights[-1] + ONE_NIGHT
+    wanted = set(nights)
+    taken = Counter()
+    stays = (
+        Booking.objects
+        .filter(room=room, status=BookingStatus.CONFIRMED, arrival_date__lt=last, departure_date__gt=first)
+        .exclude(pk=exclude),
+        WaitlistEntry.objects.held().filter(room=room, arrival_date__lt=last, departure_date__gt=first),
+    )
+    for queryset in stays:
+        for arrival, departure in queryset.values_list('arrival_date', 'departure_date'):
+            taken.update(wanted & stay_nights(max(arrival, first), min(departure, last)))
+    return {
+        night: (calendar[night][0] if night in calendar else room.total_rooms) - taken[night]
+        for night in nights
+    }
+
+
+def check_nights(room, added, calendar=None, exclude=None):
+    """
+    Raise ``ValidationError`` unless every night in ``added`` (sorted) still has a room.
+
+    Capacity is counted by ``free_rooms``. ``Booking.clean`` applies the
+    same rule to new bookings and ``waitlist.rematch`` to offers.
+    """
+    free = free_rooms(room, added, calendar, exclude)
+    for night in added:
+        if free[night] <= 0:
+            raise ValidationError(
+                _('لا توجد غرف متاحة ليلة %(date)s'), code='sold_out', params={'date': night}
+            )
+
+
+def plan_modification(booking, *, room=None, arrival_date=None, departure_date=None,
+                      number_of_adults=None, number_of_children=None, cancel=False):
+    """
+    Validate a change to ``booking`` and return ``(added, removed, new_total)`` without writing anything.
+
+    Arguments left as ``None`` keep the booking's current value.
+    """
+    if booking.status != BookingStatus.CONFIRMED:
+        raise ValidationError(_('لا يمكن تعديل حجز ملغي'), code='cancelled')
+
+    old_nights = stay_nights(booking.arrival_date, booking.departure_date)
+    previous_total = booking.total_price or Decimal('0')
+
+    if cancel:
+        return [], sorted(old_nights), Decimal('0.00')
+
+    room = room or booking.room
+    arrival_date = arrival_date or booking.arrival_date
+    departure_date = departure_date or booking.departure_date
+    adults = booking.number_of_adults if number_of_adults is None else number_of_adults
+    children = booking.number_of_children if number_of_children is None else number_of_children
+
+    if departure_date <= arrival_date:
+        raise ValidationError(_('تاريخ المغادرة يجب أن يكون بعد تاريخ الوصول'))
+    if arrival_date != booking.arrival_date and arrival_date < timezone.localdate():
+        raise ValidationError(_('تاريخ الوصول لا يمكن أن يكون في الماضي'))
+    if adults + children > room.capacity:
+        raise ValidationError(
+            _('عدد الضيوف أكبر من سعة الغرفة (%(capacity)s)'), code='capacity', params={'capacity': room.capacity}
+        )
+
+    new_nights = stay_nights(arrival_date, departure_date)
+    if room.pk == booking.room_id:
+        added, removed = sorted(new_nights - old_nights), sorted(old_nights - new_nights)
+    else:
+        added, removed = sorted(new_nights), sorted(old_nights)
+
+    added_price = Decimal('0')
+    if added:
+        calendar = _calendar(room, added)
+        check_nights(room, added, calendar, exclude=booking.pk)
+        for night in added:
+            override = calendar.get(night, (None, None))[1]
+            added_price += room.price if override is None else override
+
+    kept = len(old_nights) - len(removed)
+    kept_price = previous_total * kept / len(old_nights) if old_nights else Decimal('0')
+    return added, removed, (kept_price + added_price).quantize(CENT)
+
+
+def modify_booking(booking_id, *, reason='', **changes):
+    """
+    Apply a change (see ``plan_modification``) to a confirmed booking and settle the payment.
+
+    The room the stay ends up in and the booking row are locked for the
+    duration, and the availability check runs inside the same transaction
+    as the writes.
+    """
+    with transaction.atomic():
+        # قفل الغرفة قبل الحجز، بنفس ترتيب الحجز الجماعي وقائمة الانتظار، فلا يأخذ تعديلان آخر وحدة معاً
+        target = changes.get('room')
+        room_id = target.pk if target else Booking.objects.values_list('room_id', flat=True).get(pk=booking_id)
+        list(Room.objects.select_for_update().filter(pk=room_id))
+        booking = Booking.objects.select_for_update().select_related('room').get(pk=booking_id)
+        if target is None and booking.room_id != room_id:
+            list(Room.objects.select_for_update().filter(pk=booking.room_id))
+        previous_total = booking.total_price or Decimal('0')
+        added, removed, new_total = plan_modification(booking, **changes)
+
+        if changes.get('cancel'):
+            booking.status = BookingStatus.CANCELLED
+        else:
+            for field in ('room', 'arrival_date', 'departure_date', 'number_of_adults', 'number_of_children'):
+                if changes.get(field) is not None:
+                    setattr(booking, field, changes[field])
+        booking.total_price = new_total
+        booking.save(update_fields=[*STAY_FIELDS, 'total_price', 'updated_at'])
+
+        payment = Payment.objects.select_for_update().filter(booking=booking).first()
+        if payment is not None and payment.amount != new_total:
+            payment.amount = new_total
+            payment.save(update_fields=['amount'])
+
+        adjustment = None
+        difference = new_total - previous_total
+        if difference:
+            adjustment = PaymentAdjustment.objects.create(
+                booking=booking,
+                payment=payment,
+                kind=AdjustmentKind.CHARGE if difference > 0 else AdjustmentKind.REFUND,
+                amount=abs(difference),
+                previous_total=previous_total,
+                new_total=new_total,
+                nights_added=len(added),
+                nights_removed=len(removed),
+                reason=reason[:200],
+            )
+
+    return Modification(booking, added, removed, previous_total, new_total, adjustment)
+
+
+def cancel_booking(booking_id, reason=''):
+    return modify_booking(booking_id, cancel=True, reason=reason)
@@ -0,0 +1,218 @@
+"""
+In-process occupancy calendar.
+
+Each worker keeps, per room, the units still free on every night of a
+rolling window (``OCCUPANCY_HORIZON_DAYS`` from today) in an ``array``.
+"How many units are free between these dates" is the minimum over a
+slice of it, a C loop over at most a few hundred ints, so the search API
+and the booking wizard answer without a query.
+
+Bookings saved in this process adjust the counts once they commit.
+Calendar rows, room settings and waitlist holds mark the room stale, and
+it is reloaded on its next query. A background thread reloads everything
+every ``OCCUPANCY_RECONCILE_SECONDS`` to pick up writes from other
+workers. Answers are therefore advisory. Checks that must be exact
+(``Booking.clean``, ``modify_booking``) still read the database.
+"""
+import datetime
+import logging
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Booking, BookingStatus, Room, RoomAvailability, WaitlistEntry
+
+logger = logging.getLogger(__name__)
+
+
+class RoomCalendar:
+    """Free units of one room for each night from ``origin`` (a date ordinal)."""
+
+    __slots__ = ('origin', 'free')
+
+    def __init__(self, origin, free):
+        self.origin = origin
+        self.free = free
+
+    def free_units(self, arrival, departure):
+        """Units free on every night of ``[arrival, departure)``, or ``None`` outside the window."""
+        start, end = arrival.toordinal() - self.origin, departure.toordinal() - self.origin
+        if start < 0 or end > len(self.free) or start >= end:
+            return None
+        return min(self.free[start:end])
+
+    def book(self, arrival, departure, units):
+        start = max(arrival.toordinal() - self.origin, 0)
+        end = min(departure.toordinal() - self.origin, len(self.free))
+        for night in range(start, end):
+            self.free[night] -= units
+
+
+def load_calendars(start, days, room_ids=None):
+    """
+    ``{room_id: RoomCalendar}`` for ``[start, start + days)``, from four queries.
+
+    Capacity is the night's ``RoomAvailability.available_count`` when the
+    calendar has a row, else ``total_rooms``; inactive rooms have none.
+    Confirmed bookings and open waitlist offers are taken off it.
+    """
+    origin, end = start.toordinal(), start + datetime.timedelta(days=days)
+    rooms = Room.objects.all()
+    if room_ids is not None:
+        rooms = rooms.filter(pk__in=room_ids)
+    free, active = {}, set()
+    for room_id, total_rooms, is_active in rooms.values_list('pk', 'total_rooms', 'is_active'):
+        free[room_id] = array('i', [total_rooms if is_active else 0]) * days
+        if is_active:
+            active.add(room_id)
+
+    for room_id, date, count in (
+        RoomAvailability.objects
+        .filter(room_id__in=active, date__gte=start, date__lt=end)
+        .values_list('room_id', 'date', 'available_count')
+    ):
+        free[room_id][date.toordinal() - origin] = count
+
+    # فرق تراكمي لكل غرفة: +1 عند الوصول و-1 عند المغادرة ثم مجموع جارٍ واحد
+    changes = {room_id: array('i', [0]) * (days + 1) for room_id in active}
+    stays = (
+        Booking.objects.filter(
+            room_id__in=active, status=BookingStatus.CONFIRMED, arrival_date__lt=end, departure_date__gt=start,
+        ),
+        WaitlistEntry.objects.held().filter(room_id__in=active, arrival_date__lt=end, departure_date__gt=start),
+    )
+    for queryset in stays:
+        for room_id, arrival, departure in queryset.values_list('room_id', 'arrival_date', 'departure_date'):
+            changes[room_id][max(arrival.toordinal() - origin, 0)] += 1
+            changes[room_id][min(departure.toordinal() - origin, days)] -= 1
+
+    for room_id, room_changes in changes.items():
+        room_free, taken = free[room_id], 0
+        for night in range(days):
+            taken += room_changes[night]
+            room_free[night] -= taken
+    return {room_id: RoomCalendar(origin, room_free) for room_id, room_free in free.items()}
+
+
+class OccupancyService:
+    """
+    Owns the calendars of every room.
+
+    A daemon thread rebuilds them every ``reconcile_seconds``; the first
+    query, a new day and stale rooms are loaded inline. Loads build new
+    calendars and swap them in, one at a time: requests that find the
+    window expired wait for a single reload instead of each running one.
+    """
+
+    def __init__(self, horizon_days, reconcile_seconds):
+        self.horizon_days = horizon_days
+        self.reconcile_seconds = reconcile_seconds
+        self.calendars = None
+        self.origin = None
+        self.loaded_at = 0.0
+        self.expires_at = 0.0
+        self._stale = set()
+        self._lock = threading.Lock()
+        self._reload_lock = threading.RLock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pages-occupancy', daemon=True)
+                self._thread.start()
+
+    def reload(self):
+        with self._reload_lock:
+            today = timezone.localdate()
+            # ما يعلم بعد بدء القراءة قد لا تراه القراءة فيبقى قديماً
+            pending = set(self._stale)
+            calendars = load_calendars(today, self.horizon_days)
+            # منتصف الليل المحلي التالي: بعده تبدأ النافذة من يوم جديد
+            midnight = timezone.make_aware(
+                datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time())
+            )
+            with self._lock:
+                self.calendars, self.origin, self.loaded_at = calendars, today, time.monotonic()
+                self.expires_at = midnight.timestamp()
+                self._stale.difference_update(pending)
+
+    def _reload_rooms(self, room_ids):
+        loaded = load_calendars(self.origin, self.horizon_days, room_ids)
+        with self._lock:
+            # نسخة جديدة من القاموس: القارئ الذي أخذ القديم لا يراه وهو يتغير
+            calendars = dict(self.calendars)
+            for room_id in room_ids:
+                if room_id in loaded:
+                    calendars[room_id] = loaded[room_id]
+                else:
+                    calendars.pop(room_id, None)
+            self.calendars = calendars
+            self._stale.difference_update(room_ids)
+
+    def _refresh(self, room_id):
+        if time.time() < self.expires_at and room_id not in self._stale:
+            return
+        with self._reload_lock:
+            # من انتظر القفل يجد غالباً أن طلباً آخر أعاد التحميل قبله
+            if time.time() >= self.expires_at:
+                self.reload()
+            elif room_id in self._stale:
+                self._reload_rooms([room_id])
+
+    def free_units(self, room_id, arrival, departure):
+        """
+        Units of ``room_id`` free on every night of ``[arrival, departure)``.
+
+        ``None`` when the room is unknown or the stay falls outside the window.
+        """
+        self.start()
+        self._refresh(room_id)
+        calendar = self.calendars.get(room_id)
+        return None if calendar is None else calendar.free_units(arrival, departure)
+
+    def book(self, room_id, arrival, departure, units=1):
+        """Take ``units`` off the nights of a stay (negative to give them back)."""
+        with self._lock:
+            calendar = self.calendars.get(room_id) if self.calendars is not None else None
+            if calendar is not None:
+                calendar.book(arrival, departure, units)
+
+    def mark_stale(self, room_id):
+        with self._lock:
+            self._stale.add(room_id)
+
+    def _run(self):
+        while True:
+            time.sleep(self.reconcile_seconds)
+            close_old_connections()
+            try:
+                self.reload()
+            except Exception:
+                logger.exception('Occupancy reconcile failed')
+
+
+service = OccupancyService(
+    horizon_days=settings.OCCUPANCY_HORIZON_DAYS,
+    reconcile_seconds=settings.OCCUPANCY_RECONCILE_SECONDS,
+)
+
+
+def start():
+    """Pre-warm hook: build the calendars before the first request."""
+    service.reload()
+    service.start()
+
+
+def schedule_booking(room_id, arrival, departure, units=1):
+    transaction.on_commit(lambda: service.book(room_id, arrival, departure, units))
+
+
+def schedule_reload(room_id):
+    transaction.on_commit(lambda: service.mark_stale(room_id))
@@ -0,0 +1,176 @@
+"""
+Sampling profiler for live requests.
+
+A request is profiled when it carries a signed token in the
+``X-Profile-Token`` header (see ``manage.py profile_token``), or at
+random, at the rate ``PROFILE_SAMPLE_VIEWS`` gives its view. While its
+view runs, a helper thread reads the request thread's stack every
+``PROFILE_INTERVAL_MS``. The profile is saved as collapsed stacks, one
+``frame;frame;frame count`` line per distinct stack, in ``PROFILE_DIR``.
+flamegraph.pl, speedscope and inferno read that format as is. Only the
+newest ``PROFILE_MAX_FILES`` profiles are kept. The admin lists them and
+serves them for download.
+
+Nothing is traced, so the profiled request runs at full speed. The cost
+is one stack walk per interval, and at most ``PROFILE_MAX_CONCURRENT``
+requests are profiled at a time.
+"""
+import logging
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from . import background
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = 'X-Profile-Token'
+TOKEN_SALT = 'pages.profiling'
+
+_slots = threading.BoundedSemaphore(settings.PROFILE_MAX_CONCURRENT)
+
+
+def make_token():
+    """A token that turns profiling on for the requests carrying it, until ``PROFILE_TOKEN_MAX_AGE``."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def _valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        logger.warning('Ignoring invalid or expired profile token')
+        return False
+    return True
+
+
+@lru_cache(maxsize=4096)
+def _label(code):
+    """``function (file:line)`` for a frame, with the path relative to the project or site-packages."""
+    filename = code.co_filename
+    base = str(settings.BASE_DIR) + os.sep
+    if 'site-packages' + os.sep in filename:
+        filename = filename.rsplit('site-packages' + os.sep, 1)[1]
+    elif filename.startswith(base):
+        filename = filename[len(base):]
+    # ";" يفصل الإطارات في صيغة collapsed
+    return f'{code.co_qualname} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler:
+    """Counts the stacks one thread runs, below ``root``, every ``interval`` seconds."""
+
+    def __init__(self, thread_id, root, interval):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='pages-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._done.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and frame is not self.root:
+                labels.append(_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+
+def _profile_path(filename):
+    return Path(settings.PROFILE_DIR) / filename
+
+
+def save_profile(stacks, **details):
+    """Write ``stacks`` to ``PROFILE_DIR``, record it, and drop the profiles past ``PROFILE_MAX_FILES``."""
+    filename = f'{timezone.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}.collapsed'
+    path = _profile_path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()))
+    RequestProfile.objects.create(filename=filename, samples=sum(stacks.values()), **details)
+
+    expired = list(
+        RequestProfile.objects.order_by('-recorded_at', '-pk')
+        .values_list('pk', 'filename')[settings.PROFILE_MAX_FILES:]
+    )
+    for _, name in expired:
+        _profile_path(name).unlink(missing_ok=True)
+    RequestProfile.objects.filter(pk__in=[pk for pk, _ in expired]).delete()
+
+
+def open_profile(profile):
+    return _profile_path(profile.filename).open('rb')
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry a signed token or fall in their view's ``PROFILE_SAMPLE_VIEWS`` share."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # الإطار الحالي جذر العينات: ما فوقه من الخادم والوسائط الخارجية لا يُحتسب
+        request._profile_root = sys._getframe()
+        try:
+            response = self.get_response(request)
+        finally:
+            del request._profile_root
+        profile = getattr(request, '_profile', None)
+        if profile is not None:
+            sampler, trigger, started = profile
+            try:
+                stacks = sampler.stop()
+            finally:
+                _slots.release()
+            if stacks:
+                match = request.resolver_match
+                background.submit(
+                    save_profile, stacks,
+                    view=match.view_name if match else '',
+                    method=request.method,
+                    path=request.get_full_path()[:500],
+                    status_code=response.status_code,
+                    duration_ms=round((time.perf_counter() - started) * 1000, 2),
+                    trigger=trigger,
+                )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trigger = self._trigger(request)
+        if trigger is None or not _slots.acquire(blocking=False):
+            return None
+        sampler = StackSampler(threading.get_ident(), request._profile_root, settings.PROFILE_INTERVAL_MS / 1000)
+        sampler.start()
+        request._profile = (sampler, trigger, time.perf_counter())
+        return None
+
+    def _trigger(self, request):
+        # الرمز في الترويسة فقط: معامل في الرابط يصل إلى سجلات الوصول وإلى المسار المحفوظ مع العينة
+        token = request.headers.get(TOKEN_HEADER)
+        if token:
+            return 'token' if _valid_token(token) else None
+        rate = settings.PROFILE_SAMPLE_VIEWS.get(request.resolver_match.view_name)
+        if rate and random.random() < rate:
+            return 'sample'
+        return None
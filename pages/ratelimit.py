@@ -0,0 +1,22 @@
+import time
+
+from django.core.cache import cache
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(key, rate, burst):
+    """
+    Token bucket stored in the cache: ``burst`` tokens, refilled at ``rate``
+    tokens per second. Returns False when the bucket is empty.
+    """
+    now = time.time()
+    tokens, updated = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * rate)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    cache.set(key, (tokens, now), int(burst / rate) + 1)
+    return allowed
@@ -0,0 +1,77 @@
+"""
+Bulk rate and availability changes over date ranges.
+
+``apply_rates`` writes a price override and/or an available count to
+every matching night of several rooms. It upserts all the
+``RoomAvailability`` rows with ``bulk_create(update_conflicts=True)`` in
+``RATES_BATCH_SIZE`` batches. Unlike row-by-row saves this bypasses the
+model signals, so the channel sync and the occupancy calendars are
+notified once per room after the commit.
+"""
+import datetime
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from . import channels, occupancy
+from .models import Room, RoomAvailability
+
+RATES_BATCH_SIZE = 1000
+ONE_NIGHT = datetime.timedelta(days=1)
+
+
+@dataclass
+class RatesResult:
+    rooms: int = 0
+    nights: int = 0
+    rows: int = 0
+
+
+def matching_nights(start, end, weekdays):
+    """Dates from ``start`` to ``end`` inclusive whose ``weekday()`` is in ``weekdays``."""
+    nights, night = [], start
+    while night <= end:
+        if night.weekday() in weekdays:
+            nights.append(night)
+        night += ONE_NIGHT
+    return nights
+
+
+def apply_rates(room_ids, start, end, weekdays=range(7), price_override=None, available_count=None):
+    """
+    Set ``price_override`` and/or ``available_count`` on the matching nights of each room.
+
+    A value left as ``None`` keeps what a night already has. Nights
+    without a row get the room's ``total_rooms`` as their count when only
+    the price is set.
+    """
+    fields = [
+        name for name, value in (('price_override', price_override), ('available_count', available_count))
+        if value is not None
+    ]
+    if not fields:
+        raise ValueError('Nothing to set: give a price override, an available count or both')
+
+    nights = matching_nights(start, end, set(weekdays))
+    rooms = list(Room.objects.filter(pk__in=room_ids).values_list('pk', 'total_rooms'))
+    rows = [
+        RoomAvailability(
+            room_id=room_id,
+            date=night,
+            price_override=price_override,
+            available_count=total_rooms if available_count is None else available_count,
+        )
+        for room_id, total_rooms in rooms
+        for night in nights
+    ]
+    with transaction.atomic():
+        RoomAvailability.objects.bulk_create(
+            rows, batch_size=RATES_BATCH_SIZE,
+            update_conflicts=True, unique_fields=['room', 'date'], update_fields=fields,
+        )
+        if nights:
+            channels.mark_changed_many((room_id, nights[0], nights[-1] + ONE_NIGHT) for room_id, _ in rooms)
+            if available_count is not None:
+                for room_id, _ in rooms:
+                    occupancy.schedule_reload(room_id)
+    return RatesResult(rooms=len(rooms), nights=len(nights), rows=len(rows))
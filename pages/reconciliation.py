@@ -0,0 +1,230 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedPayment, Payment, PaymentStatus
+
+
+# الانتقالات المسموحة بين حالات الدفع عند المطابقة
+ALLOWED_TRANSITIONS = {
+    PaymentStatus.PENDING: {PaymentStatus.COMPLETED, PaymentStatus.FAILED},
+    PaymentStatus.FAILED: {PaymentStatus.COMPLETED},
+    PaymentStatus.COMPLETED: {PaymentStatus.REFUNDED},
+    PaymentStatus.REFUNDED: set(),
+}
+
+SETTLEMENT_STATUSES = {
+    'completed': PaymentStatus.COMPLETED,
+    'settled': PaymentStatus.COMPLETED,
+    'failed': PaymentStatus.FAILED,
+    'declined': PaymentStatus.FAILED,
+    'refunded': PaymentStatus.REFUNDED,
+}
+
+
+@dataclass
+class SettlementRow:
+    line: int
+    transaction_id: str
+    booking_number: str
+    status: str
+    amount: str = ''
+    paid_at: str = ''
+
+
+@dataclass
+class ReconciliationResult:
+    processed: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    mismatches: list = field(default_factory=list)
+
+
+def read_settlement_file(path, fmt=None):
+    """Yield ``SettlementRow`` objects from a CSV or JSONL file without loading it whole."""
+    fmt = fmt or ('jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'jsonl':
+            records = (
+                (number, json.loads(line))
+                for number, line in enumerate(handle, start=1)
+                if line.strip()
+            )
+        else:
+            records = enumerate(csv.DictReader(handle), start=2)
+        for number, record in records:
+            yield SettlementRow(
+                line=number,
+                transaction_id=(record.get('transaction_id') or '').strip(),
+                booking_number=(record.get('booking_number') or '').strip(),
+                status=(record.get('status') or '').strip().lower(),
+                amount=str(record.get('amount') or '').strip(),
+                paid_at=str(record.get('paid_at') or '').strip(),
+            )
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _parse_paid_at(value, default):
+    """The settlement time of a row, ``default`` when it has none, or ``None`` when it cannot be read."""
+    if not value:
+        return default
+    try:
+        # parse_datetime يرفع ValueError لتاريخ صحيح الشكل لكنه مستحيل، مثل الشهر 13
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is None:
+        try:
+            parsed = datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _load_payments(rows):
+    transaction_ids = {row.transaction_id for row in rows if row.transaction_id}
+    booking_numbers = {row.booking_number for row in rows if row.booking_number}
+    payments = (
+        Payment.objects
+        .filter(Q(transaction_id__in=transaction_ids) | Q(booking__booking_number__in=booking_numbers))
+        .select_related('booking')
+        .only('id', 'amount', 'status', 'paid_at', 'transaction_id', 'booking__booking_number')
+    )
+    by_transaction, by_booking = {}, {}
+    for payment in payments:
+        if payment.transaction_id:
+            by_transaction[payment.transaction_id] = payment
+        by_booking[payment.booking.booking_number] = payment
+    return by_transaction, by_booking
+
+
+def _archived_rows(rows):
+    """The rows whose payment has been moved to the archive."""
+    transaction_ids = {row.transaction_id for row in rows if row.transaction_id}
+    booking_numbers = {row.booking_number for row in rows if row.booking_number}
+    archived = ArchivedPayment.objects.filter(
+        Q(transaction_id__in=transaction_ids) | Q(booking__booking_number__in=booking_numbers)
+    ).values_list('transaction_id', 'booking__booking_number')
+    found = {value for pair in archived for value in pair if value}
+    return {row.line for row in rows if row.transaction_id in found or row.booking_number in found}
+
+
+def _apply_row(row, payment, result, now):
+    target = SETTLEMENT_STATUSES.get(row.status)
+    if target is None:
+        return 'unknown_status'
+    if row.amount:
+        try:
+            if Decimal(row.amount) != payment.amount:
+                return 'amount_mismatch'
+        except InvalidOperation:
+            return 'invalid_amount'
+    if row.transaction_id and payment.transaction_id and row.transaction_id != payment.transaction_id:
+        return 'transaction_id_mismatch'
+    if payment.status == target:
+        result.unchanged += 1
+        return None
+    if target not in ALLOWED_TRANSITIONS[payment.status]:
+        return f'invalid_transition:{payment.status}->{target}'
+    paid_at = payment.paid_at
+    if target == PaymentStatus.COMPLETED and not paid_at:
+        paid_at = _parse_paid_at(row.paid_at, now)
+        if paid_at is None:
+            return 'invalid_paid_at'
+
+    payment.status = target
+    payment.paid_at = paid_at
+    if row.transaction_id and not payment.transaction_id:
+        payment.transaction_id = row.transaction_id
+    return None
+
+
+SAVED_FIELDS = ('status', 'paid_at', 'transaction_id')
+
+
+def _update_statement(connection, payments):
+    """One ``UPDATE`` setting ``SAVED_FIELDS`` on ``payments`` through ``CASE id WHEN ...`` per column."""
+    meta = Payment._meta
+    quote = connection.ops.quote_name
+    pk = quote(meta.pk.column)
+    assignments, params = [], []
+    for name in SAVED_FIELDS:
+        field = meta.get_field(name)
+        case = f"CASE {pk} {' '.join(['WHEN %s THEN %s'] * len(payments))} END"
+        if connection.features.requires_casted_case_in_updates:
+            case = f'CAST({case} AS {field.cast_db_type(connection)})'
+        assignments.append(f'{quote(field.column)} = {case}')
+        for payment in payments:
+            params += [payment.pk, field.get_db_prep_save(getattr(payment, field.attname), connection)]
+    params += [payment.pk for payment in payments]
+    placeholders = ', '.join(['%s'] * len(payments))
+    sql = f"UPDATE {quote(meta.db_table)} SET {', '.join(assignments)} WHERE {pk} IN ({placeholders})"
+    return sql, params
+
+
+def _save_changes(payments, batch_size=500):
+    # paid_at يختلف في كل صف تقريباً، فالتجميع حسب القيم لا يوفر شيئاً؛ bulk_update يبني تعبير When لكل صف فيكون أبطأ
+    connection = connections[router.db_for_write(Payment)]
+    params_per_row = 2 * len(SAVED_FIELDS) + 1
+    if connection.features.max_query_params:
+        batch_size = min(batch_size, connection.features.max_query_params // params_per_row)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for offset in range(0, len(payments), batch_size):
+            cursor.execute(*_update_statement(connection, payments[offset:offset + batch_size]))
+
+
+def reconcile_payments(rows, batch_size=2000, dry_run=False):
+    """
+    Match settlement rows to payments with one ``IN`` lookup per batch and
+    write the resulting changes with one ``UPDATE`` per few hundred payments.
+    """
+    result = ReconciliationResult()
+    now = timezone.now()
+    for batch in _batched(rows, batch_size):
+        by_transaction, by_booking = _load_payments(batch)
+        changed = {}
+        missing = []
+        for row in batch:
+            result.processed += 1
+            payment = by_transaction.get(row.transaction_id) or by_booking.get(row.booking_number)
+            if payment is None:
+                missing.append(row)
+                continue
+            previous = (payment.status, payment.paid_at, payment.transaction_id)
+            reason = _apply_row(row, payment, result, now)
+            if reason:
+                result.mismatches.append((row, reason))
+            elif previous != (payment.status, payment.paid_at, payment.transaction_id):
+                changed[payment.pk] = payment
+
+        if missing:
+            # دفعات الحجوزات المؤرشفة لا تعدل، لكنها ليست مجهولة
+            archived = _archived_rows(missing)
+            result.mismatches.extend((row, 'archived' if row.line in archived else 'not_found') for row in missing)
+
+        if changed and not dry_run:
+            _save_changes(list(changed.values()))
+        result.updated += len(changed)
+    return result
+
+
+def write_mismatch_report(mismatches, handle):
+    writer = csv.writer(handle)
+    writer.writerow(['line', 'transaction_id', 'booking_number', 'status', 'amount', 'reason'])
+    for row, reason in mismatches:
+        writer.writerow([row.line, row.transaction_id, row.booking_number, row.status, row.amount, reason])
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class ReferenceDataCache:
+    """
+    Two-tier cache for small, rarely changing lookup tables.
+
+    Tier 1 is a per-process LRU holding ``(value, version, expires_at)``.
+    Tier 2 is the shared cache backend, keyed by dataset name and version.
+    When a local entry's TTL runs out only the shared version counter is
+    read; the value is reused unless another worker bumped the version.
+    """
+
+    def __init__(self, max_entries=64, local_ttl=5, shared_timeout=60 * 60 * 24):
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.shared_timeout = shared_timeout
+        self._loaders = {}
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ['local_hits', 'version_checks', 'shared_hits', 'loads', 'evictions', 'invalidations'], 0
+        )
+
+    def register(self, name, loader):
+        self._loaders[name] = loader
+
+    def _version_key(self, name):
+        return f'refdata:{name}:version'
+
+    def _value_key(self, name, version):
+        return f'refdata:{name}:{version}'
+
+    def _shared_version(self, name):
+        return cache.get_or_set(self._version_key(name), 1, None)
+
+    def _remember(self, name, value, version):
+        with self._lock:
+            self._local[name] = (value, version, time.monotonic() + self.local_ttl)
+            self._local.move_to_end(name)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get(self, name):
+        entry = self._local.get(name)
+        if entry is not None:
+            value, version, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._stats['local_hits'] += 1
+                with self._lock:
+                    if name in self._local:
+                        self._local.move_to_end(name)
+                return value
+            self._stats['version_checks'] += 1
+            if self._shared_version(name) == version:
+                self._remember(name, value, version)
+                return value
+
+        version = self._shared_version(name)
+        value = cache.get(self._value_key(name, version))
+        if value is None:
+            self._stats['loads'] += 1
+            value = self._loaders[name]()
+            cache.set(self._value_key(name, version), value, self.shared_timeout)
+        else:
+            self._stats['shared_hits'] += 1
+        self._remember(name, value, version)
+        return value
+
+    def version(self, name):
+        """Current shared version of ``name``; changes every time the dataset is invalidated."""
+        return self._shared_version(name)
+
+    def invalidate(self, name):
+        """Move the shared version forward so every worker reloads on its next version check."""
+        try:
+            cache.incr(self._version_key(name))
+        except ValueError:
+            cache.set(self._version_key(name), 2, None)
+        with self._lock:
+            self._local.pop(name, None)
+        self._stats['invalidations'] += 1
+
+    def stats(self):
+        return {**self._stats, 'local_entries': len(self._local)}
+
+
+def _nationalities():
+    from .models import Nationality
+    return list(Nationality.objects.all())
+
+
+def _services():
+    from .models import Service
+    return list(Service.objects.filter(is_active=True).prefetch_related('details'))
+
+
+def _membership_plans():
+    from club.models import MembershipPlans
+    return list(MembershipPlans.objects.filter(is_active=True).prefetch_related('features'))
+
+
+reference_data = ReferenceDataCache(
+    local_ttl=getattr(settings, 'REFDATA_LOCAL_TTL', 5),
+    shared_timeout=getattr(settings, 'REFDATA_SHARED_TIMEOUT', 60 * 60 * 24),
+)
+reference_data.register('nationalities', _nationalities)
+reference_data.register('services', _services)
+reference_data.register('membership_plans', _membership_plans)
+
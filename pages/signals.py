@@ -0,0 +1,105 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import channels, occupancy, units, waitlist
+from .models import (
+    Booking, Nationality, Room, RoomAmenity, RoomAvailability, Service, ServiceDetail, WaitlistEntry,
+)
+from .refdata import reference_data
+
+REFERENCE_DATASETS = {
+    Nationality: 'nationalities',
+    Service: 'services',
+    ServiceDetail: 'services',
+}
+
+
+def invalidate_reference_data(sender, **kwargs):
+    name = REFERENCE_DATASETS[sender]
+    transaction.on_commit(lambda: reference_data.invalidate(name))
+
+
+for model in REFERENCE_DATASETS:
+    post_save.connect(invalidate_reference_data, sender=model, dispatch_uid=f'refdata-save-{model.__name__}')
+    post_delete.connect(invalidate_reference_data, sender=model, dispatch_uid=f'refdata-delete-{model.__name__}')
+
+
+@receiver(post_save, sender=RoomAmenity)
+@receiver(post_delete, sender=RoomAmenity)
+def touch_room(sender, instance, **kwargs):
+    """Amenities have no timestamp of their own; move the room's so its page revalidates."""
+    Room.objects.filter(pk=instance.room_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Booking)
+def booking_stay_changed(sender, instance, created, **kwargs):
+    """
+    React to a new stay or a change of room, dates or status.
+
+    Confirmed stays get a unit. Nights a confirmed stay gave up (it was
+    cancelled, moved or shortened) go to the waitlist. Both the old and
+    the new nights are marked for the channel sync and moved in this
+    worker's occupancy calendar.
+    """
+    loaded = getattr(instance, '_loaded_stay', None)
+    current = (instance.room_id, instance.status, instance.arrival_date, instance.departure_date)
+    instance._loaded_stay = current
+    if not created and (loaded is None or None in loaded or loaded == current):
+        return
+
+    if instance.status == 'confirmed':
+        units.schedule_assignment(instance.pk)
+        channels.mark_changed(instance.room_id, instance.arrival_date, instance.departure_date)
+        occupancy.schedule_booking(instance.room_id, instance.arrival_date, instance.departure_date)
+    if created:
+        return
+
+    room_id, status, arrival, departure = loaded
+    if status == 'confirmed':
+        channels.mark_changed(room_id, arrival, departure)
+        occupancy.schedule_booking(room_id, arrival, departure, -1)
+    if status != 'confirmed':
+        return
+    if instance.status != 'confirmed' or instance.room_id != room_id:
+        waitlist.schedule_rematch(room_id, [(arrival, departure)])
+    else:
+        waitlist.schedule_rematch(
+            room_id, waitlist.freed_ranges((arrival, departure), (instance.arrival_date, instance.departure_date))
+        )
+
+
+@receiver(post_delete, sender=Booking)
+def offer_deleted_nights(sender, instance, **kwargs):
+    # الإقامات المنتهية (الأرشفة مثلاً) لا تحرر ليالي قابلة للبيع
+    if instance.status == 'confirmed' and instance.departure_date > timezone.localdate():
+        channels.mark_changed(instance.room_id, instance.arrival_date, instance.departure_date)
+        occupancy.schedule_booking(instance.room_id, instance.arrival_date, instance.departure_date, -1)
+        waitlist.schedule_rematch(instance.room_id, [(instance.arrival_date, instance.departure_date)])
+
+
+@receiver(post_save, sender=RoomAvailability)
+@receiver(post_delete, sender=RoomAvailability)
+def mark_calendar_night(sender, instance, **kwargs):
+    channels.mark_changed(instance.room_id, instance.date, instance.date + channels.ONE_NIGHT)
+    occupancy.schedule_reload(instance.room_id)
+
+
+@receiver(post_save, sender=Room)
+def mark_room_horizon(sender, instance, created, update_fields=None, **kwargs):
+    """Price, size and active flag apply to every night the channels sell."""
+    if created or update_fields is None or {'price', 'total_rooms', 'is_active'} & set(update_fields):
+        today = timezone.localdate()
+        channels.mark_changed(instance.pk, today, today + datetime.timedelta(days=settings.CHANNEL_SYNC_DAYS))
+        occupancy.schedule_reload(instance.pk)
+
+
+@receiver(post_save, sender=WaitlistEntry)
+@receiver(post_delete, sender=WaitlistEntry)
+def invalidate_waitlist_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: waitlist.invalidate(instance.room_id))
+    occupancy.schedule_reload(instance.room_id)
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import operator
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import background
+from .models import SlowQuery
+from .writebehind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+SLOT_KEY = 'slowquery:slot'
+PLAN_KEY = 'slowquery:plan:{}'
+PLAN_TIMEOUT = 60 * 60 * 24
+# إطارات هذه الوحدات تغلف الاستعلام فقط ولا تعتبر "الدالة المستدعية"
+WRAPPER_MODULES = {__name__, 'project.instrumentation'}
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'IN \((?:\?, )*\?\)')
+_SPACES = re.compile(r'\s+')
+
+_local = threading.local()
+
+slow_query_queue = WriteBehindQueue(
+    SlowQuery,
+    flush_interval=2,
+    flush_size=100,
+    max_pending=1000,
+    # العداد يلتف كل SLOW_QUERY_BUFFER_SIZE تسجيل، فقد تتكرر الخانة في دفعة واحدة
+    unique_key=operator.attrgetter('slot'),
+    bulk_options={
+        'update_conflicts': True,
+        'unique_fields': ['slot'],
+        'update_fields': [
+            'fingerprint', 'statement', 'sql', 'params', 'duration_ms', 'view', 'caller', 'plan', 'recorded_at',
+        ],
+    },
+)
+
+
+def normalize(sql):
+    """Reduce a statement to its shape: literals and placeholders become ``?`` and IN lists collapse."""
+    shape = _LITERALS.sub('?', sql).replace('%s', '?')
+    shape = _IN_LISTS.sub('IN (...)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+def _caller():
+    """First frame in the project's own code, skipping Django and the query wrappers."""
+    base = str(settings.BASE_DIR) + os.sep
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base)
+            and 'site-packages' not in filename
+            and frame.f_globals.get('__name__') not in WRAPPER_MODULES
+        ):
+            return f'{os.path.relpath(filename, base)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ''
+
+
+def _explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+def _next_slot():
+    try:
+        counter = cache.incr(SLOT_KEY)
+    except ValueError:
+        cache.add(SLOT_KEY, 0, None)
+        counter = cache.incr(SLOT_KEY)
+    return counter % settings.SLOW_QUERY_BUFFER_SIZE
+
+
+def explain_and_queue(alias, sql, params, entry):
+    """Attach the plan of ``sql`` to ``entry`` and queue it; runs on the background pool with its own connection."""
+    try:
+        entry.plan = _explain(connections[alias], sql, params)
+    except Exception:
+        logger.exception('EXPLAIN failed for slow query %s', entry.fingerprint)
+    slow_query_queue.put(entry)
+
+
+def record(connection, sql, params, many, duration, view):
+    statement = normalize(sql)
+    fingerprint = hashlib.sha1(statement.encode()).hexdigest()
+    caller = _caller()
+    logger.warning('Slow query (%.1f ms) in %s [%s]: %s', duration * 1000, view or '-', caller or '-', statement)
+
+    entry = SlowQuery(
+        slot=_next_slot(),
+        fingerprint=fingerprint,
+        statement=statement,
+        sql=sql[:10000],
+        params=repr(params)[:2000],
+        duration_ms=round(duration * 1000, 2),
+        view=view[:200],
+        caller=caller[:300],
+    )
+    # خطة التنفيذ تؤخذ مرة واحدة لكل شكل استعلام، والكاش المشترك يمنع تكرارها بين العمال
+    if not many and cache.add(PLAN_KEY.format(fingerprint), True, PLAN_TIMEOUT):
+        background.submit(explain_and_queue, connection.alias, sql, params, entry)
+    else:
+        slow_query_queue.put(entry)
+
+
+class SlowQueryRecorder:
+    """``execute_wrapper`` that times every query and records those over ``SLOW_QUERY_MS``."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_MS / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold and not getattr(_local, 'recording', False):
+            _local.recording = True
+            try:
+                match = getattr(self.request, 'resolver_match', None)
+                record(context['connection'], sql, params, many, duration, match.view_name if match else '')
+            except Exception:
+                logger.exception('Could not record slow query')
+            finally:
+                _local.recording = False
+        return result
+
+
+class SlowQueryMiddleware:
+    """Watch a sampled share of requests (``SLOW_QUERY_SAMPLE_RATE``) for slow SQL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SLOW_QUERY_SAMPLE_RATE:
+            return self.get_response(request)
+        recorder = SlowQueryRecorder(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
@@ -1,3 +1,1026 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import smtplib
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from club.models import Club, Facility, FacilityServices, MembershipPlanFeatures, MembershipPlans, Workingoaches
+from project.instrumentation import Registry, Trace
+
+from . import occupancy, units, waitlist
+from .archive import archive_bookings, find_booking
+from .campaigns import CAMPAIGNS, run_campaign
+from .channels import ChannelAdapter, sync_channel
+from .conditional import conditional_page
+from .management.commands import compare_templates
+from .models import (
+    AdjustmentKind, ArchivedBooking, Booking, BookingGroup, BookingStatus, CampaignCheckpoint, Contact,
+    InventoryChange, Notification, Payment, PaymentMethod, PaymentStatus, Room, RoomAmenity, RoomAvailability,
+    RoomUnit, Service, ServiceBooking, ServiceDetail, SlowQuery, SubjectFlag, WaitlistEntry, WaitlistStatus,
+)
+from .modifications import modify_booking
+from .profiling import TOKEN_HEADER, ProfilingMiddleware, make_token
+from .rates import ONE_NIGHT, apply_rates, matching_nights
+from .reconciliation import SettlementRow, reconcile_payments
+from .refdata import reference_data
+from .slowqueries import explain_and_queue, record, slow_query_queue
+from .webhooks import send_payment_notification, sign_payload
+from .writebehind import WriteBehindQueue
+
+
+def make_room(name='Deluxe', **fields):
+    fields = {'description': '-', 'price': Decimal('100.00'), 'bed_type': 'King', 'size': '30', **fields}
+    return Room.objects.create(name=name, **fields)
+
+
+def make_booking(room, arrival, nights=2, **fields):
+    fields = {
+        'first_name': 'Guest', 'last_name': 'Test', 'email': 'guest@example.com', 'phone': '0100', **fields,
+    }
+    return Booking.objects.create(
+        room=room, arrival_date=arrival, departure_date=arrival + datetime.timedelta(days=nights), **fields,
+    )
+
+
+def in_days(days):
+    return timezone.localdate() + datetime.timedelta(days=days)
+
+
+class RoomCatalogTests(TestCase):
+    def test_paid_booking_changes_the_etag(self):
+        room = make_room(total_rooms=3)
+        url = reverse('pages:room_catalog')
+        first = self.client.get(url)
+        self.assertEqual(first.json()['results'][0]['available_rooms'], 3)
+
+        booking = make_booking(room, in_days(5))
+        Payment.objects.create(
+            booking=booking, amount=booking.total_price, method=PaymentMethod.CASH, status=PaymentStatus.COMPLETED,
+        )
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['results'][0]['available_rooms'], 2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
+
+
+class RoomRatesTests(TestCase):
+    def setUp(self):
+        self.room = make_room(total_rooms=4)
+
+    def test_upsert_keeps_the_fields_it_was_not_given(self):
+        start = in_days(10)
+        RoomAvailability.objects.create(room=self.room, date=start, available_count=2, price_override=Decimal('80'))
+        result = apply_rates([self.room.pk], start, start + datetime.timedelta(days=2), price_override=Decimal('150'))
+        self.assertEqual((result.rooms, result.nights, result.rows), (1, 3, 3))
+        rows = dict(
+            RoomAvailability.objects.filter(room=self.room)
+            .values_list('date', 'available_count')
+        )
+        self.assertEqual(rows, {start: 2, start + ONE_NIGHT: 4, start + 2 * ONE_NIGHT: 4})
+        self.assertEqual(
+            set(RoomAvailability.objects.filter(room=self.room).values_list('price_override', flat=True)),
+            {Decimal('150')},
+        )
+
+        apply_rates([self.room.pk], start, start, available_count=0)
+        night = RoomAvailability.objects.get(room=self.room, date=start)
+        self.assertEqual((night.available_count, night.price_override), (0, Decimal('150')))
+
+    def test_weekdays_filter_the_nights(self):
+        start = in_days(7)
+        nights = matching_nights(start, start + datetime.timedelta(days=13), {start.weekday()})
+        self.assertEqual(nights, [start, start + datetime.timedelta(days=7)])
+
+    def test_closed_night_cannot_be_booked(self):
+        arrival = in_days(20)
+        apply_rates([self.room.pk], arrival + ONE_NIGHT, arrival + ONE_NIGHT, available_count=0)
+        with self.assertRaises(ValidationError) as raised:
+            Booking(room=self.room, arrival_date=arrival, departure_date=arrival + 3 * ONE_NIGHT).clean()
+        self.assertEqual(raised.exception.code, 'sold_out')
+        Booking(room=self.room, arrival_date=arrival + 2 * ONE_NIGHT, departure_date=arrival + 4 * ONE_NIGHT).clean()
+
+        response = self.client.post(reverse('pages:booking_step1', args=[self.room.slug]), {
+            'arrival_date': arrival.isoformat(),
+            'departure_date': (arrival + 3 * ONE_NIGHT).isoformat(),
+            'number_of_adults': 1, 'number_of_children': 0,
+        })
+        self.assertRedirects(response, reverse('pages:waitlist_join', args=[self.room.slug]))
+
+
+class RecordingAdapter(ChannelAdapter):
+    pushes = []
+    on_push = None
+
+    def push(self, ranges):
+        self.pushes.append(list(ranges))
+        if RecordingAdapter.on_push:
+            RecordingAdapter.on_push()
+
+
+@override_settings(CHANNELS={'test': {'BACKEND': 'pages.tests.RecordingAdapter'}}, CHANNEL_SYNC_DAYS=10)
+class ChannelSyncTests(TestCase):
+    def setUp(self):
+        RecordingAdapter.pushes = []
+        RecordingAdapter.on_push = None
+        self.room = make_room(total_rooms=3)
+
+    def sent(self):
+        ranges = [item for batch in RecordingAdapter.pushes for item in batch]
+        RecordingAdapter.pushes = []
+        return [(item.start, item.end, item.available) for item in ranges]
+
+    def test_only_changed_nights_are_pushed(self):
+        today = timezone.localdate()
+        sync_channel('test')
+        self.assertEqual(self.sent(), [(today, in_days(10), 3)])
+
+        make_booking(self.room, in_days(2), nights=2)
+        result = sync_channel('test')
+        self.assertEqual(self.sent(), [(in_days(2), in_days(4), 2)])
+        self.assertEqual(result.nights_checked, 2)
+
+        sync_channel('test')
+        self.assertEqual(self.sent(), [])
+
+    def test_nights_entering_the_horizon_are_pushed(self):
+        sync_channel('test')
+        self.sent()
+        with self.settings(CHANNEL_SYNC_DAYS=12):
+            sync_channel('test')
+        self.assertEqual(self.sent(), [(in_days(10), in_days(12), 3)])
+
+    def test_changes_committed_during_a_sync_are_kept(self):
+        sync_channel('test')
+        self.sent()
+        make_booking(self.room, in_days(1), nights=1)
+        first = InventoryChange.objects.get()
+
+        def late_commit():
+            # صف بمعرف أصغر مما قرأته المزامنة، كمعاملة بدأت قبلها وانتهت بعدها
+            RecordingAdapter.on_push = None
+            make_booking(self.room, in_days(6), nights=1)
+            InventoryChange.objects.exclude(pk=first.pk).update(id=first.pk - 1)
+
+        RecordingAdapter.on_push = late_commit
+        sync_channel('test')
+        self.assertEqual(self.sent(), [(in_days(1), in_days(2), 2)])
+        self.assertEqual(list(InventoryChange.objects.values_list('pk', flat=True)), [first.pk - 1])
+
+        sync_channel('test')
+        self.assertEqual(self.sent(), [(in_days(6), in_days(7), 2)])
+        self.assertFalse(InventoryChange.objects.exists())
+
+
+class WriteBehindQueueTests(TestCase):
+    def contact(self, name):
+        return Contact(name=name, email='guest@example.com', phone='0100', subject=SubjectFlag.choices[0][0],
+                       message='-')
+
+    def test_bad_row_is_retried_alone_then_dropped(self):
+        queue = WriteBehindQueue(Contact, flush_interval=60, flush_size=10, max_pending=100, max_attempts=2)
+        queue._pending.extend([self.contact('first'), self.contact(None), self.contact('third')])
+
+        with self.assertLogs('pages.writebehind', 'ERROR'):
+            queue.drain()
+            self.assertEqual(len(queue), 1)
+            queue._pending.append(self.contact('fourth'))
+            queue.drain()
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(
+            sorted(Contact.objects.values_list('name', flat=True)), ['first', 'fourth', 'third'],
+        )
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(slow_query_queue, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(slow_query_queue._pending.clear)
+
+    def record(self, sql, many=False):
+        with self.assertLogs('pages.slowqueries', 'WARNING'):
+            record(connection, sql, (), many, 0.5, 'pages:index')
+
+    def test_explain_runs_off_the_request_path(self):
+        with mock.patch('pages.slowqueries.background.submit') as submit:
+            self.record('SELECT 1')
+            self.record('SELECT 2')
+        self.assertEqual(len(slow_query_queue), 1)
+        (func, *args), _ = submit.call_args
+        self.assertIs(func, explain_and_queue)
+        func(*args)
+        self.assertEqual(len(slow_query_queue), 2)
+        self.assertTrue(slow_query_queue._pending[-1].plan)
+
+    @override_settings(SLOW_QUERY_BUFFER_SIZE=2)
+    def test_batch_keeps_the_last_row_for_each_slot(self):
+        # executemany لا تؤخذ له خطة، فتدخل الصفوف الثلاثة الطابور مباشرة وتلتف الخانة
+        for number in range(3):
+            self.record(f'INSERT INTO pages_room VALUES ({number})', many=True)
+        self.assertEqual(len(slow_query_queue), 3)
+        slow_query_queue.drain()
+        self.assertEqual(len(slow_query_queue), 0)
+        self.assertEqual(sorted(SlowQuery.objects.values_list('sql', flat=True)),
+                         ['INSERT INTO pages_room VALUES (1)', 'INSERT INTO pages_room VALUES (2)'])
+
+
+class BookingModificationTests(TestCase):
+    def setUp(self):
+        self.room = make_room(total_rooms=1)
+        self.booking = make_booking(self.room, in_days(10), nights=2)
+        self.payment = Payment.objects.create(
+            booking=self.booking, amount=self.booking.total_price, method=PaymentMethod.CASH,
+        )
+
+    def test_added_nights_are_priced_from_the_calendar(self):
+        RoomAvailability.objects.create(room=self.room, date=in_days(12), available_count=1,
+                                        price_override=Decimal('150'))
+        change = modify_booking(self.booking.pk, departure_date=in_days(13))
+        self.assertEqual((change.added, change.removed), ([in_days(12)], []))
+        self.assertEqual(change.new_total, Decimal('350.00'))
+        self.assertEqual(
+            (change.adjustment.kind, change.adjustment.amount), (AdjustmentKind.CHARGE, Decimal('150.00')),
+        )
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.amount, Decimal('350.00'))
+
+    def test_removed_nights_are_credited_at_the_average_rate(self):
+        self.booking.total_price = Decimal('180.00')
+        self.booking.save(update_fields=['total_price'])
+        change = modify_booking(self.booking.pk, arrival_date=in_days(11))
+        self.assertEqual(change.new_total, Decimal('90.00'))
+        self.assertEqual(
+            (change.adjustment.kind, change.adjustment.amount), (AdjustmentKind.REFUND, Decimal('90.00')),
+        )
+
+    def test_added_night_must_be_free(self):
+        make_booking(self.room, in_days(12), nights=1)
+        with self.assertRaises(ValidationError) as raised:
+            modify_booking(self.booking.pk, departure_date=in_days(13))
+        self.assertEqual(raised.exception.code, 'sold_out')
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.departure_date, in_days(12))
+
+
+@override_settings(TEMPLATES=[*settings.TEMPLATES[:1], settings.JINJA2_TEMPLATES], HOT_TEMPLATE_ENGINE='jinja2')
+class JinjaTemplateParityTests(TestCase):
+    def setUp(self):
+        room = make_room(image='rooms/deluxe.jpg')
+        RoomAmenity.objects.create(room=room, name='Wi-Fi', icon='fa-wifi')
+        service = Service.objects.create(name='Spa', description='-', price=Decimal('40'), working_hours='9-5',
+                                         image='services/spa.jpg')
+        ServiceDetail.objects.create(service=service, name='Massage')
+        Club.objects.create(title='Main club', description='-')
+        Workingoaches.objects.create(name='Coach', job='Trainer')
+        plan = MembershipPlans.objects.create(name='Gold', price=Decimal('500'))
+        MembershipPlanFeatures.objects.create(membership_plan=plan, name='Pool')
+        facility = Facility.objects.create(name='Court', description='-', price=Decimal('50'),
+                                           image='facility_types/court.jpg')
+        FacilityServices.objects.create(facility=facility, name='Rackets')
+        reference_data.invalidate('services')
+        reference_data.invalidate('membership_plans')
+
+    def test_ported_pages_render_the_same_html(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        contexts = compare_templates._contexts()
+        self.assertEqual(sorted(contexts), sorted(compare_templates.PAGES))
+        for page, (template_name, context) in contexts.items():
+            with self.subTest(page=page):
+                expected = engines['django'].get_template(template_name).render(context, request)
+                actual = engines['jinja2'].get_template(template_name).render(context, request)
+                self.assertEqual(compare_templates.normalize(actual), compare_templates.normalize(expected))
+
+
+class RefusingConnection:
+    """Email connection that refuses some recipients and can drop after a number of messages."""
+
+    def __init__(self, refused=(), drop_after=None):
+        self.refused = set(refused)
+        self.drop_after = drop_after
+        self.outbox = []
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.drop_after is not None and len(self.outbox) >= self.drop_after:
+                raise smtplib.SMTPServerDisconnected('connection lost')
+            if message.to[0] in self.refused:
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'no such user')})
+            self.outbox.append(message)
+        return len(messages)
+
+
+class CampaignTests(TestCase):
+    campaign = CAMPAIGNS['pre_arrival']
+
+    def setUp(self):
+        self.room = make_room(total_rooms=10)
+        self.target = self.campaign.target_date(timezone.localdate())
+
+    def run_with(self, connection):
+        with mock.patch('pages.campaigns.get_connection', return_value=connection):
+            return run_campaign(self.campaign, self.target, batch_size=2)
+
+    def test_refused_recipient_does_not_stop_the_run(self):
+        for index in range(3):
+            make_booking(self.room, self.target, email=f'guest{index}@example.com')
+        connection = RefusingConnection(refused={'guest1@example.com'})
+        with self.assertLogs('pages.campaigns', 'WARNING'):
+            result = self.run_with(connection)
+        self.assertEqual((result.sent, result.failed), (2, 1))
+        self.assertEqual(sorted(message.to[0] for message in connection.outbox),
+                         ['guest0@example.com', 'guest2@example.com'])
+        refused = Notification.objects.get(recipient_email='guest1@example.com')
+        self.assertFalse(refused.is_sent)
+        self.assertIn('no such user', refused.error)
+
+        # تشغيل لاحق لنفس التاريخ لا يعيد المرسل ولا المرفوض، ويلتقط الحجوزات الجديدة
+        make_booking(self.room, self.target, email='late@example.com')
+        connection = RefusingConnection()
+        result = self.run_with(connection)
+        self.assertEqual((result.sent, result.failed), (1, 0))
+        self.assertEqual([message.to[0] for message in connection.outbox], ['late@example.com'])
+        checkpoint = CampaignCheckpoint.objects.get(campaign='pre_arrival', target_date=self.target)
+        self.assertEqual((checkpoint.sent_count, checkpoint.failed_count), (3, 1))
+
+    def test_lost_connection_keeps_what_was_sent(self):
+        for index in range(2):
+            make_booking(self.room, self.target, email=f'guest{index}@example.com')
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            self.run_with(RefusingConnection(drop_after=1))
+        self.assertEqual(Notification.objects.filter(is_sent=True).count(), 1)
+
+        connection = RefusingConnection()
+        self.assertEqual(self.run_with(connection).sent, 1)
+        self.assertEqual(len(connection.outbox), 1)
+
+    def test_catch_up_dates_end_at_the_target(self):
+        today = timezone.localdate()
+        self.assertEqual(self.campaign.target_dates(today), [in_days(1), in_days(2)])
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        room = make_room(total_rooms=10)
+        self.booking = make_booking(room, in_days(5))
+        self.payment = Payment.objects.create(
+            booking=self.booking, amount=Decimal('200.00'), method=PaymentMethod.ONLINE,
+        )
+
+    def row(self, status, line=2, **fields):
+        fields = {'transaction_id': '', 'booking_number': self.booking.booking_number, **fields}
+        return SettlementRow(line=line, status=status, **fields)
+
+    def reasons(self, result):
+        return [reason for _, reason in result.mismatches]
+
+    def test_allowed_transitions_are_applied(self):
+        result = reconcile_payments([self.row('settled', transaction_id='TX-1', paid_at='2026-01-02T10:00:00Z')])
+        self.assertEqual((result.updated, result.mismatches), (1, []))
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.COMPLETED)
+        self.assertEqual(self.payment.transaction_id, 'TX-1')
+        self.assertEqual(self.payment.paid_at.year, 2026)
+
+        result = reconcile_payments([self.row('completed'), self.row('refunded', line=3)])
+        self.assertEqual((result.unchanged, result.updated), (1, 1))
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.REFUNDED)
+
+    def test_distinct_paid_at_values_are_written_in_one_update(self):
+        payments = [self.payment] + [
+            Payment.objects.create(
+                booking=make_booking(self.booking.room, in_days(10 + index)), amount=Decimal('200.00'),
+                method=PaymentMethod.ONLINE,
+            )
+            for index in range(4)
+        ]
+        rows = [
+            self.row('settled', line=index + 2, booking_number=payment.booking.booking_number,
+                     transaction_id=f'TX-{index}', paid_at=f'2026-01-0{index + 1}T10:00:00Z')
+            for index, payment in enumerate(payments)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            result = reconcile_payments(rows)
+        self.assertEqual(result.updated, 5)
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            sorted((payment.paid_at.day, payment.transaction_id, payment.status)
+                   for payment in Payment.objects.filter(pk__in=[payment.pk for payment in payments])),
+            [(index + 1, f'TX-{index}', PaymentStatus.COMPLETED) for index in range(5)],
+        )
+
+    def test_rejected_rows_are_reported_and_left_alone(self):
+        result = reconcile_payments([
+            self.row('refunded'),
+            self.row('settled', line=3, amount='199.00'),
+            self.row('bounced', line=4),
+            self.row('settled', line=5, booking_number='BK-MISSING'),
+        ])
+        self.assertEqual(self.reasons(result), [
+            'invalid_transition:pending->refunded', 'amount_mismatch', 'unknown_status', 'not_found',
+        ])
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.PENDING)
+
+    def test_impossible_paid_at_is_a_mismatch(self):
+        other = make_booking(self.booking.room, in_days(9))
+        Payment.objects.create(booking=other, amount=Decimal('200.00'), method=PaymentMethod.ONLINE)
+        result = reconcile_payments([
+            self.row('settled', paid_at='2026-13-01T10:00:00'),
+            self.row('settled', line=3, booking_number=other.booking_number, paid_at='2026-01-02T10:00:00'),
+        ], batch_size=1)
+        self.assertEqual(self.reasons(result), ['invalid_paid_at'])
+        self.assertEqual(result.updated, 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.PENDING)
+
+    def test_conflicting_transaction_id_is_a_mismatch(self):
+        Payment.objects.filter(pk=self.payment.pk).update(transaction_id='TX-1')
+        result = reconcile_payments([self.row('settled', transaction_id='TX-2')])
+        self.assertEqual(self.reasons(result), ['transaction_id_mismatch'])
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.status, self.payment.transaction_id), (PaymentStatus.PENDING, 'TX-1'))
+
+
+@override_settings(PAYMENT_WEBHOOK_SECRET='test-secret')
+class PaymentWebhookTests(TestCase):
+    def setUp(self):
+        booking = make_booking(make_room(total_rooms=10), in_days(5))
+        self.payment = Payment.objects.create(
+            booking=booking, amount=Decimal('200.00'), method=PaymentMethod.ONLINE, transaction_id='TX-1',
+        )
+
+    def post(self, *events, booking_number=''):
+        body = json.dumps({'events': [
+            {'id': event_id, 'status': status, 'transaction_id': 'TX-1', 'booking_number': booking_number}
+            for event_id, status in events
+        ]}).encode()
+        with mock.patch('pages.webhooks.background.submit') as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('pages:payment_webhook'), body, content_type='application/json',
+                HTTP_X_WEBHOOK_SIGNATURE=sign_payload(body),
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [call.args[1] for call in submit.call_args_list]
+
+    def test_replayed_event_is_applied_once(self):
+        result, notified = self.post(('evt-1', 'settled'), ('evt-1', 'settled'))
+        self.assertEqual((result['received'], result['applied']), (1, 1))
+        self.assertEqual(notified, ['evt-1'])
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.COMPLETED)
+        paid_at = self.payment.paid_at
+
+        result, notified = self.post(('evt-1', 'settled'))
+        self.assertEqual((result['duplicates'], result['applied']), (1, 0))
+        self.assertEqual(notified, [])
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.paid_at, paid_at)
+
+    def test_first_event_matches_by_booking_number_and_stores_the_transaction_id(self):
+        Payment.objects.filter(pk=self.payment.pk).update(transaction_id='')
+        result, notified = self.post(('evt-1', 'settled'), booking_number=self.payment.booking.booking_number)
+        self.assertEqual(result['applied'], 1)
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.status, self.payment.transaction_id), (PaymentStatus.COMPLETED, 'TX-1'))
+
+        with mock.patch('pages.webhooks.send_mail'):
+            send_payment_notification(notified[0])
+        self.assertTrue(Notification.objects.filter(booking=self.payment.booking, is_sent=True).exists())
+
+    def test_booking_number_does_not_override_another_transaction_id(self):
+        Payment.objects.filter(pk=self.payment.pk).update(transaction_id='TX-OTHER')
+        result, _ = self.post(('evt-1', 'settled'), booking_number=self.payment.booking.booking_number)
+        self.assertEqual(result['ignored'], 1)
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.status, self.payment.transaction_id), (PaymentStatus.PENDING, 'TX-OTHER'))
+
+    def test_event_without_a_transition_is_ignored(self):
+        self.post(('evt-1', 'settled'))
+        result, notified = self.post(('evt-2', 'settled'), ('evt-3', 'declined'))
+        self.assertEqual((result['duplicates'], result['applied'], result['ignored']), (0, 0, 2))
+        self.assertEqual(notified, [])
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.COMPLETED)
+
+    def test_bad_signature_is_rejected(self):
+        response = self.client.post(
+            reverse('pages:payment_webhook'), b'{"events": []}', content_type='application/json',
+            HTTP_X_WEBHOOK_SIGNATURE='sha256=0',
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class WaitlistRematchTests(TestCase):
+    def setUp(self):
+        self.room = make_room(total_rooms=1)
+        waitlist.invalidate(self.room.pk)
+        self.booking = make_booking(self.room, in_days(5), nights=5)
+
+    def wait_for(self, arrival, nights, minutes_ago):
+        return WaitlistEntry.objects.create(
+            room=self.room, arrival_date=in_days(arrival), departure_date=in_days(arrival + nights),
+            first_name='Guest', last_name='Waiting', email='waiting@example.com', phone='0100',
+            created_at=timezone.now() - datetime.timedelta(minutes=minutes_ago),
+        )
+
+    def test_freed_nights_go_to_the_earliest_entries_that_fit(self):
+        first = self.wait_for(5, 2, minutes_ago=30)
+        overlapping = self.wait_for(6, 2, minutes_ago=20)
+        after = self.wait_for(8, 1, minutes_ago=10)
+        outside = self.wait_for(12, 1, minutes_ago=40)
+        Booking.objects.filter(pk=self.booking.pk).update(status=BookingStatus.CANCELLED)
+
+        offered = waitlist.rematch(self.room.pk, [(in_days(5), in_days(10))])
+        self.assertEqual([entry.pk for entry in offered], [first.pk, after.pk])
+        statuses = dict(WaitlistEntry.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[overlapping.pk], WaitlistStatus.WAITING)
+        self.assertEqual(statuses[outside.pk], WaitlistStatus.WAITING)
+
+        # العروض المفتوحة تحجز لياليها فلا تعرض مرة أخرى
+        self.assertEqual(waitlist.rematch(self.room.pk, [(in_days(5), in_days(10))]), [])
+
+    def test_closed_night_is_not_offered(self):
+        entry = self.wait_for(5, 2, minutes_ago=30)
+        later = self.wait_for(8, 1, minutes_ago=20)
+        RoomAvailability.objects.create(room=self.room, date=in_days(6), available_count=0)
+        Booking.objects.filter(pk=self.booking.pk).update(status=BookingStatus.CANCELLED)
+
+        offered = waitlist.rematch(self.room.pk, [(in_days(5), in_days(10))])
+        self.assertEqual([item.pk for item in offered], [later.pk])
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistStatus.WAITING)
+
+    def test_nothing_is_offered_while_the_room_is_still_booked(self):
+        self.wait_for(5, 2, minutes_ago=30)
+        self.assertEqual(waitlist.rematch(self.room.pk, [(in_days(5), in_days(10))]), [])
+
+    def offer(self):
+        entry = self.wait_for(12, 2, minutes_ago=30)
+        WaitlistEntry.objects.filter(pk=entry.pk).update(
+            status=WaitlistStatus.OFFERED, offer_token='offer-token', offered_at=timezone.now(),
+            offer_expires_at=timezone.now() + datetime.timedelta(minutes=30),
+        )
+        response = self.client.get(reverse('pages:waitlist_offer', args=['offer-token']))
+        self.assertRedirects(response, reverse('pages:booking_step3', args=[self.room.slug]),
+                             fetch_redirect_response=False)
+        return entry
+
+    def test_open_offer_is_booked(self):
+        entry = self.offer()
+        response = self.client.post(reverse('pages:booking_step3', args=[self.room.slug]), {'payment_method': 'cash'})
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistStatus.BOOKED)
+        self.assertRedirects(response, reverse('pages:booking_confirmation', args=[entry.booking.booking_number]),
+                             fetch_redirect_response=False)
+
+    def test_offer_that_closed_before_payment_is_refused(self):
+        entry = self.offer()
+        WaitlistEntry.objects.filter(pk=entry.pk).update(offer_expires_at=timezone.now())
+        response = self.client.post(reverse('pages:booking_step3', args=[self.room.slug]), {'payment_method': 'cash'})
+        self.assertRedirects(response, reverse('pages:room_details', args=[self.room.slug]),
+                             fetch_redirect_response=False)
+        self.assertEqual(Booking.objects.count(), 1)
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.booking), (WaitlistStatus.OFFERED, None))
+
+    def test_freed_ranges(self):
+        old = (in_days(1), in_days(6))
+        self.assertEqual(
+            waitlist.freed_ranges(old, (in_days(2), in_days(4))), [(in_days(1), in_days(2)), (in_days(4), in_days(6))],
+        )
+        self.assertEqual(waitlist.freed_ranges(old, (in_days(6), in_days(8))), [old])
+        self.assertEqual(waitlist.freed_ranges(old, old), [])
+
+
+class UnitAssignmentTests(TestCase):
+    def test_colour_reuses_departed_units_and_keeps_current_ones(self):
+        day = in_days(0)
+
+        def stay(booking_id, arrival, departure, current=None):
+            return booking_id, day + datetime.timedelta(days=arrival), day + datetime.timedelta(days=departure), current
+
+        assignment = units.colour([10, 20], [
+            stay(1, 0, 2), stay(2, 1, 3, current=10), stay(3, 2, 4, current=20), stay(4, 2, 3), stay(5, 3, 5),
+        ])
+        # الحجز 2 يريد الوحدة 10 المشغولة، والحجز 3 يريد 20 التي أخذها الحجز 2
+        self.assertEqual(assignment, {1: 10, 2: 20, 3: 10, 4: None, 5: 20})
+
+    def test_assign_room_gives_each_stay_one_unit(self):
+        room = make_room(total_rooms=2)
+        first, second = (RoomUnit.objects.create(room=room, number=number) for number in ('101', '102'))
+        kept = make_booking(room, in_days(1), nights=4, unit=second)
+        others = [make_booking(room, in_days(arrival), nights=2) for arrival in (1, 3, 5)]
+        make_booking(room, in_days(2), status=BookingStatus.CANCELLED)
+
+        result = units.assign_room(room.pk)
+        self.assertEqual((result.bookings, result.changed, result.unassigned), (4, 3, []))
+        assigned = dict(Booking.objects.filter(status=BookingStatus.CONFIRMED).values_list('pk', 'unit_id'))
+        self.assertEqual(assigned[kept.pk], second.pk)
+        self.assertEqual([assigned[booking.pk] for booking in others], [first.pk, first.pk, first.pk])
+
+        self.assertEqual(units.assign_room(room.pk).changed, 0)
+
+    def test_assign_booking_falls_back_to_a_room_reassignment(self):
+        room = make_room(total_rooms=2)
+        first, second = (RoomUnit.objects.create(room=room, number=number) for number in ('101', '102'))
+        make_booking(room, in_days(1), nights=2, unit=first)
+        make_booking(room, in_days(3), nights=2, unit=second)
+        # الليالي الحرة موزعة على وحدتين، فيعاد توزيع النوع كله
+        booking = make_booking(room, in_days(1), nights=4)
+        unit = units.assign_booking(booking.pk)
+        self.assertIsNotNone(unit)
+        taken = Booking.objects.exclude(pk=booking.pk).values_list('unit_id', flat=True)
+        self.assertNotIn(unit, taken)
+
+
+@override_settings(GROUP_BOOKING_API_TOKENS=['group-token'])
+class GroupBookingTests(TestCase):
+    def setUp(self):
+        self.deluxe = make_room('Deluxe', total_rooms=3)
+        self.suite = make_room('Suite', total_rooms=2, price=Decimal('250.00'))
+
+    def post(self, rooms):
+        payload = {
+            'organizer': {'first_name': 'Group', 'last_name': 'Lead', 'email': 'lead@example.com', 'phone': '0100'},
+            'arrival_date': in_days(3).isoformat(),
+            'departure_date': in_days(5).isoformat(),
+            'rooms': [{'room': slug, 'quantity': quantity} for slug, quantity in rooms],
+        }
+        return self.client.post(
+            reverse('pages:group_booking'), json.dumps(payload), content_type='application/json',
+            HTTP_AUTHORIZATION='Bearer group-token',
+        )
+
+    def test_group_is_booked_at_the_nightly_prices(self):
+        RoomAvailability.objects.create(room=self.suite, date=in_days(4), available_count=2, price_override=300)
+        response = self.post([('deluxe', 2), ('suite', 1)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_price'], '950.00')
+        group = BookingGroup.objects.get()
+        self.assertEqual(sorted(group.bookings.values_list('room__slug', 'total_price', 'payment__status')), [
+            ('deluxe', Decimal('200.00'), PaymentStatus.PENDING),
+            ('deluxe', Decimal('200.00'), PaymentStatus.PENDING),
+            ('suite', Decimal('550.00'), PaymentStatus.PENDING),
+        ])
+
+    def test_one_sold_out_night_books_nothing(self):
+        make_booking(self.deluxe, in_days(4), nights=1)
+        RoomAvailability.objects.create(room=self.suite, date=in_days(3), available_count=0)
+        for rooms in ([('deluxe', 3)], [('deluxe', 1), ('suite', 1)]):
+            with self.subTest(rooms=rooms):
+                self.assertEqual(self.post(rooms).status_code, 409)
+        self.assertFalse(BookingGroup.objects.exists())
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_missing_token_is_rejected(self):
+        response = self.client.post(reverse('pages:group_booking'), '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        room = make_room(total_rooms=5)
+        unit = RoomUnit.objects.create(room=room, number='101')
+        service = Service.objects.create(name='Spa', description='-', price=Decimal('40'), working_hours='9-5')
+        self.old = make_booking(room, in_days(-800), unit=unit)
+        Payment.objects.create(
+            booking=self.old, amount=Decimal('200.00'), method=PaymentMethod.ONLINE,
+            status=PaymentStatus.COMPLETED, transaction_id='TX-OLD',
+        )
+        ServiceBooking.objects.create(booking=self.old, service=service, quantity=2, price_at_booking=Decimal('80'))
+        Notification.objects.create(
+            booking=self.old, recipient_email=self.old.email, subject='Welcome', message='-', is_sent=True,
+        )
+        self.recent = make_booking(room, in_days(-10))
+
+    def test_archive_round_trip(self):
+        self.assertEqual(archive_bookings(months=12, dry_run=True).bookings, 1)
+        result = archive_bookings(months=12, batch_size=1)
+        self.assertEqual(
+            (result.bookings, result.payments, result.services, result.notifications), (1, 1, 1, 1),
+        )
+        self.assertFalse(Booking.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Payment.objects.filter(transaction_id='TX-OLD').exists())
+
+        archived = find_booking(self.old.booking_number)
+        self.assertIsInstance(archived, ArchivedBooking)
+        self.assertEqual(archived.pk, self.old.pk)
+        self.assertEqual((archived.room_name, archived.unit_number), ('Deluxe', '101'))
+        self.assertEqual((archived.arrival_date, archived.departure_date),
+                         (self.old.arrival_date, self.old.departure_date))
+        self.assertEqual((archived.payment.transaction_id, archived.payment.status),
+                         ('TX-OLD', PaymentStatus.COMPLETED))
+        self.assertEqual(list(archived.service_bookings.values_list('service_name', 'quantity')), [('Spa', 2)])
+        self.assertEqual(list(archived.notifications.values_list('subject', flat=True)), ['Welcome'])
+
+        self.assertEqual(find_booking(self.recent.booking_number), self.recent)
+        self.assertEqual(archive_bookings(months=12).bookings, 0)
+
+        # التسوية تتعرف على دفعات الأرشيف ولا تعدها مجهولة
+        row = SettlementRow(line=2, transaction_id='TX-OLD', booking_number='', status='refunded')
+        result = reconcile_payments([row])
+        self.assertEqual([reason for _, reason in result.mismatches], ['archived'])
+
+
+@override_settings(PROFILE_SAMPLE_VIEWS={})
+class ProfileTokenTests(TestCase):
+    def trigger(self, request):
+        request.resolver_match = mock.Mock(view_name='pages:index')
+        return ProfilingMiddleware(lambda request: None)._trigger(request)
+
+    def test_token_is_read_from_the_header_only(self):
+        factory = RequestFactory()
+        self.assertEqual(self.trigger(factory.get('/', headers={TOKEN_HEADER: make_token()})), 'token')
+        self.assertIsNone(self.trigger(factory.get('/', {'_profile': make_token()})))
+        with self.assertLogs('pages.profiling', 'WARNING'):
+            self.assertIsNone(self.trigger(factory.get('/', headers={TOKEN_HEADER: 'forged'})))
+
+
+class MetricsDumpTests(SimpleTestCase):
+    def test_scrape_merges_live_dumps_and_prunes_dead_ones(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as directory:
+            worker = Registry(directory)
+            worker.record('pages:index', 0.01, Trace())
+            snapshot = json.dumps(worker.snapshot())
+            names = {
+                'dead': f'{exited.pid}-1.json',
+                'same_pid_earlier': f'{os.getpid()}-1.json',
+                'parent_earlier': f'{os.getppid()}-1.json',
+                'parent': f'{os.getppid()}-2.json',
+                'legacy': f'{os.getppid()}.json',
+            }
+            for name in names.values():
+                with open(os.path.join(directory, name), 'w', encoding='utf-8') as fh:
+                    fh.write(snapshot)
+
+            scraper = Registry(directory)
+            requests, _, _ = scraper.collect()
+            self.assertEqual(requests['pages:index'].count, 1)
+            self.assertEqual(sorted(os.listdir(directory)), [names['parent']])
+
+            scraper.dump()
+            self.assertEqual(scraper.collect()[0]['pages:index'].count, 1)
+            self.assertEqual(sorted(os.listdir(directory)), sorted([names['parent'], scraper.own_filename()]))
+
+
+class ReferenceDataStatsTests(TestCase):
+    url = reverse('pages:reference_data_stats')
+
+    def test_anonymous_user_goes_to_the_admin_login(self):
+        response = self.client.get(self.url)
+        self.assertRedirects(response, f"{reverse('admin:login')}?next={self.url}", fetch_redirect_response=False)
+
+    @override_settings(SERVE_ADMIN=False)
+    def test_without_the_admin_anonymous_user_gets_403(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(SERVE_ADMIN=False)
+    def test_staff_sees_the_stats(self):
+        self.client.force_login(get_user_model().objects.create_user('staff', is_staff=True))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), reference_data.stats())
+
+
+class OccupancyTests(TestCase):
+    def setUp(self):
+        self.room = make_room(total_rooms=3)
+        patcher = mock.patch.object(occupancy.service, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, occupancy.service, 'expires_at', 0.0)
+
+    def test_calendar_counts_bookings_offers_and_closed_nights(self):
+        closed = make_room('Closed', is_active=False)
+        make_booking(self.room, in_days(1), nights=3)
+        make_booking(self.room, in_days(2), status=BookingStatus.CANCELLED)
+        WaitlistEntry.objects.create(
+            room=self.room, arrival_date=in_days(2), departure_date=in_days(3), first_name='Guest',
+            last_name='Waiting', email='waiting@example.com', phone='0100', status=WaitlistStatus.OFFERED,
+            offer_token='held', offer_expires_at=timezone.now() + datetime.timedelta(minutes=30),
+        )
+        RoomAvailability.objects.create(room=self.room, date=in_days(4), available_count=1)
+
+        calendars = occupancy.load_calendars(in_days(0), 6)
+        self.assertEqual(list(calendars[self.room.pk].free), [3, 2, 1, 2, 1, 3])
+        self.assertEqual(list(calendars[closed.pk].free), [0] * 6)
+        self.assertEqual(calendars[self.room.pk].free_units(in_days(1), in_days(4)), 1)
+        self.assertIsNone(calendars[self.room.pk].free_units(in_days(5), in_days(7)))
+
+    def test_signals_move_the_loaded_calendar(self):
+        occupancy.service.reload()
+        free = lambda: occupancy.service.free_units(self.room.pk, in_days(1), in_days(3))
+        self.assertEqual(free(), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = make_booking(self.room, in_days(1))
+        self.assertEqual(free(), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = BookingStatus.CANCELLED
+            booking.save()
+        self.assertEqual(free(), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            RoomAvailability.objects.create(room=self.room, date=in_days(2), available_count=0)
+        self.assertIn(self.room.pk, occupancy.service._stale)
+        self.assertEqual(free(), 0)
+
+    def test_expired_window_is_reloaded_once(self):
+        calls = []
+
+        def slow_load(start, days, room_ids=None):
+            calls.append(start)
+            time.sleep(0.05)
+            return {}
+
+        occupancy.service.expires_at = 0.0
+        with mock.patch('pages.occupancy.load_calendars', side_effect=slow_load):
+            threads = [
+                threading.Thread(target=occupancy.service.free_units, args=(self.room.pk, in_days(1), in_days(2)))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def step1(self, arrival, nights):
+        return self.client.post(reverse('pages:booking_step1', args=[self.room.slug]), {
+            'arrival_date': in_days(arrival).isoformat(),
+            'departure_date': in_days(arrival + nights).isoformat(),
+            'number_of_adults': 1, 'number_of_children': 0,
+        })
+
+    def test_sold_out_stay_goes_to_the_waitlist(self):
+        for _ in range(3):
+            make_booking(self.room, in_days(2))
+        occupancy.service.reload()
+        with mock.patch.object(Booking, 'clean', autospec=True, side_effect=Booking.clean) as clean:
+            self.assertRedirects(self.step1(2, 2), reverse('pages:waitlist_join', args=[self.room.slug]),
+                                 fetch_redirect_response=False)
+            self.assertEqual(clean.call_count, 1)
+            self.assertRedirects(self.step1(5, 2), reverse('pages:booking_step2', args=[self.room.slug]),
+                                 fetch_redirect_response=False)
+            self.assertEqual(clean.call_count, 1)
+
+    def test_stay_past_the_window_falls_back_to_the_database(self):
+        occupancy.service.reload()
+        horizon = occupancy.service.horizon_days
+        self.assertIsNone(occupancy.service.free_units(self.room.pk, in_days(horizon - 1), in_days(horizon + 1)))
+        for _ in range(3):
+            make_booking(self.room, in_days(horizon))
+        self.assertRedirects(self.step1(horizon - 1, 2), reverse('pages:waitlist_join', args=[self.room.slug]),
+                             fetch_redirect_response=False)
+
+
+class ConditionalPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_matching_etag_gets_304_until_the_version_moves(self):
+        url = reverse('pages:services')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        reference_data.invalidate('services')
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_booking_moves_the_catalog_etag_once_paid(self):
+        room = make_room(total_rooms=3)
+        url = reverse('pages:room_catalog')
+        etag = self.client.get(url)['ETag']
+
+        # الحجز غير المدفوع لا يغير available_rooms فتبقى النسخة المخزنة صالحة
+        booking = make_booking(room, in_days(3))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Payment.objects.create(
+            booking=booking, amount=booking.total_price, method=PaymentMethod.CASH, status=PaymentStatus.PENDING,
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        booking.payment.status = PaymentStatus.COMPLETED
+        booking.payment.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pending_message_skips_the_304(self):
+        view = conditional_page(lambda request: (('fixed',), None))(lambda request: HttpResponse('page'))
+        etag = view(RequestFactory().get('/'))['ETag']
+
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH=etag)
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        messages.info(request, 'saved')
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_private_page_is_keyed_on_the_csrf_cookie(self):
+        url = reverse('club:facilities')
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        first = self.client.get(url)
+        self.assertIn('private', first['Cache-Control'])
+        self.assertNotIn('public', first['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'b' * 32
+        other = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other.status_code, 200)
+        self.assertNotEqual(other['ETag'], first['ETag'])
+
+
+LEAN_WORKER = {'SERVE_ADMIN': 'False', 'LAZY_BOOT': 'True', 'PREWARM_ON_BOOT': 'True'}
+
+FIRST_USE = """
+import sys
+import django
+django.setup()
+deferred = [name for name in ('pages.admin', 'club.admin') if name in sys.modules]
+assert not deferred, deferred
+
+from django.urls import NoReverseMatch, reverse
+from django.utils.module_loading import import_string
+from django.conf import settings
+from project import startup
+startup.load_urlconf()
+startup.load_templates()
+for path in settings.PREWARM_HOOKS:
+    assert callable(import_string(path)), path
+reverse('pages:room_list')
+try:
+    reverse('admin:index')
+except NoReverseMatch:
+    pass
+else:
+    raise AssertionError('admin URLs are served')
+
+import club.admin
+import pages.admin
+from django.contrib import admin
+assert admin.site.is_registered(pages.admin.Booking)
+print('ok')
+"""
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_profile_records_every_boot_phase(self):
+        stdout = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ, LEAN_WORKER):
+            record = os.path.join(directory, 'boot.jsonl')
+            call_command('startup_profile', runs=1, top=3, record=record, label='smoke', stdout=stdout)
+            with open(record, encoding='utf-8') as fh:
+                line = json.loads(fh.read())
+        self.assertIn('Boot', stdout.getvalue())
+        self.assertEqual(line['label'], 'smoke')
+        self.assertEqual(
+            set(line['phases']), {'django', 'settings', 'apps', 'middleware', 'prewarm', 'urlconf'},
+        )
+        self.assertLessEqual({'pages', 'club'}, set(line['apps']))
+
+    def test_deferred_modules_still_load_on_first_use(self):
+        process = subprocess.run(
+            [sys.executable, '-c', FIRST_USE], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, env={**os.environ, **LEAN_WORKER},
+        )
+        self.assertEqual(process.returncode, 0, process.stderr[-2000:])
+        self.assertEqual(process.stdout.strip(), 'ok')
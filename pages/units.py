@@ -0,0 +1,162 @@
+"""
+Assigning bookings to physical room units.
+
+A ``Room`` is a room type with ``total_rooms`` units (``RoomUnit``). Giving
+each booking a unit is interval-graph colouring: walk the stays in
+arrival order, return units to a min-heap as guests depart and hand each
+arrival the lowest free unit. As long as no night is sold beyond the
+number of units, every stay gets a single unit from arrival to departure,
+so nobody changes rooms mid-stay. A booking keeps the unit it already has
+whenever that unit is free on arrival, so a re-run leaves most
+assignments where housekeeping last saw them.
+"""
+import datetime
+import heapq
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import background
+from .models import Booking, BookingStatus, RoomUnit
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH = 500
+
+
+@dataclass
+class AssignmentResult:
+    room_id: int
+    bookings: int = 0
+    changed: int = 0
+    unassigned: list = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def colour(units, stays):
+    """
+    Assign ``units`` (ids, in preference order) to ``stays``.
+
+    ``stays`` are ``(booking_id, arrival, departure, current_unit_id)``
+    sorted by arrival. Returns ``{booking_id: unit_id or None}``. ``None``
+    means the night was oversold and no unit was free for the whole stay.
+    """
+    rank = {unit: position for position, unit in enumerate(units)}
+    free = list(range(len(units)))
+    is_free = [True] * len(units)
+    busy = []
+    assignment = {}
+
+    for booking_id, arrival, departure, current in stays:
+        while busy and busy[0][0] <= arrival:
+            _, position = heapq.heappop(busy)
+            is_free[position] = True
+            heapq.heappush(free, position)
+
+        position = rank.get(current)
+        if position is None or not is_free[position]:
+            # الوحدات المأخوذة بالتفضيل تبقى في الكومة وتحذف هنا عند ظهورها
+            while free and not is_free[free[0]]:
+                heapq.heappop(free)
+            if not free:
+                assignment[booking_id] = None
+                continue
+            position = heapq.heappop(free)
+
+        is_free[position] = False
+        heapq.heappush(busy, (departure, position))
+        assignment[booking_id] = units[position]
+    return assignment
+
+
+def assign_room(room_id, start=None, days=365):
+    """
+    Re-assign every confirmed booking of one room type that is in house or arrives within ``days``.
+
+    Only bookings whose unit changes are written, one ``UPDATE`` per unit.
+    """
+    started = time.perf_counter()
+    start = start or timezone.localdate()
+    end = start + datetime.timedelta(days=days)
+    result = AssignmentResult(room_id)
+
+    with transaction.atomic():
+        units = list(
+            RoomUnit.objects.select_for_update()
+            .filter(room_id=room_id, is_active=True)
+            .values_list('pk', flat=True)
+        )
+        if not units:
+            # نوع غرفة لم تسجل وحداته بعد: لا شيء يوزع
+            return result
+        stays = list(
+            Booking.objects
+            .filter(room_id=room_id, status=BookingStatus.CONFIRMED, departure_date__gt=start, arrival_date__lt=end)
+            .order_by('arrival_date', 'departure_date', 'pk')
+            .values_list('pk', 'arrival_date', 'departure_date', 'unit_id')
+        )
+        result.bookings = len(stays)
+        assignment = colour(units, stays)
+
+        moves = defaultdict(list)
+        for booking_id, _, _, current in stays:
+            if assignment[booking_id] != current:
+                moves[assignment[booking_id]].append(booking_id)
+        # تحديث واحد لكل وحدة بدلاً من CASE ضخم؛ update() لا يطلق الإشارات فلا تتكرر الإعادة
+        for unit, booking_ids in moves.items():
+            for offset in range(0, len(booking_ids), UPDATE_BATCH):
+                Booking.objects.filter(pk__in=booking_ids[offset:offset + UPDATE_BATCH]).update(unit_id=unit)
+
+    result.changed = sum(len(booking_ids) for booking_ids in moves.values())
+    result.unassigned = [booking_id for booking_id, unit in assignment.items() if unit is None]
+    result.seconds = time.perf_counter() - started
+    if result.unassigned:
+        logger.warning('Room %s is oversold: %d bookings without a unit', room_id, len(result.unassigned))
+    return result
+
+
+def assign_booking(booking_id):
+    """
+    Give one new or changed booking a unit without touching the others.
+
+    The booking keeps its unit if that unit is still free for the whole
+    stay; otherwise it takes the first unit free for every night. If the
+    free nights are spread over different units, the room type is
+    re-assigned from today.
+    """
+    with transaction.atomic():
+        booking = Booking.objects.select_for_update().filter(pk=booking_id, status=BookingStatus.CONFIRMED).first()
+        if booking is None:
+            return None
+        taken = set(
+            Booking.objects
+            .filter(
+                room_id=booking.room_id,
+                status=BookingStatus.CONFIRMED,
+                unit__isnull=False,
+                arrival_date__lt=booking.departure_date,
+                departure_date__gt=booking.arrival_date,
+            )
+            .exclude(pk=booking.pk)
+            .values_list('unit_id', flat=True)
+        )
+        units = list(
+            RoomUnit.objects.filter(room_id=booking.room_id, is_active=True).values_list('pk', flat=True)
+        )
+        if booking.unit_id in units and booking.unit_id not in taken:
+            return booking.unit_id
+        unit = next((unit for unit in units if unit not in taken), None)
+        if unit is not None:
+            Booking.objects.filter(pk=booking.pk).update(unit_id=unit)
+            return unit
+
+    assign_room(booking.room_id)
+    return Booking.objects.filter(pk=booking_id).values_list('unit_id', flat=True).first()
+
+
+def schedule_assignment(booking_id):
+    transaction.on_commit(lambda: background.submit(assign_booking, booking_id))
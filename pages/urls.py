@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import room_list, room_details, booking_step1, booking_step2, booking_step3, booking_confirmation, services
+from .views import room_list, room_details, booking_step1, booking_step2, booking_step3, booking_confirmation, services, contact, reference_data_stats, waitlist_join, waitlist_offer
+from .webhooks import payment_webhook
+from .api import room_catalog, room_search
+from .groups import group_booking
 
 
 app_name = 'pages'
@@ -10,6 +13,14 @@ urlpatterns = [
     path('booking-step1/<slug:slug>/', booking_step1, name='booking_step1'),
     path('booking-step2/<slug:slug>/', booking_step2, name='booking_step2'),
     path('booking-step3/<slug:slug>/', booking_step3, name='booking_step3'),
+    path('waitlist/<slug:slug>/', waitlist_join, name='waitlist_join'),
+    path('waitlist/offer/<str:token>/', waitlist_offer, name='waitlist_offer'),
     path('booking-confirmation/<str:booking_number>/', booking_confirmation, name='booking_confirmation'),
     path('services/', services, name='services'),
+    path('contact/', contact, name='contact'),
+    path('internal/reference-data/', reference_data_stats, name='reference_data_stats'),
+    path('webhooks/payments/', payment_webhook, name='payment_webhook'),
+    path('api/rooms/', room_catalog, name='room_catalog'),
+    path('api/rooms/search/', room_search, name='room_search'),
+    path('api/group-bookings/', group_booking, name='group_booking'),
 ]
\ No newline at end of file
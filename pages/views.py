@@ -1,20 +1,57 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, JsonResponse
+from django.contrib.auth.views import redirect_to_login
 from django.contrib import messages
 from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.db.models import Count, Max
 from datetime import datetime
 from decimal import Decimal
-from .models import Room, Booking, Payment, Nationality, PaymentStatus, RoomAmenity, Service, Contact
+from .models import Room, Booking, Payment, PaymentStatus, RoomAmenity, Contact, WaitlistEntry, WaitlistStatus
+from .forms import ContactForm
+from .ratelimit import client_ip, take_token
+from .writebehind import WriteBehindQueue
+from .refdata import reference_data
+from .conditional import conditional_page
+from .archive import find_booking
+from . import occupancy
 from django.core.mail import send_mail, BadHeaderError
 from datetime import datetime
 from smtplib import SMTPException
 
+# رسائل التواصل تكتب على دفعات حتى لا تزاحم الحجوزات على قاعدة البيانات
+contact_queue = WriteBehindQueue(
+    Contact,
+    flush_interval=settings.CONTACT_FLUSH_MS / 1000,
+    flush_size=settings.CONTACT_FLUSH_ROWS,
+    max_pending=settings.CONTACT_MAX_PENDING,
+)
+
+def _room_list_stamp(request):
+    # عدد الغرف يكشف الحذف الذي لا يغير أحدث updated_at
+    stamp = Room.objects.aggregate(latest=Max('updated_at'), count=Count('id'))
+    return (stamp['count'], stamp['latest']), stamp['latest']
+
+
+def _room_details_stamp(request, slug):
+    room = Room.objects.filter(slug=slug).values_list('pk', 'updated_at').first()
+    return (room, room[1]) if room else None
+
+
+def _services_stamp(request):
+    return reference_data.version('services'), None
+
+
+@conditional_page(_room_list_stamp)
 def room_list(request):
     room_list = Room.objects.all()
-    return render(request, 'pages/rooms.html', {'room_list': room_list})
+    return render(request, 'pages/rooms.html', {'room_list': room_list}, using=settings.HOT_TEMPLATE_ENGINE)
 
 
+@conditional_page(_room_details_stamp)
 def room_details(request, slug):
     room = get_object_or_404(Room, slug=slug)
     room_amenities = RoomAmenity.objects.filter(room=room)
@@ -22,7 +59,7 @@ def room_details(request, slug):
                   {
                       'room': room,
                       'room_amenities': room_amenities,
-                  })
+                  }, using=settings.HOT_TEMPLATE_ENGINE)
 
 def booking_step1(request, slug):
     room = get_object_or_404(Room, slug=slug, is_active=True)
@@ -35,6 +72,20 @@ def booking_step1(request, slug):
             'number_of_children': request.POST.get('number_of_children'),
             'special_requests': request.POST.get('special_requests', ''),
         }
+        try:
+            arrival = datetime.strptime(request.POST.get('arrival_date', ''), '%Y-%m-%d').date()
+            departure = datetime.strptime(request.POST.get('departure_date', ''), '%Y-%m-%d').date()
+            # تقويم الذاكرة يجيب فوراً؛ قاعدة البيانات تؤكد فقط حين يبدو أن الغرف نفدت
+            free = occupancy.service.free_units(room.pk, arrival, departure)
+            if free is None or free <= 0:
+                Booking(room=room, arrival_date=arrival, departure_date=departure).clean()
+        except ValidationError as error:
+            # الغرفة محجوزة بالكامل: نعرض على النزيل قائمة الانتظار بدلاً من خسارته
+            if error.code == 'sold_out':
+                messages.info(request, 'لا توجد غرف متاحة في هذه الفترة، يمكنك التسجيل في قائمة الانتظار')
+                return redirect('pages:waitlist_join', slug=slug)
+        except ValueError:
+            pass
         return redirect('pages:booking_step2', slug=slug)
     
     return render(request, 'pages/booking_step1.html', {
@@ -63,7 +114,7 @@ def booking_step2(request, slug):
     
     return render(request, 'pages/booking_step2.html', {
         'room': room,
-        'nationalities': Nationality.objects.all()
+        'nationalities': reference_data.get('nationalities')
     })
 
 
@@ -85,6 +136,19 @@ def booking_step3(request, slug):
     if request.method == 'POST':
         try:
             with transaction.atomic():
+                # عرض قائمة الانتظار يقفل ويعاد فحصه: بعد انتهاء مهلته قد تكون لياليه عرضت على غيره
+                offer = None
+                offer_token = request.session.get('waitlist_offer')
+                if offer_token:
+                    offer = WaitlistEntry.objects.select_for_update().filter(
+                        offer_token=offer_token, room=room, arrival_date=arrival, departure_date=departure,
+                    ).first()
+                if offer is not None and not offer.offer_is_open:
+                    request.session.pop('waitlist_offer', None)
+                    del request.session['booking_data']
+                    messages.error(request, 'انتهت صلاحية هذا العرض')
+                    return redirect('pages:room_details', slug=room.slug)
+
                 # إنشاء الحجز
                 booking = Booking.objects.create(
                     room=room,
@@ -109,6 +173,11 @@ def booking_step3(request, slug):
                     status=PaymentStatus.PENDING
                 )
                 
+                # الحجز من عرض قائمة الانتظار يغلق العرض
+                request.session.pop('waitlist_offer', None)
+                if offer is not None:
+                    WaitlistEntry.objects.filter(pk=offer.pk).update(status=WaitlistStatus.BOOKED, booking=booking)
+                
                 # ==== إرسال الإيميل الجميل ====
                 send_booking_email(booking, nights, total_price)
                 
@@ -129,6 +198,65 @@ def booking_step3(request, slug):
     })
 
 
+def waitlist_join(request, slug):
+    room = get_object_or_404(Room, slug=slug, is_active=True)
+    booking_data = request.session.get('booking_data', {})
+
+    if request.method == 'POST':
+        entry = WaitlistEntry(
+            room=room,
+            number_of_adults=request.POST.get('number_of_adults') or 1,
+            number_of_children=request.POST.get('number_of_children') or 0,
+            first_name=request.POST.get('first_name', ''),
+            last_name=request.POST.get('last_name', ''),
+            email=request.POST.get('email', ''),
+            phone=request.POST.get('phone', ''),
+        )
+        try:
+            entry.arrival_date = datetime.strptime(request.POST.get('arrival_date', ''), '%Y-%m-%d').date()
+            entry.departure_date = datetime.strptime(request.POST.get('departure_date', ''), '%Y-%m-%d').date()
+            entry.full_clean()
+        except ValueError:
+            messages.error(request, 'يرجى إدخال تواريخ صحيحة')
+        except ValidationError as error:
+            for message in error.messages:
+                messages.error(request, message)
+        else:
+            entry.save()
+            messages.success(request, 'تمت إضافتك إلى قائمة الانتظار، سنراسلك فور توفر غرفة')
+            return redirect('pages:room_details', slug=slug)
+        booking_data = request.POST
+
+    return render(request, 'pages/waitlist_join.html', {
+        'room': room,
+        'booking_data': booking_data,
+        'today': timezone.now(),
+    })
+
+
+def waitlist_offer(request, token):
+    entry = get_object_or_404(WaitlistEntry.objects.select_related('room'), offer_token=token)
+    if not entry.offer_is_open:
+        messages.error(request, 'انتهت صلاحية هذا العرض')
+        return redirect('pages:room_details', slug=entry.room.slug)
+
+    # بيانات العرض تملأ خطوات الحجز فيصل النزيل مباشرة إلى الدفع
+    request.session['booking_data'] = {
+        'arrival_date': entry.arrival_date.isoformat(),
+        'departure_date': entry.departure_date.isoformat(),
+        'number_of_adults': entry.number_of_adults,
+        'number_of_children': entry.number_of_children,
+        'special_requests': '',
+        'first_name': entry.first_name,
+        'last_name': entry.last_name,
+        'email': entry.email,
+        'phone': entry.phone,
+        'nationality': '',
+    }
+    request.session['waitlist_offer'] = token
+    return redirect('pages:booking_step3', slug=entry.room.slug)
+
+
 def send_booking_email(booking, nights, total_price):
     
     subject = f'✅ تأكيد حجزك في Grand Royal | رقم الحجز: {booking.booking_number}'
@@ -202,7 +330,10 @@ def send_booking_email(booking, nights, total_price):
 
 
 def booking_confirmation(request, booking_number):
-    booking = get_object_or_404(Booking, booking_number=booking_number)
+    # الحجوزات القديمة تقرأ من الأرشيف
+    booking = find_booking(booking_number)
+    if booking is None:
+        raise Http404
     nights = (booking.departure_date - booking.arrival_date).days
     total_price = booking.total_price or Decimal('0')
     tax_price =  15
@@ -219,9 +350,41 @@ def booking_confirmation(request, booking_number):
                    'nights': nights
                    })
 
+@conditional_page(_services_stamp)
 def services(request):
-    services = Service.objects.filter(is_active=True).prefetch_related('details')
+    services = reference_data.get('services')
     context = {
         'services': services
     }
-    return render(request, 'pages/services.html', context)
\ No newline at end of file
+    return render(request, 'pages/services.html', context, using=settings.HOT_TEMPLATE_ENGINE)
+
+def contact(request):
+    form = ContactForm()
+    if request.method == 'POST':
+        allowed = take_token(
+            f'contact-rate:{client_ip(request)}',
+            rate=settings.CONTACT_RATE_PER_MINUTE / 60,
+            burst=settings.CONTACT_RATE_BURST,
+        )
+        if not allowed:
+            messages.error(request, 'عدد كبير من الرسائل، حاول مرة أخرى بعد قليل')
+            return render(request, 'pages/contact.html', {'form': form}, status=429)
+
+        form = ContactForm(request.POST)
+        if form.is_valid():
+            if contact_queue.put(form.save(commit=False)):
+                messages.success(request, 'تم إرسال رسالتك بنجاح! سنتواصل معك قريباً')
+                return redirect('pages:contact')
+            messages.error(request, 'الخدمة مشغولة حالياً، حاول مرة أخرى بعد قليل')
+            return render(request, 'pages/contact.html', {'form': form}, status=503)
+
+    return render(request, 'pages/contact.html', {'form': form})
+
+
+def reference_data_stats(request):
+    if not (request.user.is_active and request.user.is_staff):
+        if settings.SERVE_ADMIN:
+            return redirect_to_login(request.get_full_path(), reverse('admin:login'))
+        # بدون لوحة الإدارة لا توجد صفحة دخول يعاد التوجيه إليها
+        return JsonResponse({'error': 'staff only'}, status=403)
+    return JsonResponse(reference_data.stats())
@@ -0,0 +1,224 @@
+"""
+Waitlist matching.
+
+Guests who find a room sold out register the stay they want. When a
+booking is cancelled, deleted or moved, ``rematch`` finds the waiting
+entries that overlap the freed nights through a per-room interval index,
+checks them in arrival order against what the room still has free
+(confirmed bookings plus open offers) and sends a time-limited offer to
+each one that fits.
+"""
+import datetime
+import logging
+import secrets
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+
+from . import background, channels, occupancy
+from .models import Room, WaitlistEntry, WaitlistStatus
+from .modifications import free_rooms, stay_nights
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'waitlist:{}:version'
+
+
+class IntervalIndex:
+    """
+    Half-open ``[start, end)`` stays, searchable by overlap.
+
+    Stays are grouped into length classes (powers of two nights) and each
+    class is sorted by start. Inside a class no stay is longer than
+    ``longest``, so every stay overlapping ``[start, end)`` begins in
+    ``(start - longest, end)`` and two bisects bound the scan. A handful
+    of long stays only widens the window for their own class.
+    """
+
+    def __init__(self, items):
+        classes = defaultdict(list)
+        for start, end, key in items:
+            classes[(end - start).days.bit_length()].append((start, end, key))
+        self._classes = []
+        for members in classes.values():
+            members.sort()
+            longest = max(end - start for start, end, _ in members)
+            self._classes.append(([start for start, _, _ in members], members, longest))
+        self.size = sum(len(members) for members in classes.values())
+
+    def __len__(self):
+        return self.size
+
+    def overlapping(self, start, end):
+        for starts, members, longest in self._classes:
+            for position in range(bisect_right(starts, start - longest), bisect_left(starts, end)):
+                _, member_end, key = members[position]
+                if member_end > start:
+                    yield key
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _version(room_id):
+    return cache.get_or_set(VERSION_KEY.format(room_id), 1, None)
+
+
+def invalidate(room_id):
+    """Make every worker rebuild ``room_id``'s index on its next pass."""
+    try:
+        cache.incr(VERSION_KEY.format(room_id))
+    except ValueError:
+        cache.set(VERSION_KEY.format(room_id), 2, None)
+    with _indexes_lock:
+        _indexes.pop(room_id, None)
+
+
+def room_index(room_id, today):
+    """The waiting entries of one room that can still arrive, cached per process until the room's version moves."""
+    stamp = (_version(room_id), today)
+    cached = _indexes.get(room_id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    index = IntervalIndex(
+        WaitlistEntry.objects
+        .filter(room_id=room_id, status=WaitlistStatus.WAITING, arrival_date__gte=today)
+        .values_list('arrival_date', 'departure_date', 'id')
+    )
+    with _indexes_lock:
+        _indexes[room_id] = (stamp, index)
+    return index
+
+
+def freed_ranges(old, new):
+    """Nights of the ``old`` stay that the ``new`` one no longer covers, as at most two ranges."""
+    (old_start, old_end), (new_start, new_end) = old, new
+    if new_start >= old_end or new_end <= old_start:
+        return [old]
+    ranges = []
+    if old_start < new_start:
+        ranges.append((old_start, new_start))
+    if new_end < old_end:
+        ranges.append((new_end, old_end))
+    return ranges
+
+
+def rematch(room_id, freed):
+    """
+    Offer the ``freed`` ``(arrival, departure)`` ranges of one room to its waitlist.
+
+    Candidates come from the interval index, so the pass touches only the
+    entries that overlap the freed nights. They are served first come,
+    first served; an entry gets an offer only if every night of its stay
+    is free. Returns the entries that were offered.
+    """
+    today = timezone.localdate()
+    index = room_index(room_id, today)
+    candidates = set()
+    for start, end in freed:
+        if end > today:
+            candidates.update(index.overlapping(max(start, today), end))
+    if not candidates:
+        return []
+
+    with transaction.atomic():
+        room = Room.objects.select_for_update().get(pk=room_id)
+        entries = list(
+            WaitlistEntry.objects
+            .filter(pk__in=candidates, status=WaitlistStatus.WAITING)
+            .order_by('created_at', 'pk')
+        )
+        if not entries:
+            return []
+        # نفس حساب السعة في الحجز والتعديل: تقويم RoomAvailability ثم الحجوزات والعروض المفتوحة
+        nights = set()
+        for entry in entries:
+            nights |= stay_nights(entry.arrival_date, entry.departure_date)
+        free = free_rooms(room, sorted(nights))
+
+        now = timezone.now()
+        offered = []
+        for entry in entries:
+            nights = stay_nights(entry.arrival_date, entry.departure_date)
+            if all(free[night] > 0 for night in nights):
+                for night in nights:
+                    free[night] -= 1
+                entry.status = WaitlistStatus.OFFERED
+                entry.offer_token = secrets.token_urlsafe(32)
+                entry.offered_at = now
+                entry.offer_expires_at = now + datetime.timedelta(minutes=settings.WAITLIST_OFFER_MINUTES)
+                offered.append(entry)
+
+        if offered:
+            WaitlistEntry.objects.bulk_update(offered, ['status', 'offer_token', 'offered_at', 'offer_expires_at'])
+            # العروض المفتوحة تحجز الليالي فتنقص ما تعرضه القنوات
+            channels.mark_changed_many(
+                (room_id, entry.arrival_date, entry.departure_date) for entry in offered
+            )
+            offered_ids = [entry.pk for entry in offered]
+            transaction.on_commit(lambda: invalidate(room_id))
+            occupancy.schedule_reload(room_id)
+            transaction.on_commit(lambda: background.submit(send_offers, offered_ids))
+    return offered
+
+
+def schedule_rematch(room_id, freed):
+    """Run ``rematch`` off the request path once the surrounding transaction commits."""
+    if freed:
+        transaction.on_commit(lambda: background.submit(rematch, room_id, freed))
+
+
+def expire_offers():
+    """Close offers past their time limit and pass their nights on. Returns how many expired."""
+    expired = list(
+        WaitlistEntry.objects
+        .filter(status=WaitlistStatus.OFFERED, offer_expires_at__lte=timezone.now())
+        .values_list('pk', 'room_id', 'arrival_date', 'departure_date')
+    )
+    if not expired:
+        return 0
+    WaitlistEntry.objects.filter(pk__in=[pk for pk, *_ in expired]).update(status=WaitlistStatus.EXPIRED)
+    channels.mark_changed_many(stay for _, *stay in expired)
+
+    freed = defaultdict(list)
+    for _, room_id, arrival, departure in expired:
+        freed[room_id].append((arrival, departure))
+    for room_id, ranges in freed.items():
+        invalidate(room_id)
+        occupancy.service.mark_stale(room_id)
+        rematch(room_id, ranges)
+    return len(expired)
+
+
+def send_offers(entry_ids):
+    entries = list(WaitlistEntry.objects.filter(pk__in=entry_ids).select_related('room'))
+    subject_template = get_template('pages/emails/waitlist_offer_subject.txt')
+    body_template = get_template('pages/emails/waitlist_offer.txt')
+    connection = get_connection()
+    messages = []
+    for entry in entries:
+        context = {
+            'entry': entry,
+            'offer_url': settings.SITE_URL.rstrip('/') + reverse('pages:waitlist_offer', args=[entry.offer_token]),
+        }
+        messages.append(EmailMessage(
+            ' '.join(subject_template.render(context).split()),
+            body_template.render(context),
+            settings.DEFAULT_FROM_EMAIL,
+            [entry.email],
+            connection=connection,
+        ))
+    try:
+        return connection.send_messages(messages) or 0
+    except Exception:
+        logger.exception('Could not send %d waitlist offers', len(messages))
+        return 0
@@ -0,0 +1,165 @@
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from . import background
+from .models import Notification, Payment, PaymentStatus, PaymentWebhookEvent
+from .reconciliation import ALLOWED_TRANSITIONS, SETTLEMENT_STATUSES
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'HTTP_X_WEBHOOK_SIGNATURE'
+
+# الحالات التي يمكن الانتقال منها إلى كل حالة
+SOURCE_STATUSES = {
+    target: [source for source, targets in ALLOWED_TRANSITIONS.items() if target in targets]
+    for target in PaymentStatus.values
+}
+
+
+def sign_payload(body, secret=None):
+    secret = secret if secret is not None else settings.PAYMENT_WEBHOOK_SECRET
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f'sha256={digest}'
+
+
+def verify_signature(body, signature):
+    if not settings.PAYMENT_WEBHOOK_SECRET or not signature:
+        return False
+    return hmac.compare_digest(sign_payload(body), signature)
+
+
+def _parse_events(payload):
+    events = payload.get('events') if isinstance(payload, dict) else None
+    if not isinstance(events, list):
+        raise ValueError('events must be a list')
+    parsed = {}
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError('each event must be an object')
+        event_id = str(event.get('id') or '').strip()
+        status = SETTLEMENT_STATUSES.get(str(event.get('status') or '').strip().lower())
+        transaction_id = str(event.get('transaction_id') or '').strip()
+        booking_number = str(event.get('booking_number') or '').strip()
+        if not event_id or status is None or not (transaction_id or booking_number):
+            raise ValueError(f'invalid event: {event!r}')
+        # المزود قد يكرر نفس الحدث داخل الدفعة الواحدة
+        parsed[event_id] = PaymentWebhookEvent(
+            event_id=event_id,
+            status=status,
+            transaction_id=transaction_id,
+            booking_number=booking_number,
+        )
+    return list(parsed.values())
+
+
+def _claim_new_events(events):
+    """Record events in the idempotency table and return only the unseen ones."""
+    seen = set(
+        PaymentWebhookEvent.objects
+        .filter(event_id__in=[event.event_id for event in events])
+        .values_list('event_id', flat=True)
+    )
+    fresh = [event for event in events if event.event_id not in seen]
+    PaymentWebhookEvent.objects.bulk_create(fresh, ignore_conflicts=True)
+    return fresh
+
+
+def _apply_event(event, now):
+    """
+    Move the payment to the event status with one conditional UPDATE.
+
+    The status guard makes the update idempotent on its own: a replayed or
+    out-of-order event matches no rows, so follow-up work runs at most once.
+    A payment created without a transaction id (booking_step3, group
+    bookings) is matched by booking number and gets the event's id in the
+    same UPDATE.
+    """
+    payments = Payment.objects.filter(status__in=SOURCE_STATUSES[event.status])
+    changes = {'status': event.status}
+    if event.status == PaymentStatus.COMPLETED:
+        changes['paid_at'] = Coalesce('paid_at', Value(now))
+    if event.transaction_id:
+        if payments.filter(transaction_id=event.transaction_id).update(**changes):
+            return True
+        if not event.booking_number:
+            return False
+        # أول حدث لدفعة جديدة: رقم العملية لم يسجل بعد
+        payments = payments.filter(transaction_id='')
+        changes['transaction_id'] = event.transaction_id
+    return payments.filter(booking__booking_number=event.booking_number).update(**changes) > 0
+
+
+def send_payment_notification(event_id):
+    event = PaymentWebhookEvent.objects.get(event_id=event_id)
+    payments = Payment.objects.select_related('booking')
+    payment = None
+    if event.transaction_id:
+        payment = payments.filter(transaction_id=event.transaction_id).first()
+    if payment is None and event.booking_number:
+        payment = payments.filter(booking__booking_number=event.booking_number).first()
+    if payment is None:
+        return
+
+    booking = payment.booking
+    subject = f'تحديث حالة الدفع | رقم الحجز: {booking.booking_number}'
+    message = (
+        f'أهلاً {booking.first_name} {booking.last_name}\n\n'
+        f'حالة الدفع لحجزك رقم {booking.booking_number} أصبحت: {payment.get_status_display()}\n'
+        f'المبلغ: {payment.amount}$\n'
+    )
+    notification = Notification.objects.create(
+        booking=booking,
+        recipient_email=booking.email,
+        subject=subject,
+        message=message,
+    )
+    try:
+        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [booking.email])
+    except Exception:
+        logger.exception('Payment notification failed for %s', booking.booking_number)
+        return
+    Notification.objects.filter(pk=notification.pk).update(is_sent=True, sent_at=timezone.now())
+
+
+@csrf_exempt
+@require_POST
+def payment_webhook(request):
+    body = request.body
+    if not verify_signature(body, request.META.get(SIGNATURE_HEADER, '')):
+        return JsonResponse({'error': 'invalid signature'}, status=401)
+
+    try:
+        events = _parse_events(json.loads(body))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    if len(events) > settings.PAYMENT_WEBHOOK_MAX_EVENTS:
+        return JsonResponse({'error': 'too many events'}, status=413)
+
+    now = timezone.now()
+    with transaction.atomic():
+        fresh = _claim_new_events(events)
+        applied = [event.event_id for event in fresh if _apply_event(event, now)]
+        if applied:
+            PaymentWebhookEvent.objects.filter(event_id__in=applied).update(applied=True)
+            transaction.on_commit(
+                lambda: [background.submit(send_payment_notification, event_id) for event_id in applied]
+            )
+
+    return JsonResponse({
+        'received': len(events),
+        'duplicates': len(events) - len(fresh),
+        'applied': len(applied),
+        'ignored': len(fresh) - len(applied),
+    })
@@ -0,0 +1,118 @@
+import atexit
+import logging
+import threading
+from collections import deque
+
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.forms.models import model_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Buffer unsaved model instances in memory and write them with ``bulk_create``.
+
+    A daemon thread flushes every ``flush_interval`` seconds, or sooner once
+    ``flush_size`` rows are waiting. ``put`` refuses new rows past
+    ``max_pending`` so a burst cannot grow the buffer without bound.
+    ``bulk_options`` are passed to ``bulk_create`` (e.g. conflict handling).
+    With ``unique_key`` set, only the last row queued for each key is kept
+    in a batch, as an upsert cannot touch the same row twice in one
+    statement.
+
+    When a batch fails its rows are written one at a time. A row that
+    fails on its own goes to the back of the queue and is logged and
+    dropped after ``max_attempts`` tries, so one bad row cannot hold up
+    the rest. Connection errors put the batch back untouched.
+    """
+
+    def __init__(self, model, flush_interval, flush_size, max_pending, bulk_options=None, max_attempts=3,
+                 unique_key=None):
+        self.model = model
+        self.unique_key = unique_key
+        self.bulk_options = bulk_options or {}
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.drain)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f'writebehind-{self.model._meta.model_name}', daemon=True
+                )
+                self._thread.start()
+
+    def put(self, instance):
+        if len(self._pending) >= self.max_pending:
+            return False
+        self.start()
+        self._pending.append(instance)
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        batch = []
+        while self._pending and len(batch) < self.flush_size:
+            batch.append(self._pending.popleft())
+        taken = len(batch)
+        if self.unique_key is not None:
+            batch = list({self.unique_key(instance): instance for instance in batch}.values())
+        if batch:
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create(batch, **self.bulk_options)
+            except (OperationalError, InterfaceError):
+                self._pending.extendleft(reversed(batch))
+                raise
+            except Exception:
+                self._write_each(batch)
+        return taken
+
+    def _write_each(self, batch):
+        for index, instance in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([instance], **self.bulk_options)
+            except (OperationalError, InterfaceError):
+                self._pending.extendleft(reversed(batch[index:]))
+                raise
+            except Exception:
+                attempts = getattr(instance, '_writebehind_attempts', 0) + 1
+                if attempts >= self.max_attempts:
+                    logger.exception(
+                        'Dropping %s after %d failed writes: %r', self.model.__name__, attempts, model_to_dict(instance)
+                    )
+                else:
+                    instance._writebehind_attempts = attempts
+                    self._pending.append(instance)
+
+    def drain(self):
+        # الصفوف المعادة إلى آخر الطابور تنتظر الدورة التالية بدل تكرارها فوراً
+        remaining = len(self._pending)
+        while remaining > 0:
+            written = self.flush()
+            if not written:
+                break
+            remaining -= written
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Write-behind flush failed for %s', self.model.__name__)
@@ -0,0 +1,332 @@
+"""
+Per-request timing spans, aggregated into per-view histograms.
+
+``TracingMiddleware`` opens a trace for every request; DB executes (through
+``connection.execute_wrapper``), template renders, cache calls, session
+loads/saves and email sends add their time to it. When the response is
+ready the trace is folded into in-process histograms that ``metrics_view``
+serves in the Prometheus text format. With ``METRICS_DIR`` set, every
+worker also dumps its histograms there every few seconds and the endpoint
+merges all of them. Dump files are named by PID and a stamp taken when
+the process first dumps, so a worker that reuses a dead worker's PID does
+not take over its file, and the endpoint deletes the dumps of processes
+that are gone.
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.module_loading import import_string
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SPAN_KINDS = ('db', 'template', 'cache', 'session', 'email')
+CACHE_METHODS = (
+    'get', 'set', 'add', 'delete', 'touch', 'has_key', 'get_or_set',
+    'get_many', 'set_many', 'delete_many', 'incr', 'decr',
+)
+
+_trace = ContextVar('trace', default=None)
+
+
+class Trace:
+    __slots__ = ('seconds', 'calls', 'active')
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(SPAN_KINDS, 0.0)
+        self.calls = dict.fromkeys(SPAN_KINDS, 0)
+        self.active = set()
+
+
+def timed(kind, func, *args, **kwargs):
+    """Call ``func`` and charge its time to ``kind`` on the current trace, if there is one."""
+    trace = _trace.get()
+    # get_or_set يستدعي get و add داخلياً: يحسب الاستدعاء الخارجي فقط
+    if trace is None or kind in trace.active:
+        return func(*args, **kwargs)
+    trace.active.add(kind)
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        trace.seconds[kind] += time.perf_counter() - started
+        trace.calls[kind] += 1
+        trace.active.discard(kind)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    return timed('db', execute, sql, params, many, context)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self, buckets=None, total=0.0, count=0):
+        self.buckets = buckets or [0] * (len(BUCKETS) + 1)
+        self.sum = total
+        self.count = count
+
+    def observe(self, value):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def to_dict(self):
+        return {'buckets': self.buckets, 'sum': self.sum, 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(list(data['buckets']), data['sum'], data['count'])
+
+
+class Registry:
+    """Histograms keyed by view name; one lock, held only while adding a finished trace."""
+
+    def __init__(self, directory='', dump_seconds=5):
+        self.directory = directory
+        self.dump_seconds = dump_seconds
+        self.requests = {}
+        self.spans = {}
+        self.calls = {}
+        self._lock = threading.Lock()
+        self._dumped_at = time.monotonic()
+        self._owner = None
+        self._filename = ''
+
+    def record(self, view, duration, trace):
+        with self._lock:
+            self.requests.setdefault(view, Histogram()).observe(duration)
+            spans = self.spans.setdefault(view, {})
+            calls = self.calls.setdefault(view, dict.fromkeys(SPAN_KINDS, 0))
+            for kind, count in trace.calls.items():
+                if count:
+                    spans.setdefault(kind, Histogram()).observe(trace.seconds[kind])
+                    calls[kind] += count
+        if self.directory and time.monotonic() - self._dumped_at >= self.dump_seconds:
+            self.dump()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': {view: h.to_dict() for view, h in self.requests.items()},
+                'spans': {view: {kind: h.to_dict() for kind, h in kinds.items()} for view, kinds in self.spans.items()},
+                'calls': {view: dict(kinds) for view, kinds in self.calls.items()},
+            }
+
+    def own_filename(self):
+        """``<pid>-<stamp>.json``; the stamp tells apart two processes that had the same PID."""
+        pid = os.getpid()
+        # عملية فرعية بعد fork ترث السجل فتأخذ اسماً جديداً
+        if self._owner != pid:
+            self._owner = pid
+            self._filename = f'{pid}-{time.time_ns()}.json'
+        return self._filename
+
+    def dump(self):
+        self._dumped_at = time.monotonic()
+        path = os.path.join(self.directory, self.own_filename())
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(f'{path}.tmp', path)
+
+    def _live_dumps(self):
+        """The other processes' dump files; dumps of processes that have exited are deleted."""
+        own = self.own_filename()
+        latest, dead = {}, []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name == own:
+                continue
+            pid, _, started = name[:-len('.json')].partition('-')
+            if not (pid.isdigit() and started.isdigit()) or not _alive(int(pid)):
+                dead.append(name)
+                continue
+            # PID واحد لا يخص إلا عملية واحدة حية: الملف الأقدم لعملية انتهت
+            pid, started = int(pid), int(started)
+            if pid == os.getpid() or (pid in latest and latest[pid][0] > started):
+                dead.append(name)
+                continue
+            if pid in latest:
+                dead.append(latest[pid][1])
+            latest[pid] = (started, name)
+        for name in dead:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return [name for _, name in latest.values()]
+
+    def collect(self):
+        """This process's snapshot, merged with the other workers' dumps when ``directory`` is set."""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            for name in self._live_dumps():
+                try:
+                    with open(os.path.join(self.directory, name), encoding='utf-8') as fh:
+                        snapshots.append(json.load(fh))
+                except (OSError, ValueError):
+                    continue
+
+        requests, spans, calls = {}, {}, {}
+        for snapshot in snapshots:
+            for view, data in snapshot['requests'].items():
+                requests.setdefault(view, Histogram()).merge(Histogram.from_dict(data))
+            for view, kinds in snapshot['spans'].items():
+                for kind, data in kinds.items():
+                    spans.setdefault((view, kind), Histogram()).merge(Histogram.from_dict(data))
+            for view, kinds in snapshot['calls'].items():
+                for kind, count in kinds.items():
+                    calls[(view, kind)] = calls.get((view, kind), 0) + count
+        return requests, spans, calls
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # عملية حية لمستخدم آخر
+        pass
+    return True
+
+
+registry = Registry(
+    directory=getattr(settings, 'METRICS_DIR', ''),
+    dump_seconds=getattr(settings, 'METRICS_DUMP_SECONDS', 5),
+)
+if registry.directory:
+    os.makedirs(registry.directory, exist_ok=True)
+    atexit.register(registry.dump)
+
+
+def _wrap(owner, name, kind):
+    original = getattr(owner, name)
+    if getattr(original, '_traced', False):
+        return
+
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        return timed(kind, original, *args, **kwargs)
+    wrapper._traced = True
+    setattr(owner, name, wrapper)
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """Patch template, cache, session and email entry points once per process."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        _installed = True
+
+        from django.core.cache import caches
+        from django.template.backends.django import Template as DjangoTemplate
+        _wrap(DjangoTemplate, 'render', 'template')
+        if settings.HOT_TEMPLATE_ENGINE:
+            from django.template.backends.jinja2 import Template as Jinja2Template
+            _wrap(Jinja2Template, 'render', 'template')
+
+        for alias in settings.CACHES:
+            backend = type(caches[alias])
+            for name in CACHE_METHODS:
+                _wrap(backend, name, 'cache')
+
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        for name in ('load', 'save'):
+            _wrap(session_store, name, 'session')
+
+        if settings.EMAIL_BACKEND:
+            _wrap(import_string(settings.EMAIL_BACKEND), 'send_messages', 'email')
+
+
+class TracingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        trace = Trace()
+        token = _trace.set(trace)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _trace.reset(token)
+        match = request.resolver_match
+        registry.record(match.view_name if match else 'unmatched', time.perf_counter() - started, trace)
+        return response
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, labels, histogram):
+    cumulative = 0
+    for bound, count in zip(BUCKETS + ('+Inf',), histogram.buckets):
+        cumulative += count
+        yield f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}'
+    yield f'{name}_sum{_labels(**labels)} {histogram.sum:.6f}'
+    yield f'{name}_count{_labels(**labels)} {histogram.count}'
+
+
+def render_metrics():
+    requests, spans, calls = registry.collect()
+    lines = [
+        '# HELP hotel_request_duration_seconds Time spent handling a request, per view.',
+        '# TYPE hotel_request_duration_seconds histogram',
+    ]
+    for view, histogram in sorted(requests.items()):
+        lines.extend(_histogram_lines('hotel_request_duration_seconds', {'view': view}, histogram))
+
+    lines += [
+        '# HELP hotel_span_duration_seconds Time a request spent in one kind of span (db, template, cache, session, email).',
+        '# TYPE hotel_span_duration_seconds histogram',
+    ]
+    for (view, kind), histogram in sorted(spans.items()):
+        lines.extend(_histogram_lines('hotel_span_duration_seconds', {'view': view, 'kind': kind}, histogram))
+
+    lines += [
+        '# HELP hotel_span_calls_total Number of spans recorded, per view and kind.',
+        '# TYPE hotel_span_calls_total counter',
+    ]
+    for (view, kind), count in sorted(calls.items()):
+        if count:
+            lines.append(f'hotel_span_calls_total{_labels(view=view, kind=kind)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
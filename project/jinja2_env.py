@@ -0,0 +1,43 @@
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.formats import localize
+from jinja2 import Environment
+from markupsafe import Markup
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args or None, kwargs=kwargs or None)
+
+
+def cached(fragment_name, *vary_on, timeout=None, caller=None):
+    """
+    Jinja2 counterpart of Django's ``{% cache %}`` tag, used as a call block::
+
+        {% call cached('club_clubs', versions.clubs, timeout=fragment_timeout) %}...{% endcall %}
+
+    Fragments are keyed apart from the Django engine's so the two never serve
+    each other's markup.
+    """
+    try:
+        fragment_cache = caches['template_fragments']
+    except InvalidCacheBackendError:
+        fragment_cache = caches['default']
+    cache_key = make_template_fragment_key(f'jinja2:{fragment_name}', vary_on)
+    value = fragment_cache.get(cache_key)
+    if value is None:
+        value = caller()
+        fragment_cache.set(cache_key, str(value), timeout)
+    return Markup(value)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'cached': cached,
+    })
+    env.filters['localize'] = localize
+    return env
@@ -26,10 +26,23 @@ environ.Env.read_env(BASE_DIR / ".env")
 SECRET_KEY = env('SECRET_KEY')
 DEBUG = env('DEBUG') 
 ALLOWED_HOSTS = env('ALLOWED_HOSTS') 
+
+# عمال الموقع العام لا يحتاجون لوحة الإدارة: بدونها لا تستورد ملفات admin.py عند الإقلاع
+SERVE_ADMIN = env.bool("SERVE_ADMIN", default=True)
+# يؤجل التحقق من إعدادات البريد إلى فحص النظام (manage.py check) بدلاً من إيقاف الإقلاع
+LAZY_BOOT = env.bool("LAZY_BOOT", default=False)
+PREWARM_ON_BOOT = env.bool("PREWARM_ON_BOOT", default=False)
+PREWARM_HOOKS = [
+    'project.startup.load_urlconf',
+    'project.startup.load_templates',
+    'project.startup.load_reference_data',
+    'pages.occupancy.start',
+    'club.checkin.start',
+]
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'django.contrib.admin' if SERVE_ADMIN else 'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -66,6 +79,30 @@ TEMPLATES = [
     },
 ]
 
+# قوالب Jinja2 اختيارية للصفحات الأكثر زيارة (الغرف، الخدمات، النادي، المرافق)
+USE_JINJA2_TEMPLATES = env.bool("USE_JINJA2_TEMPLATES", default=False)
+HOT_TEMPLATE_ENGINE = None
+JINJA2_TEMPLATES = {
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'DIRS': [],
+    'APP_DIRS': True,
+    'OPTIONS': {
+        'environment': 'project.jinja2_env.environment',
+        'context_processors': [
+            'django.template.context_processors.request',
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+        ],
+    },
+}
+
+if USE_JINJA2_TEMPLATES:
+    TEMPLATES.append(JINJA2_TEMPLATES)
+    HOT_TEMPLATE_ENGINE = 'jinja2'
+
+# تدخل في ETag الصفحات؛ غيّرها مع كل نشر يعدل القوالب حتى لا ترد المتصفحات بنسخ قديمة
+CONDITIONAL_GET_RELEASE = env("CONDITIONAL_GET_RELEASE", default="")
+
 WSGI_APPLICATION = 'project.wsgi.application'
 
 
@@ -76,6 +113,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # الكتابات المتزامنة (webhooks والحجوزات) تحتاج قفل كتابة مبكر بدلاً من فشل "database is locked"
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        },
     }
 }
 
@@ -128,13 +171,109 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-EMAIL_BACKEND = env("EMAIL_BACKEND")
+# مع LAZY_BOOT لا يفشل الإقلاع إذا نقص متغير بريد؛ الفحص pages.E001 يبلغ عنه
+_email_default = {'default': None} if LAZY_BOOT else {}
+EMAIL_BACKEND = env("EMAIL_BACKEND", **_email_default)
+
+EMAIL_HOST = env("EMAIL_HOST", **_email_default)
+EMAIL_HOST_USER = env("EMAIL_HOST_USER", **_email_default)
+EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", **_email_default)
+
+EMAIL_PORT = env.int("EMAIL_PORT", **_email_default)
+EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", **_email_default)
+
+DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", **_email_default)
+PAYMENT_WEBHOOK_SECRET = env("PAYMENT_WEBHOOK_SECRET", default="")
+PAYMENT_WEBHOOK_MAX_EVENTS = env.int("PAYMENT_WEBHOOK_MAX_EVENTS", default=500)
+
+# رموز شركات السياحة لواجهة الحجز الجماعي (Authorization: Bearer ...)؛ فارغة = الواجهة مغلقة
+GROUP_BOOKING_API_TOKENS = env.list("GROUP_BOOKING_API_TOKENS", default=[])
+GROUP_BOOKING_MAX_ROOMS = env.int("GROUP_BOOKING_MAX_ROOMS", default=50)
+
+# رمز أجهزة البوابات (X-Device-Token)؛ فارغ = نقطة تسجيل الدخول معطلة
+CHECKIN_DEVICE_TOKEN = env("CHECKIN_DEVICE_TOKEN", default="")
+CHECKIN_REFRESH_SECONDS = env.int("CHECKIN_REFRESH_SECONDS", default=60)
+CHECKIN_FLUSH_SECONDS = env.float("CHECKIN_FLUSH_SECONDS", default=2)
+CHECKIN_FLUSH_SIZE = env.int("CHECKIN_FLUSH_SIZE", default=500)
+CHECKIN_MAX_PENDING = env.int("CHECKIN_MAX_PENDING", default=50000)
+
+CLUB_FRAGMENT_CACHE_TIMEOUT = env.int("CLUB_FRAGMENT_CACHE_TIMEOUT", default=60 * 60 * 24 * 7)
+# مع كاش محلي لكل عملية (CACHE_URL الافتراضي) تتجدد الأجزاء والجدول في كل العمال بعد هذه المدة على الأكثر
+CLUB_LOCAL_CACHE_SECONDS = env.int("CLUB_LOCAL_CACHE_SECONDS", default=60)
+
+CONTACT_FLUSH_MS = env.int("CONTACT_FLUSH_MS", default=500)
+CONTACT_FLUSH_ROWS = env.int("CONTACT_FLUSH_ROWS", default=200)
+CONTACT_MAX_PENDING = env.int("CONTACT_MAX_PENDING", default=10000)
+CONTACT_RATE_PER_MINUTE = env.float("CONTACT_RATE_PER_MINUTE", default=5)
+CONTACT_RATE_BURST = env.int("CONTACT_RATE_BURST", default=3)
+
+# CACHE_URL مثال: redis://127.0.0.1:6379/1 — الافتراضي ذاكرة محلية لكل عملية
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# مقاييس زمن كل صفحة (قاعدة البيانات، القوالب، الكاش، الجلسة، البريد) بصيغة Prometheus على /metrics
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=False)
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=['127.0.0.1', '::1'])
+# مجلد مشترك بين عمال gunicorn لتجميع مقاييسهم؛ فارغ = مقاييس العملية الحالية فقط
+METRICS_DIR = env("METRICS_DIR", default="")
+METRICS_DUMP_SECONDS = env.float("METRICS_DUMP_SECONDS", default=5)
+
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'project.instrumentation.TracingMiddleware')
+
+# سجل الاستعلامات البطيئة مع خطة التنفيذ، يعرض في لوحة الإدارة (آخر SLOW_QUERY_BUFFER_SIZE استعلام)
+SLOW_QUERY_LOG = env.bool("SLOW_QUERY_LOG", default=False)
+SLOW_QUERY_MS = env.float("SLOW_QUERY_MS", default=100)
+SLOW_QUERY_SAMPLE_RATE = env.float("SLOW_QUERY_SAMPLE_RATE", default=0.1)
+SLOW_QUERY_BUFFER_SIZE = env.int("SLOW_QUERY_BUFFER_SIZE", default=500)
+
+if SLOW_QUERY_LOG:
+    MIDDLEWARE.insert(1 if METRICS_ENABLED else 0, 'pages.slowqueries.SlowQueryMiddleware')
+
+# عينات مكدس الاستدعاء لطلبات حية (pages/profiling.py): بطلب موقع (manage.py profile_token)
+# أو عشوائياً بالنسبة المحددة لكل صفحة؛ تحفظ بصيغة collapsed وتنزل من لوحة الإدارة
+PROFILE_ENABLED = env.bool("PROFILE_ENABLED", default=False)
+PROFILE_SAMPLE_VIEWS = {
+    'pages:booking_step3': env.float("PROFILE_BOOKING_STEP3_RATE", default=0.01),
+    'pages:booking_confirmation': env.float("PROFILE_BOOKING_CONFIRMATION_RATE", default=0.01),
+}
+PROFILE_INTERVAL_MS = env.float("PROFILE_INTERVAL_MS", default=5)
+PROFILE_MAX_CONCURRENT = env.int("PROFILE_MAX_CONCURRENT", default=2)
+PROFILE_TOKEN_MAX_AGE = env.int("PROFILE_TOKEN_MAX_AGE", default=60 * 60)
+PROFILE_DIR = env("PROFILE_DIR", default=str(BASE_DIR / 'profiles'))
+PROFILE_MAX_FILES = env.int("PROFILE_MAX_FILES", default=200)
+
+if PROFILE_ENABLED:
+    MIDDLEWARE.append('pages.profiling.ProfilingMiddleware')
+
+# الرابط العام للموقع، يستخدم في الروابط المرسلة بالبريد من خارج الطلبات
+SITE_URL = env("SITE_URL", default="http://localhost:8000")
+
+# مدة عرض الغرفة على المسجل في قائمة الانتظار قبل أن ينتقل لمن بعده
+WAITLIST_OFFER_MINUTES = env.int("WAITLIST_OFFER_MINUTES", default=120)
+
+# قنوات البيع (OTA) التي تستقبل التوافر والأسعار؛ فارغة = لا يسجل أي تغيير
+# FAKE_OTA_URL مثال: http://127.0.0.1:8765/inventory (manage.py fake_ota)
+CHANNELS = {}
+if env("FAKE_OTA_URL", default=""):
+    CHANNELS['fake_ota'] = {
+        'BACKEND': 'pages.channels.HttpChannelAdapter',
+        'URL': env("FAKE_OTA_URL"),
+        'BATCH_SIZE': env.int("FAKE_OTA_BATCH_SIZE", default=200),
+    }
+CHANNEL_SYNC_DAYS = env.int("CHANNEL_SYNC_DAYS", default=365)
+CHANNEL_SYNC_MAX_ATTEMPTS = env.int("CHANNEL_SYNC_MAX_ATTEMPTS", default=5)
+CHANNEL_SYNC_RETRY_SECONDS = env.float("CHANNEL_SYNC_RETRY_SECONDS", default=0.5)
 
-EMAIL_HOST = env("EMAIL_HOST")
-EMAIL_HOST_USER = env("EMAIL_HOST_USER")
-EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
+# تقويم الإشغال في ذاكرة كل عامل (pages/occupancy.py): مداه بالأيام وفترة مطابقته مع قاعدة البيانات
+OCCUPANCY_HORIZON_DAYS = env.int("OCCUPANCY_HORIZON_DAYS", default=730)
+OCCUPANCY_RECONCILE_SECONDS = env.float("OCCUPANCY_RECONCILE_SECONDS", default=300)
 
-EMAIL_PORT = env.int("EMAIL_PORT")
-EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS")
+# الحجوزات التي غادرت قبل هذا العدد من الأشهر تنقل إلى جداول الأرشيف (manage.py archive_bookings)
+ARCHIVE_AFTER_MONTHS = env.int("ARCHIVE_AFTER_MONTHS", default=18)
+ARCHIVE_BATCH_SIZE = env.int("ARCHIVE_BATCH_SIZE", default=500)
 
-DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL")
\ No newline at end of file
+REFDATA_LOCAL_TTL = env.float("REFDATA_LOCAL_TTL", default=5)
+REFDATA_SHARED_TIMEOUT = env.int("REFDATA_SHARED_TIMEOUT", default=60 * 60 * 24)
@@ -0,0 +1,127 @@
+"""
+Worker boot helpers.
+
+``prewarm()`` is called from ``wsgi.py`` once the application is loaded and
+runs ``settings.PREWARM_HOOKS`` so the first request does not pay for
+importing views or compiling templates. Running this module directly
+(``python -X importtime -m project.startup``) boots Django the way a worker
+does and prints the phase timings as JSON; ``manage.py startup_profile``
+drives it.
+"""
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+HOT_TEMPLATES = [
+    'pages/rooms.html',
+    'pages/room_details.html',
+    'pages/services.html',
+    'club/club.html',
+    'club/facilities.html',
+]
+
+
+def load_urlconf():
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+
+def load_templates():
+    from django.conf import settings
+    from django.template.loader import get_template
+    for name in HOT_TEMPLATES:
+        get_template(name, using=settings.HOT_TEMPLATE_ENGINE)
+
+
+def load_reference_data():
+    from pages.refdata import reference_data
+    for name in ('services', 'membership_plans', 'nationalities'):
+        reference_data.get(name)
+
+
+def prewarm():
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    if not settings.PREWARM_ON_BOOT:
+        return
+    for path in settings.PREWARM_HOOKS:
+        started = time.perf_counter()
+        try:
+            import_string(path)()
+        except Exception:
+            # الإحماء تحسين فقط؛ فشله لا يجب أن يمنع العامل من الإقلاع
+            logger.exception('Pre-warm hook %s failed', path)
+            continue
+        logger.info('Pre-warm hook %s took %.1f ms', path, (time.perf_counter() - started) * 1000)
+
+
+def _ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def profile_boot():
+    """Boot like a WSGI worker and return the time spent in each phase, in milliseconds."""
+    started = time.perf_counter()
+    import django
+    from django.apps.config import AppConfig
+    from django.conf import settings
+
+    apps_timings = {}
+    create = AppConfig.create
+
+    def timed_create(entry):
+        config = create(entry)
+        timings = apps_timings.setdefault(config.label, {'models': 0, 'ready': 0})
+        import_models, ready = config.import_models, config.ready
+
+        def timed_import_models():
+            phase = time.perf_counter()
+            import_models()
+            timings['models'] = _ms(phase)
+
+        def timed_ready():
+            phase = time.perf_counter()
+            ready()
+            timings['ready'] = _ms(phase)
+
+        config.import_models, config.ready = timed_import_models, timed_ready
+        return config
+
+    AppConfig.create = timed_create
+
+    phases = {'django': _ms(started)}
+    phase = time.perf_counter()
+    settings.INSTALLED_APPS
+    phases['settings'] = _ms(phase)
+
+    phase = time.perf_counter()
+    django.setup(set_prefix=False)
+    phases['apps'] = _ms(phase)
+
+    phase = time.perf_counter()
+    from django.core.handlers.wsgi import WSGIHandler
+    WSGIHandler()
+    phases['middleware'] = _ms(phase)
+
+    phase = time.perf_counter()
+    prewarm()
+    phases['prewarm'] = _ms(phase)
+
+    phase = time.perf_counter()
+    load_urlconf()
+    phases['urlconf'] = _ms(phase)
+
+    return {
+        'boot_ms': phases['django'] + phases['settings'] + phases['apps'] + phases['middleware'] + phases['prewarm'],
+        'first_request_ms': phases['urlconf'],
+        'phases': phases,
+        'apps': apps_timings,
+    }
+
+
+if __name__ == '__main__':
+    json.dump(profile_boot(), sys.stdout)